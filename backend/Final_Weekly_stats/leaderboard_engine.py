@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Leaderboard Engine
+Set-based computation of the weekly points leaderboard.
+
+One SQL statement reads the records of every requested date range for the whole roster
+and keeps each player's best record per track with a window function (lowest rank, the
+most recent one on ties). Points, counts and positions are then columnar pandas/NumPy
+operations; the competition multiplier is a searchsorted lookup on
+challenge_info.total_records.
+
+Scoring: each best record earns base points by rank, Top1 = 5, Top3 = 3, Top5 = 2, any
+other record (a non-numeric rank included) = 1, times the competition multiplier of its
+track, which grows with the number of records on it:
+
+    total_records   unknown  1    2-4  5-9  10-14  15-19  20+
+    multiplier      0.5      0.1  0.2  0.4  0.6    0.8    1.0
+
+Ties in the standings keep roster order.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from schema import NO_RANK, day_bounds
+
+# Competition multiplier by challenge_info.total_records (see the table above)
+MULTIPLIER_BOUNDS = np.array([1, 2, 5, 10, 15, 20])
+MULTIPLIERS = np.array([0.5, 0.1, 0.2, 0.4, 0.6, 0.8, 1.0])
+UNKNOWN_MULTIPLIER = 0.5
+
+STANDING_COLUMNS = ['period', 'player_login', 'nickname', 'top5', 'top3', 'top1', 'total_records', 'avg_rank',
+                    'points', 'position']
+
+
+def competition_multipliers(total_records):
+    """Points multiplier per total_records of a track (NaN = unknown, see the table above)"""
+    totals = np.asarray(total_records, dtype=float)
+    multipliers = MULTIPLIERS[np.searchsorted(MULTIPLIER_BOUNDS, np.nan_to_num(totals, nan=0), side='right')]
+    return np.where(np.isnan(totals), UNKNOWN_MULTIPLIER, multipliers)
+
+
+def base_points(rank_int, rank_text):
+    """5/3/2/1 by numeric rank; 1 for a non-numeric rank, 0 when the rank is empty"""
+    rank = np.asarray(rank_int, dtype=float)
+    numeric = np.select([rank == 1, rank <= 3, rank <= 5], [5, 3, 2], default=1)
+    has_text = pd.Series(rank_text).fillna('').astype(str).ne('').to_numpy()
+    return np.where(np.isnan(rank), np.where(has_text, 1, 0), numeric)
+
+
+BEST_RECORD_COLUMNS = ['period', 'player_login', 'NickName', 'Challenge', 'Rank', 'rank_int', 'RecordDate',
+                       'total_records']
+
+# The Sunday starting the week of a record, as 'YYYY-MM-DD'
+WEEK_START_EXPR = """date(substr("RecordDate", 1, 10), '-' || strftime('%w', substr("RecordDate", 1, 10)) || ' days')"""
+
+
+def _best_per_track(conn, ranged_sql, params, periods=None):
+    """Keep the best record per (period, player, track) of ranged_sql's rows, joined with
+    challenge_info; periods optionally restricts the periods returned"""
+    period_filter = ''
+    if periods is not None:
+        period_filter = f"AND period IN ({', '.join(['?'] * len(periods))})"
+        params = list(params) + list(periods)
+    return pd.read_sql_query(f'''
+        WITH ranged AS ({ranged_sql}
+        ),
+        best AS (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY period, player_login, Challenge
+                ORDER BY COALESCE(rank_int, {NO_RANK}), "RecordDate" DESC
+            ) AS rn
+            FROM ranged
+            WHERE player_login != '' AND Challenge != '' {period_filter}
+        )
+        SELECT b.period, b.player_login, b.NickName, b.Challenge, b.Rank, b.rank_int, b."RecordDate",
+               ci.total_records
+        FROM best b
+        LEFT JOIN challenge_info ci ON ci.challenge_name = b.Challenge AND ci.total_records > 0
+        WHERE b.rn = 1
+    ''', conn, params=params)
+
+
+def best_records(conn, logins, ranges):
+    """Best record per (period, player, track) for the roster, in one query.
+
+    ranges is a list of (start, end) dates, both days inclusive; the returned period column
+    is the index into it. Columns: period, player_login, NickName, Challenge, Rank,
+    rank_int, RecordDate, total_records (NaN when the track has no challenge info).
+    """
+    if not logins or not ranges:
+        return pd.DataFrame(columns=BEST_RECORD_COLUMNS)
+    roster = ', '.join(['?'] * len(logins))
+    ranged = '\n            UNION ALL\n'.join(f'''
+            SELECT {period} AS period, player_login, NickName, Challenge, Rank, rank_int, "RecordDate"
+            FROM dedimania_records
+            WHERE "RecordDate" >= ? AND "RecordDate" < ? AND player_login IN ({roster})''' for period in range(len(ranges)))
+    params = []
+    for start, end in ranges:
+        params += list(day_bounds(start, end)) + list(logins)
+    return _best_per_track(conn, ranged, params)
+
+
+def weekly_best_records(conn, logins, first_week, last_week, weeks=None):
+    """Best record per (week, player, track) for every Sunday-Saturday week from first_week
+    to last_week (both Sundays) in a single range scan.
+
+    period is the week's Sunday as 'YYYY-MM-DD'; weeks optionally restricts the result to
+    those Sundays.
+    """
+    if not logins:
+        return pd.DataFrame(columns=BEST_RECORD_COLUMNS)
+    roster = ', '.join(['?'] * len(logins))
+    ranged = f'''
+            SELECT {WEEK_START_EXPR} AS period, player_login, NickName, Challenge, Rank, rank_int, "RecordDate"
+            FROM dedimania_records
+            WHERE "RecordDate" >= ? AND "RecordDate" < ? AND player_login IN ({roster})'''
+    last_day = datetime.strptime(str(last_week)[:10], '%Y-%m-%d') + timedelta(days=6)
+    return _best_per_track(conn, ranged, list(day_bounds(first_week, last_day)) + list(logins), periods=weeks)
+
+
+def standings(best, logins):
+    """Per-period standings from best_records(): one row per player with records, best first.
+
+    position is 1-based within its period; ties on (points, top1, top3, top5) keep the
+    order of logins.
+    """
+    if best.empty:
+        return pd.DataFrame(columns=STANDING_COLUMNS)
+    rank = best['rank_int'].astype(float)
+    df = pd.DataFrame({
+        'period': best['period'],
+        'player_login': best['player_login'],
+        'top1': best['Rank'] == '1',
+        'top3': rank.between(1, 3),
+        'top5': rank.between(1, 5),
+        'rank': rank,
+        'points': base_points(rank, best['Rank']) * competition_multipliers(best['total_records']),
+    })
+    table = df.groupby(['period', 'player_login'], sort=False).agg(
+        top5=('top5', 'sum'),
+        top3=('top3', 'sum'),
+        top1=('top1', 'sum'),
+        total_records=('top1', 'size'),
+        avg_rank=('rank', 'mean'),
+        points=('points', 'sum'),
+    ).reset_index()
+    table['avg_rank'] = table['avg_rank'].fillna(0)
+    table['points'] = table['points'].round(1)
+
+    # Latest non-empty nickname among the kept records, else the login
+    named = best[best['NickName'].fillna('') != '']
+    latest = named.sort_values('RecordDate').groupby(['period', 'player_login'], sort=False)['NickName'].last()
+    table['nickname'] = [latest.get((period, login), login) for period, login in zip(table['period'], table['player_login'])]
+
+    order = {login: i for i, login in enumerate(logins)}
+    table['roster_order'] = table['player_login'].map(order)
+    table = table.sort_values(['period', 'points', 'top1', 'top3', 'top5', 'roster_order'],
+                              ascending=[True, False, False, False, False, True], kind='mergesort')
+    table['position'] = table.groupby('period').cumcount() + 1
+    return table[STANDING_COLUMNS].reset_index(drop=True)
+
+
+def trend_symbol(previous_position, position):
+    """▲(n) / ▼(n) / ■ against the previous position, NEW when there was none"""
+    if previous_position is None:
+        return "NEW"
+    change = previous_position - position
+    if change > 0:
+        return f"▲({change})"
+    if change < 0:
+        return f"▼({abs(change)})"
+    return "■"
+
+
+def leaderboard_rows(conn, logins, current_range, previous_range):
+    """The gaming leaderboard table with trends against previous_range.
+
+    Rows are (nickname, top5, top3, top1, total_records, avg_rank, points, trend), best first.
+    """
+    table = standings(best_records(conn, logins, [current_range, previous_range]), logins)
+    previous = dict(zip(table.loc[table['period'] == 1, 'player_login'], table.loc[table['period'] == 1, 'position']))
+    current = table[table['period'] == 0]
+    return [(row.nickname, int(row.top5), int(row.top3), int(row.top1), int(row.total_records), float(row.avg_rank),
+             float(row.points), trend_symbol(previous.get(row.player_login), row.position))
+            for row in current.itertuples(index=False)]
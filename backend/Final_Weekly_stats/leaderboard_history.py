@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Leaderboard History
+Weekly leaderboard standings stored in weekly_standings, computed incrementally.
+
+Weeks run Sunday to Saturday and are keyed by their Sunday. update_weekly_standings()
+compares each week's content signature and the roster with what the stored standings
+were computed from, and recomputes only the weeks that changed in one range scan
+(leaderboard_engine.weekly_best_records). Rank charts and streaks are then read back
+from the table.
+
+The signature of a week is a hash over the roster's records in it, each as (id, rank,
+challenge_info.total_records of its track) in id order. New records, ranks updated in
+place and total_records updates (which change the competition multipliers) all make
+the week stale, including changes that leave the totals as they were.
+"""
+
+import hashlib
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+import pandas as pd
+
+from leaderboard_engine import WEEK_START_EXPR, weekly_best_records, standings
+
+
+def week_start(value):
+    """The Sunday on or before a date / 'YYYY-MM-DD...' string"""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    return value - timedelta(days=(value.weekday() + 1) % 7)
+
+
+def week_starts(first_week, last_week):
+    """Every Sunday from first_week to last_week, as 'YYYY-MM-DD'"""
+    first, last = week_start(first_week), week_start(last_week)
+    return [(first + timedelta(weeks=i)).isoformat() for i in range((last - first).days // 7 + 1)]
+
+
+def roster_hash(logins):
+    # Order matters: ties in the standings keep roster order
+    return hashlib.sha1('\n'.join(logins).encode('utf-8')).hexdigest()
+
+
+def week_signatures(conn, logins, weeks):
+    """{week: (record count, content signature)} of the roster's records for the given Sundays"""
+    roster = ', '.join(['?'] * len(logins))
+    end = (week_start(weeks[-1]) + timedelta(days=7)).isoformat()
+    rows = conn.execute(f'''
+        SELECT {WEEK_START_EXPR} AS week, r.id, r."Rank", ci.total_records
+        FROM dedimania_records r
+        LEFT JOIN challenge_info ci ON ci.challenge_name = r.Challenge
+        WHERE r."RecordDate" >= ? AND r."RecordDate" < ? AND r.player_login IN ({roster})
+        ORDER BY week, r.id
+    ''', [weeks[0], end] + list(logins))
+    signatures = {}
+    for week, group in groupby(rows, key=lambda row: row[0]):
+        records = [row[1:] for row in group]
+        signatures[week] = (len(records), hashlib.sha1(repr(records).encode('utf-8')).hexdigest())
+    return signatures
+
+
+def update_weekly_standings(conn, logins, first_week, last_week):
+    """Bring weekly_standings up to date for the weeks first_week..last_week; returns the
+    weeks that were (re)computed. Commits."""
+    weeks = week_starts(first_week, last_week)
+    signature = roster_hash(logins)
+    contents = week_signatures(conn, logins, weeks)
+    stored = dict((week, (h, (n, content))) for week, h, n, content in conn.execute(f'''
+        SELECT week_start, roster_hash, record_count, content_signature FROM standings_weeks
+        WHERE week_start IN ({', '.join(['?'] * len(weeks))})
+    ''', weeks))
+    empty = (0, None)
+    stale = [week for week in weeks if stored.get(week) != (signature, contents.get(week, empty))]
+    if not stale:
+        return []
+
+    table = standings(weekly_best_records(conn, logins, stale[0], stale[-1], weeks=stale), logins)
+    now = datetime.now().isoformat(timespec='seconds')
+    placeholders = ', '.join(['?'] * len(stale))
+    conn.execute(f'DELETE FROM weekly_standings WHERE week_start IN ({placeholders})', stale)
+    conn.executemany('''
+        INSERT INTO weekly_standings
+            (week_start, player_login, nickname, position, points, top1, top3, top5, total_records, avg_rank)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(row.period, row.player_login, row.nickname, int(row.position), float(row.points), int(row.top1),
+           int(row.top3), int(row.top5), int(row.total_records), float(row.avg_rank))
+          for row in table.itertuples(index=False)])
+    conn.executemany('''
+        INSERT INTO standings_weeks (week_start, roster_hash, record_count, content_signature, computed_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(week_start) DO UPDATE SET
+            roster_hash = excluded.roster_hash,
+            record_count = excluded.record_count,
+            content_signature = excluded.content_signature,
+            computed_at = excluded.computed_at
+    ''', [(week, signature) + contents.get(week, empty) + (now,) for week in stale])
+    conn.commit()
+    return stale
+
+
+def load_standings(conn, first_week, last_week):
+    """Stored standings for the weeks first_week..last_week, oldest week first"""
+    weeks = week_starts(first_week, last_week)
+    return pd.read_sql_query('''
+        SELECT week_start, player_login, nickname, position, points, top1, top3, top5, total_records, avg_rank
+        FROM weekly_standings
+        WHERE week_start >= ? AND week_start <= ?
+        ORDER BY week_start, position
+    ''', conn, params=(weeks[0], weeks[-1]))
+
+
+def rank_history(history):
+    """Position per player (rows, by latest nickname) and week (columns); NaN = no records"""
+    if history.empty:
+        return pd.DataFrame()
+    names = history.sort_values('week_start').groupby('player_login')['nickname'].last()
+    chart = history.pivot(index='player_login', columns='week_start', values='position').rename_axis(columns=None)
+    chart.index = chart.index.map(names).rename(None)
+    return chart.sort_values(list(chart.columns[::-1]), na_position='last')
+
+
+def _longest_run(flags):
+    longest = current = 0
+    for flag in flags:
+        current = current + 1 if flag else 0
+        longest = max(longest, current)
+    return longest
+
+
+def streak_stats(history, weeks):
+    """Per player: weeks ranked, best position, weeks at #1, podiums, and the current and
+    longest runs of consecutive ranked weeks (the current run ends at the last week)."""
+    if history.empty:
+        return pd.DataFrame()
+    names = history.sort_values('week_start').groupby('player_login')['nickname'].last()
+    positions = history.pivot(index='player_login', columns='week_start', values='position').reindex(columns=weeks)
+    ranked = positions.notna()
+    # Trailing run of ranked weeks: count of ranked weeks after the last unranked one
+    trailing = ranked.iloc[:, ::-1].cumprod(axis=1).sum(axis=1)
+    stats = pd.DataFrame({
+        'Player': names.reindex(positions.index),
+        'Weeks': ranked.sum(axis=1),
+        'Best': positions.min(axis=1).astype(int),
+        '#1': (positions == 1).sum(axis=1),
+        'Podiums': (positions <= 3).sum(axis=1),
+        'Current streak': trailing,
+        'Longest streak': ranked.apply(lambda row: _longest_run(row.tolist()), axis=1),
+    })
+    return stats.sort_values(['#1', 'Podiums', 'Weeks'], ascending=False).reset_index(drop=True)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Leaderboard Render
+The gaming-style leaderboard PNG, drawn from cached layers.
+
+Everything that does not depend on the rows is built once per process and reused:
+the fonts, the banner, the table background with its header and column lines (per
+table height), the row gradients and the blurred neon frame (per size). Gradients are
+NumPy arrays instead of one draw.line call per pixel line.
+
+save_leaderboard_image() stores a hash of the rows in the PNG and skips drawing and
+encoding when the existing image was made from the same rows.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# Bump when the drawing changes, so images rendered by older code are redrawn
+RENDER_VERSION = 1
+TABLE_HASH_KEY = 'leaderboard-table-sha1'
+
+PADDING = 48
+BANNER_HEIGHT = 110
+BANNER_STRIP = 18  # plain band at the bottom of the banner
+HEADER_HEIGHT = 62
+ROW_HEIGHT = 58
+IMG_W = 1700
+LIST_W = IMG_W - PADDING * 2
+BG_COLOR = (8, 12, 20)  # Dark cyberpunk background
+LIST_COLOR = (25, 35, 50)
+BANNER_TEXT = "ĊĦ Team — Weekly Leaderboard"
+MAX_NAME_LENGTH = 20  # Maximum chars to fit in the player column
+
+# Column positions; the last entry is the right edge of the table
+X_RANK, X_PLAYER, X_TOP1, X_TOP3, X_TOP5, X_TOTAL, X_AVG_RANK, X_POINTS, X_TREND = 30, 90, 450, 580, 710, 840, 970, 1120, 1280
+COL_XS = [X_RANK, X_PLAYER, X_TOP1, X_TOP3, X_TOP5, X_TOTAL, X_AVG_RANK, X_POINTS, X_TREND, LIST_W - 30]
+
+# (text, x, color, glow color)
+HEADERS = [
+    ("#", X_RANK, (255, 215, 0), (255, 235, 20)),
+    ("Player", X_PLAYER, (255, 255, 255), (0, 255, 255)),
+    ("Top1", X_TOP1, (255, 69, 0), (255, 100, 0)),
+    ("Top3", X_TOP3, (30, 144, 255), (50, 164, 255)),
+    ("Top5", X_TOP5, (50, 205, 50), (70, 225, 70)),
+    ("Dedi's", X_TOTAL, (200, 200, 200), (220, 220, 220)),
+    ("Avg", X_AVG_RANK, (255, 100, 255), (255, 120, 255)),
+    ("Points", X_POINTS, (0, 255, 255), (20, 255, 255)),
+    ("Trend", X_TREND, (255, 165, 0), (255, 185, 20)),
+]
+
+# Alternating rows go from the base to the gradient color; podium rows are flat tints
+ROW_COLORS = [(35, 45, 65), (25, 35, 55)]
+ROW_GRADIENT_COLORS = [(40, 50, 70), (30, 40, 60)]
+PODIUM_COLORS = [(85, 70, 35), (75, 75, 75), (75, 55, 35)]  # gold, silver, bronze tints
+PODIUM_GLOW_COLORS = [(100, 85, 45), (90, 90, 90), (90, 70, 45)]
+PODIUM_RANK_COLORS = [(255, 215, 0), (192, 192, 192), (205, 127, 50)]
+
+# Font files by role, tried as a set: DejaVu first, then Arial, then PIL's default font
+FONT_SETS = [
+    {'banner': ("DejaVuSans-Bold.ttf", 58), 'header': ("DejaVuSans-Bold.ttf", 36),
+     'row': ("DejaVuSans.ttf", 32), 'row_bold': ("DejaVuSans-Bold.ttf", 34)},
+    {'banner': ("arial.ttf", 58), 'header': ("arialbd.ttf", 36),
+     'row': ("arial.ttf", 32), 'row_bold': ("arialbd.ttf", 34)},
+]
+
+
+@lru_cache(maxsize=None)
+def load_fonts():
+    """{role: font}, loaded once per process"""
+    from PIL import ImageFont
+    for font_set in FONT_SETS:
+        try:
+            return {role: ImageFont.truetype(name, size) for role, (name, size) in font_set.items()}
+        except IOError:
+            continue
+    default = ImageFont.load_default()
+    return {role: default for role in FONT_SETS[0]}
+
+
+def vertical_gradient(width, height, top, bottom, steps=None):
+    """RGB image whose pixel line j is top + (bottom - top) * j / steps, truncated (steps
+    defaults to height)"""
+    from PIL import Image
+    ratio = np.arange(height) / (steps or height)
+    colors = (np.asarray(top) + np.outer(ratio, np.subtract(bottom, top))).astype(np.uint8)
+    return Image.fromarray(np.ascontiguousarray(np.broadcast_to(colors[:, None, :], (height, width, 3))), 'RGB')
+
+
+def add_neon_glow(draw, text, x, y, font, color, glow_color, glow_size=3):
+    """Add a neon glow effect to text"""
+    for i in range(glow_size, 0, -1):
+        for dx in range(-i, i + 1):
+            for dy in range(-i, i + 1):
+                if dx * dx + dy * dy <= i * i:
+                    draw.text((x + dx, y + dy), text, font=font, fill=glow_color)
+    draw.text((x, y), text, font=font, fill=color)
+
+
+@lru_cache(maxsize=None)
+def _banner():
+    from PIL import Image, ImageDraw
+    font = load_fonts()['banner']
+    banner = Image.new('RGB', (IMG_W, BANNER_HEIGHT), (15, 25, 40))
+    banner.paste(vertical_gradient(IMG_W, BANNER_HEIGHT - BANNER_STRIP, (15, 25, 40), (65, 60, 105)), (0, 0))
+    draw = ImageDraw.Draw(banner)
+    left, top, right, bottom = draw.textbbox((0, 0), BANNER_TEXT, font=font)
+    text_x = (IMG_W - (right - left)) // 2
+    text_y = (BANNER_HEIGHT - BANNER_STRIP - (bottom - top)) // 2
+    add_neon_glow(draw, BANNER_TEXT, text_x, text_y, font, (255, 255, 255), (0, 255, 255), glow_size=1)
+    return banner
+
+
+@lru_cache(maxsize=None)
+def _table_background(content_h):
+    """Table background with the header, its accent lines and the full-height column lines"""
+    from PIL import Image, ImageDraw
+    font = load_fonts()['header']
+    list_bg = Image.new('RGB', (LIST_W, content_h + PADDING), LIST_COLOR)
+    draw = ImageDraw.Draw(list_bg)
+    draw.rectangle([(0, HEADER_HEIGHT - 2), (LIST_W, HEADER_HEIGHT)], fill=(0, 255, 255))
+    for text, x, color, glow_color in HEADERS:
+        add_neon_glow(draw, text, x, 15, font, color, glow_color, glow_size=1)
+    for x in COL_XS[1:-1]:
+        for fill, width in [((0, 150, 150), 4), ((0, 200, 200), 3), ((0, 255, 255), 2)]:
+            draw.line([(x - 18, HEADER_HEIGHT - 10), (x - 18, content_h + PADDING)], fill=fill, width=width)
+    draw.line([(30, HEADER_HEIGHT), (LIST_W - 30, HEADER_HEIGHT)], fill=(0, 255, 255), width=2)
+    return list_bg
+
+
+@lru_cache(maxsize=None)
+def _row_gradient(parity):
+    return vertical_gradient(LIST_W, ROW_HEIGHT, ROW_COLORS[parity], ROW_GRADIENT_COLORS[parity])
+
+
+@lru_cache(maxsize=None)
+def _frame(size, radius=24, border=6, border_color=(0, 255, 255), shadow_offset=12, shadow_blur=20,
+           shadow_color=(0, 255, 255, 80)):
+    """(rounded-corner alpha mask, frame with neon border and blurred shadow) for an image size"""
+    from PIL import Image, ImageDraw, ImageFilter
+    w, h = size
+    mask = Image.new('L', (w, h), 0)
+    ImageDraw.Draw(mask).rounded_rectangle([0, 0, w, h], radius=radius, fill=255)
+    frame = Image.new('RGBA', (w + shadow_offset + border * 2, h + shadow_offset + border * 2), (0, 0, 0, 0))
+    if shadow_offset > 0:
+        shadow_mask = Image.new('L', (w + border * 2, h + border * 2), 0)
+        ImageDraw.Draw(shadow_mask).rounded_rectangle([0, 0, w + border * 2 - 1, h + border * 2 - 1],
+                                                      radius=radius + border, fill=255)
+        shadow_layer = Image.new('RGBA', frame.size, (0, 0, 0, 0))
+        shadow_layer.paste(shadow_color, (shadow_offset, shadow_offset), shadow_mask)
+        shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(shadow_blur))
+        frame.paste(shadow_layer, (0, 0), shadow_layer)
+    if border > 0:
+        border_img = Image.new('RGBA', (w + 2 * border, h + 2 * border), (0, 0, 0, 0))
+        border_draw = ImageDraw.Draw(border_img)
+        border_draw.rounded_rectangle([0, 0, w + 2 * border, h + 2 * border], radius=radius + border, fill=border_color)
+        border_draw.rounded_rectangle([border, border, w + border, h + border], radius=radius, fill=(0, 0, 0, 0))
+        frame.paste(border_img, (0, 0), border_img)
+    return mask, frame
+
+
+def add_rounded_corners(im, border=6):
+    """Gaming-style rounded corners with the neon border and glow (frame cached per size)"""
+    mask, frame = _frame(im.size, border=border)
+    rounded = im.convert('RGBA')
+    rounded.putalpha(mask)
+    final_img = frame.copy()
+    final_img.paste(rounded, (border, border), rounded)
+    return final_img
+
+
+def _display_name(raw_name):
+    if len(raw_name) <= MAX_NAME_LENGTH:
+        return raw_name
+    nickname = raw_name[:MAX_NAME_LENGTH - 3] + "..."
+    print(f"🔤 Truncated: '{raw_name}' → '{nickname}' ({len(raw_name)} → {len(nickname)} chars)")
+    return nickname
+
+
+def _trend_color(trend_text):
+    if trend_text.startswith("▲"):
+        return (50, 255, 50)  # Bright green for up
+    if trend_text.startswith("▼"):
+        return (255, 69, 0)  # Red for down
+    if trend_text == "NEW":
+        return (255, 215, 0)  # Gold for new
+    return (200, 200, 200)  # Gray for no change (■)
+
+
+def _draw_row(list_bg, draw, fonts, i, row):
+    y_offset = HEADER_HEIGHT + i * ROW_HEIGHT
+    if i < 3:
+        draw.rectangle([(0, y_offset), (LIST_W, y_offset + ROW_HEIGHT)], fill=PODIUM_COLORS[i])
+        draw.rectangle([(2, y_offset + 2), (LIST_W - 2, y_offset + ROW_HEIGHT - 2)], fill=PODIUM_GLOW_COLORS[i])
+    else:
+        list_bg.paste(_row_gradient(i % 2), (0, y_offset))
+
+    text_y = y_offset + 12
+    row_font, bold = fonts['row'], fonts['row_bold']
+    if i < 3:
+        draw.text((X_RANK, text_y), str(i + 1), font=bold, fill=PODIUM_RANK_COLORS[i])
+    else:
+        draw.text((X_RANK, text_y), str(i + 1), font=row_font, fill=(255, 215, 0))
+
+    points = row[6]
+    cells = [
+        (X_PLAYER, _display_name(str(row[0])), bold, (255, 255, 255)),
+        (X_TOP1, str(row[3]), bold, (255, 69, 0)),
+        (X_TOP3, str(row[2]), bold, (30, 144, 255)),
+        (X_TOP5, str(row[1]), bold, (50, 205, 50)),
+        (X_TOTAL, str(row[4]), row_font, (200, 200, 200)),
+        (X_AVG_RANK, f"{row[5]:.1f}" if row[5] > 0 else "N/A", row_font, (255, 100, 255)),
+        (X_POINTS, str(int(points)) if points == int(points) else str(points), bold, (0, 255, 255)),
+        (X_TREND, row[7], bold, _trend_color(row[7])),
+    ]
+    for x, text, font, fill in cells:
+        draw.text((x, text_y), text, font=font, fill=fill)
+
+    for x in COL_XS[1:-1]:
+        draw.line([(x - 18, y_offset), (x - 18, y_offset + ROW_HEIGHT)], fill=(0, 150, 150), width=2)
+        draw.line([(x - 18, y_offset), (x - 18, y_offset + ROW_HEIGHT)], fill=(0, 255, 255), width=1)
+
+
+def draw_leaderboard(player_table):
+    """The leaderboard image for rows of (nickname, top5, top3, top1, total, avg_rank, points, trend)"""
+    from PIL import Image, ImageDraw
+    fonts = load_fonts()
+    content_h = HEADER_HEIGHT + len(player_table) * ROW_HEIGHT
+    final_img = Image.new('RGB', (IMG_W, BANNER_HEIGHT + content_h + PADDING * 2), BG_COLOR)
+    final_img.paste(_banner(), (0, 0))
+
+    list_bg = _table_background(content_h).copy()
+    draw = ImageDraw.Draw(list_bg)
+    for i, row in enumerate(player_table):
+        _draw_row(list_bg, draw, fonts, i, row)
+
+    styled_list = add_rounded_corners(list_bg)
+    final_img.paste(styled_list, (PADDING - 10, BANNER_HEIGHT), styled_list)
+    return final_img
+
+
+def table_hash(player_table):
+    """Hash of the rows and the drawing version, stored in the PNG"""
+    payload = repr((RENDER_VERSION, [tuple(row) for row in player_table]))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def stored_table_hash(path):
+    """The table hash of an image written by save_leaderboard_image(), or None"""
+    from PIL import Image
+    if not os.path.exists(path):
+        return None
+    try:
+        # Text chunks are written before the image data, so this doesn't decode the pixels
+        with Image.open(path) as im:
+            return im.info.get(TABLE_HASH_KEY)
+    except (OSError, SyntaxError):
+        return None
+
+
+def save_leaderboard_image(player_table, out_path, force=False):
+    """Render the rows to out_path unless it already holds the image of the same rows.
+
+    Returns True when the image was (re)written.
+    """
+    from PIL.PngImagePlugin import PngInfo
+    digest = table_hash(player_table)
+    if not force and stored_table_hash(out_path) == digest:
+        return False
+    info = PngInfo()
+    info.add_text(TABLE_HASH_KEY, digest)
+    draw_leaderboard(player_table).save(out_path, pnginfo=info)
+    return True
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Record Model
+Parsed dedimania records for the weekly stats analyzers.
+
+The records query returns the (login, nick, track, time, rank, date, envir, mode, server)
+text fields followed by the typed rank_int, record_ms and record_epoch columns (see
+schema.py). parse_records() turns each row into a ParsedRecord once at load time, with
+the rank as an integer, the date as a timestamp, the record time in milliseconds and
+integer ids for the login, track and environment, so the analyzers no longer re-parse
+the same fields with int(), strptime and format_time each. Rows of text fields only are
+converted with the schema.py functions that fill the typed columns.
+
+Timestamps are the stored local date and time counted as seconds since 1970-01-01
+(no timezone conversion), so day, hour and weekday come out as integer arithmetic.
+"""
+
+from datetime import date
+
+from schema import NO_RANK, rank_to_int, record_to_ms, recorddate_to_epoch
+
+RECORD_FIELDS = ('login', 'nick', 'track', 'time', 'rank', 'date', 'envir', 'mode', 'server')
+# Typed columns selected after the text fields
+TYPED_FIELDS = ('rank_int', 'record_ms', 'record_epoch')
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday = 0)
+
+
+class ParsedRecord:
+    """One record with its text fields and their parsed values.
+
+    rank_int   the rank as an integer; NO_RANK when it is empty, None when it is not a number
+    timestamp  seconds since 1970-01-01 of the record date (record_epoch), None when it doesn't parse
+    time_ms    record time in milliseconds (record_ms), None when there is no usable time
+    login_id, track_id, env_id   ids from the RecordIndex the record was parsed with
+    """
+
+    __slots__ = RECORD_FIELDS + ('rank_int', 'timestamp', 'time_ms', 'login_id', 'track_id', 'env_id')
+
+    def __init__(self, row, index):
+        (self.login, self.nick, self.track, self.time, self.rank,
+         self.date, self.envir, self.mode, self.server) = row[:len(RECORD_FIELDS)]
+        if len(row) > len(RECORD_FIELDS):
+            rank_int, self.time_ms, self.timestamp = row[len(RECORD_FIELDS):]
+        else:
+            rank_int, self.time_ms, self.timestamp = (
+                rank_to_int(self.rank), record_to_ms(self.time), recorddate_to_epoch(self.date))
+        # rank_int is NULL for an empty rank too; an empty rank counts as NO_RANK
+        self.rank_int = rank_int if self.rank else NO_RANK
+        self.login_id = index.login_ids.id(self.login)
+        self.track_id = index.track_ids.id(self.track)
+        self.env_id = index.env_ids.id(self.envir)
+
+    @property
+    def sort_rank(self):
+        """Rank for best-record comparisons: a non-numeric rank counts as NO_RANK"""
+        return NO_RANK if self.rank_int is None else self.rank_int
+
+    @property
+    def day(self):
+        """Days since 1970-01-01"""
+        return self.timestamp // SECONDS_PER_DAY
+
+    @property
+    def hour(self):
+        return self.timestamp % SECONDS_PER_DAY // 3600
+
+    @property
+    def weekday(self):
+        """Monday = 0 ... Sunday = 6"""
+        return (self.day + EPOCH_WEEKDAY) % 7
+
+    def fields(self):
+        """The original query tuple"""
+        return (self.login, self.nick, self.track, self.time, self.rank,
+                self.date, self.envir, self.mode, self.server)
+
+    def __repr__(self):
+        return f"ParsedRecord{self.fields()!r}"
+
+
+class Interner:
+    """Dense integer ids for repeated strings"""
+
+    __slots__ = ('ids', 'values')
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def id(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __len__(self):
+        return len(self.values)
+
+
+class RecordIndex:
+    """The login, track and environment ids shared by one set of parsed records"""
+
+    def __init__(self):
+        self.login_ids = Interner()
+        self.track_ids = Interner()
+        self.env_ids = Interner()
+
+
+def day_number(value):
+    """Days since 1970-01-01 of a date"""
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def day_string(day):
+    """'YYYY-MM-DD' of a day number (days since 1970-01-01)"""
+    return date.fromordinal(EPOCH_ORDINAL + day).isoformat()
+
+
+def parse_records(rows, index=None):
+    """ParsedRecords for query rows (text fields, optionally followed by TYPED_FIELDS), with
+    ids from index (a new RecordIndex by default)"""
+    index = index or RecordIndex()
+    return [ParsedRecord(row, index) for row in rows]
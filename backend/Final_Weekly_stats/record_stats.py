@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Record Statistics
+Columnar statistics over record DataFrames for the Team Statistics and Player Analytics pages.
+
+prepare_records() converts a frame once: Rank to a numeric column (NaN when it is not a
+number), RecordDate to datetimes, and the repetitive text columns to categoricals. The
+other functions are groupby/agg and boolean masks over those columns, so their cost
+grows with the number of columns touched rather than with Python work per row.
+"""
+
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ['player_login', 'Challenge', 'Envir']
+MAX_RANK_SHOWN = 20
+
+
+def prepare_records(records_df):
+    """Copy of records_df with rank_num, record_dt and categorical text columns added/converted"""
+    df = records_df.copy()
+    rank = df['Rank'].astype(str)
+    df['rank_num'] = pd.to_numeric(rank.where(rank.str.isdigit()), errors='coerce')
+    df['record_dt'] = pd.to_datetime(df['RecordDate'], errors='coerce')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def player_stats(df):
+    """Per-player counts from a prepared frame, indexed by login in order of first appearance.
+
+    Columns: nickname (from the player's last row, login when empty), total_records,
+    world_records, top3_records, top5_records, tracks.
+    """
+    nickname = df['NickName'].where(df['NickName'].fillna('') != '', df['player_login'].astype(str))
+    grouped = pd.DataFrame({
+        'player_login': df['player_login'],
+        'nickname': nickname,
+        'world': df['rank_num'] == 1,
+        'top3': df['rank_num'] <= 3,
+        'top5': df['rank_num'] <= 5,
+        'Challenge': df['Challenge'],
+    }).groupby('player_login', sort=False, observed=True)
+    stats = grouped.agg(
+        nickname=('nickname', 'last'),
+        total_records=('world', 'size'),
+        world_records=('world', 'sum'),
+        top3_records=('top3', 'sum'),
+        top5_records=('top5', 'sum'),
+        tracks=('Challenge', 'nunique'),
+    )
+    stats.index = stats.index.astype(str)
+    return stats
+
+
+def leaderboard_table(stats):
+    """The Team Statistics leaderboard from player_stats(), best first"""
+    df = pd.DataFrame({
+        'Player': stats['nickname'],
+        'WRs': stats['world_records'],
+        'Top 3': stats['top3_records'],
+        'Top 5': stats['top5_records'],
+        'Total': stats['total_records'],
+        'Tracks': stats['tracks'],
+        'WR%': (stats['world_records'] / stats['total_records'].clip(lower=1)).map('{:.1%}'.format),
+    }).reset_index(drop=True)
+    return df.sort_values(['WRs', 'Top 3', 'Top 5'], ascending=False)
+
+
+def weekend_split(df):
+    """(weekend_records, weekday_records) for a prepared frame"""
+    weekend = int((df['record_dt'].dt.weekday >= 5).sum())
+    return weekend, len(df) - weekend
+
+
+def player_summary(df):
+    """Everything Player Analytics shows for one player's prepared frame (newest record first)"""
+    ranks = df['rank_num'].dropna()
+    favorite = df['Envir'].mode()
+    first, last = df['record_dt'].min(), df['record_dt'].max()
+    return {
+        'total_records': len(df),
+        'world_records': int((df['rank_num'] == 1).sum()),
+        'top3_records': int((ranks <= 3).sum()),
+        'top5_records': int((ranks <= 5).sum()),
+        'unique_tracks': df['Challenge'].nunique(),
+        'avg_rank': ranks.mean() if len(ranks) > 0 else 0,
+        'activity_days': (last - first).days + 1 if len(df) > 0 else 0,
+        'favorite_env': str(favorite.iloc[0]) if len(favorite) > 0 else "Unknown",
+        'rank_counts': ranks[ranks <= MAX_RANK_SHOWN].astype(int).value_counts().sort_index(),
+        'env_counts': df['Envir'].value_counts().loc[lambda s: s > 0],
+        'world_record_tracks': df.loc[df['rank_num'] == 1, 'Challenge'].astype(str).tolist(),
+    }
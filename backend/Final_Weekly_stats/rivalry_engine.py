@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Rivalry Engine
+Head-to-head comparisons between players as matrix operations.
+
+The records of a period are reduced once to a best-rank matrix (player x track). Shared
+track counts, wins and losses for every pair of players then come out of a handful of
+NumPy operations instead of filtering the records for each pair and track.
+
+A player's best rank on a track is the lowest numeric Rank among their records there;
+a track played only with non-numeric ranks counts as rank 999, as on the dashboard.
+
+Both the Streamlit dashboard (find_rivalries) and the weekly reports and heatmap
+(weekly_rivalries) read their rivalries from a HeadToHead built here. Every rivalry is a
+dict with the same keys:
+
+    player1, player2   display names
+    login1, login2     logins, in the same order as the names
+    shared_tracks      tracks counted for the pair (see each function)
+    p1_wins, p2_wins   tracks where that player has the better best rank
+    total_battles      p1_wins + p2_wins (tracks with a winner)
+    score              "p1_wins-p2_wins"
+    leader             name of the player with more wins, or "Tied"
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import NO_RANK
+
+MIN_SHARED_TRACKS = 3
+MIN_BATTLES = 2
+
+# Weekly report thresholds: pairs with at least WEEKLY_MIN_TRACKS decided tracks, topped
+# up with 2-track pairs until there are WEEKLY_TARGET_RIVALRIES
+WEEKLY_MIN_TRACKS = 3
+WEEKLY_TARGET_RIVALRIES = 15
+
+RECORD_TUPLE_COLUMNS = ['player_login', 'NickName', 'Challenge', 'Record', 'Rank', 'RecordDate', 'Envir', 'Mode',
+                        'server']
+
+
+class BestRankMatrix:
+    """Best rank per (player, track); np.inf where the player has no record on the track"""
+
+    def __init__(self, players, tracks, ranks):
+        self.players = players
+        self.tracks = tracks
+        self.ranks = ranks
+        self.played = np.isfinite(ranks)
+
+    @classmethod
+    def from_records(cls, records_df, player_col='player_login', track_col='Challenge', rank_col='Rank'):
+        """Build from a records DataFrame; players and tracks keep their order of first appearance"""
+        players = list(pd.unique(records_df[player_col]))
+        tracks = list(pd.unique(records_df[track_col]))
+        ranks = pd.to_numeric(records_df[rank_col].astype(str).where(
+            records_df[rank_col].astype(str).str.isdigit()), errors='coerce')
+        best = (pd.DataFrame({'player': records_df[player_col].values,
+                              'track': records_df[track_col].values,
+                              'rank': ranks.values})
+                .groupby(['player', 'track'], sort=False, dropna=False, observed=True)['rank'].min()
+                .fillna(NO_RANK)
+                .unstack('track'))
+        best = best.reindex(index=players, columns=tracks)
+        return cls(players, tracks, best.to_numpy(dtype=float, na_value=np.inf))
+
+    def shared_tracks(self):
+        """P x P matrix of tracks both players have a record on"""
+        played = self.played.astype(np.int32)
+        return played @ played.T
+
+    def wins(self):
+        """P x P matrix: wins[i, j] = shared tracks where player i has the better best rank"""
+        n = len(self.players)
+        wins = np.zeros((n, n), dtype=np.int32)
+        for i in range(n):
+            # One row at a time keeps memory at P x T whatever the roster size
+            beats = (self.ranks[i] < self.ranks) & self.played[i] & self.played
+            wins[i] = beats.sum(axis=1)
+        return wins
+
+
+class HeadToHead:
+    """Pairwise shared tracks, wins and battles for one set of records, computed once"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.players = matrix.players
+        self.shared = matrix.shared_tracks()
+        self.wins = matrix.wins()
+        self.battles = self.wins + self.wins.T
+
+    @classmethod
+    def from_records(cls, records_df, **columns):
+        return cls(BestRankMatrix.from_records(records_df, **columns))
+
+    def pairs(self, mask):
+        """(i, j) index pairs with i < j where mask holds, in first-appearance order"""
+        return np.argwhere(np.triu(mask, k=1))
+
+    def rivalry(self, i, j, names, shared_tracks, leader_first=False):
+        """Result dict for players i and j. With leader_first the player with more wins is
+        player1 (alphabetical by name when tied); otherwise first-appearance order."""
+        p1, p2 = self.players[i], self.players[j]
+        name1, name2 = names.get(p1, p1), names.get(p2, p2)
+        p1_wins, p2_wins = int(self.wins[i, j]), int(self.wins[j, i])
+        if leader_first and (p2_wins > p1_wins or (p1_wins == p2_wins and name2 < name1)):
+            p1, p2, name1, name2, p1_wins, p2_wins = p2, p1, name2, name1, p2_wins, p1_wins
+        return {
+            'player1': name1,
+            'player2': name2,
+            'login1': p1,
+            'login2': p2,
+            'shared_tracks': int(shared_tracks),
+            'p1_wins': p1_wins,
+            'p2_wins': p2_wins,
+            'total_battles': p1_wins + p2_wins,
+            'score': f"{p1_wins}-{p2_wins}",
+            'leader': name1 if p1_wins > p2_wins else name2 if p2_wins > p1_wins else 'Tied'
+        }
+
+
+def records_to_frame(records):
+    """DataFrame from the (login, nick, track, time, rank, date, envir, mode, server) tuples used
+    by the weekly reports"""
+    return pd.DataFrame.from_records(list(records), columns=RECORD_TUPLE_COLUMNS)
+
+
+def find_rivalries(records_df, names, min_shared=MIN_SHARED_TRACKS, min_battles=MIN_BATTLES, h2h=None):
+    """Dashboard rivalries: pairs with at least min_shared tracks both played and min_battles decided.
+
+    names maps login -> display name. shared_tracks counts tracks both players have a record
+    on. Most battles first (pairs in first-appearance order on ties).
+    """
+    if records_df.empty:
+        return []
+    h2h = h2h or HeadToHead.from_records(records_df)
+    mask = (h2h.shared >= min_shared) & (h2h.battles >= min_battles)
+    rivalries = [h2h.rivalry(i, j, names, h2h.shared[i, j]) for i, j in h2h.pairs(mask)]
+    rivalries.sort(key=lambda x: x['total_battles'], reverse=True)
+    return rivalries
+
+
+def track_positions(records_df, matrix, player_col='player_login', track_col='Challenge'):
+    """P x T array: the order in which players first appear among a track's records (np.inf
+    where the player has no record on the track)"""
+    first = pd.DataFrame({'player': records_df[player_col].values, 'track': records_df[track_col].values,
+                          'row': np.arange(len(records_df))})
+    first = first.groupby(['track', 'player'], sort=False, dropna=False)['row'].min().reset_index()
+    first['position'] = first.groupby('track', sort=False, dropna=False)['row'].rank(method='first')
+    positions = first.pivot(index='player', columns='track', values='position')
+    return positions.reindex(index=matrix.players, columns=matrix.tracks).to_numpy(dtype=float, na_value=np.inf)
+
+
+def _discovery_order(h2h, pairs, positions):
+    """Sort key per pair matching the weekly report's track-by-track enumeration: the first
+    track (in first-appearance order) the pair has a winner on, then the pair's position in
+    that track's player order"""
+    ranks, played = h2h.matrix.ranks, h2h.matrix.played
+    keys = []
+    for i, j in pairs:
+        decided = played[i] & played[j] & (ranks[i] != ranks[j])
+        t = int(np.argmax(decided))
+        keys.append((t, min(positions[i, t], positions[j, t]), max(positions[i, t], positions[j, t])))
+    return keys
+
+
+def weekly_rivalries(records_df, names, min_tracks=WEEKLY_MIN_TRACKS, target=WEEKLY_TARGET_RIVALRIES, h2h=None):
+    """Weekly report rivalries: pairs with at least min_tracks decided tracks, leader first.
+
+    shared_tracks counts the tracks with a winner (ties on a track don't count). When there
+    are fewer than target rivalries, pairs with exactly two decided tracks fill the gap.
+    Most shared tracks first; ties keep the order in which the pairs are first met walking
+    the tracks in order of appearance, as the original per-track loop did.
+    """
+    if records_df.empty:
+        return []
+    h2h = h2h or HeadToHead.from_records(records_df)
+    battles = h2h.battles
+    positions = track_positions(records_df, h2h.matrix)
+
+    def in_discovery_order(pairs):
+        keys = _discovery_order(h2h, pairs, positions)
+        return [pair for _, pair in sorted(zip(keys, map(tuple, pairs)), key=lambda item: item[0])]
+
+    rivalries = [h2h.rivalry(i, j, names, battles[i, j], leader_first=True)
+                 for i, j in in_discovery_order(h2h.pairs(battles >= min_tracks))]
+    two_track = in_discovery_order(h2h.pairs(battles == 2))
+    needed = max(0, min(target - len(rivalries), len(two_track)))
+    if needed:
+        print(f"🔍 Including 2-track rivalries to reach target ({len(rivalries)} main rivalries)")
+        rivalries.extend(h2h.rivalry(i, j, names, 2, leader_first=True) for i, j in two_track[:needed])
+
+    return sorted(rivalries, key=lambda x: x['shared_tracks'], reverse=True)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Server Analytics
+Per-(server, player) activity for every server in a date window, from one grouped scan.
+
+scan_server_activity() reads the records of the window grouped by (canonical server,
+player, track, day) in a single statement, plus the latest nicknames from
+player_profile and the server display names. ServerActivity aggregates that once with
+pandas into per-(server, player) totals (records, unique tracks, improvements, days
+active, first and last record) and per-player distinct days over all servers, so the
+Cavern-style report of any server and the server preference breakdown are lookups.
+
+Server names are the canonical ones of the server dimension (servers.py); placeholder
+values such as 'Unknown' are not servers and are left out. Windows are calendar months:
+two months back from 2025-08-28 starts on 2025-06-28.
+
+    python server_analytics.py --list-servers
+    python server_analytics.py --server tzig_server --months 2 --min-records 3
+    python server_analytics.py --preferences --start 2025-06-01 --end 2025-08-31
+"""
+
+import argparse
+import calendar
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database'))
+from schema import day_bounds
+from migrations import DEFAULT_DB_PATH, migrate_path
+from data_version import get_data_version
+from players import latest_nicknames
+from servers import SERVER_PLACEHOLDERS, CAVERN_SERVER
+
+PLAYER_COLUMNS = ['login', 'nickname', 'total_records', 'unique_tracks', 'improvements', 'days_active',
+                  'first_record', 'last_record', 'activity_span', 'records_per_day']
+
+# Windows kept by server_activity(); each holds the aggregates of one scan
+MAX_CACHED_WINDOWS = 8
+_activity_cache = {}
+
+_PLACEHOLDER_SQL = ', '.join(f"'{value}'" for value in SERVER_PLACEHOLDERS)
+
+SCAN_SQL = f'''
+    SELECT COALESCE(s.name, r.server) AS server,
+           r.player_login,
+           r.Challenge,
+           SUBSTR(r."RecordDate", 1, 10) AS day,
+           COUNT(*) AS records,
+           MIN(r."RecordDate") AS first_record,
+           MAX(r."RecordDate") AS last_record
+    FROM dedimania_records r
+    LEFT JOIN server_aliases a ON a.alias = r.server
+    LEFT JOIN servers s ON s.server_id = a.server_id
+    WHERE r."RecordDate" >= ? AND r."RecordDate" < ?
+    AND r.server IS NOT NULL AND r.server NOT IN ({_PLACEHOLDER_SQL})
+    GROUP BY 1, 2, 3, 4
+'''
+
+
+def months_ago(day, months):
+    """The same day of the month `months` calendar months earlier, clamped to that month's length"""
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def month_window(months_back=2, today=None):
+    """(start, end) dates of the last months_back calendar months, both days inclusive"""
+    today = today or date.today()
+    return months_ago(today, months_back), today
+
+
+class ServerActivity:
+    """Aggregates of one scan over the window start..end (both days inclusive).
+
+    players    one row per (server, player): PLAYER_COLUMNS plus server
+    player_days  distinct days with a record on any server, per login
+    summary    one row per server: display_name, players, records, unique_tracks, days_active
+    """
+
+    def __init__(self, start, end, cells, nicknames, display_names):
+        self.start = start
+        self.end = end
+        self.display_names = display_names
+        cells = cells.copy()
+        cells['player_login'] = cells['player_login'].fillna('')
+
+        grouped = cells.groupby(['server', 'player_login'], sort=True)
+        players = grouped.agg(
+            total_records=('records', 'sum'),
+            unique_tracks=('Challenge', 'nunique'),
+            days_active=('day', 'nunique'),
+            first_record=('first_record', 'min'),
+            last_record=('last_record', 'max'),
+        ).reset_index().rename(columns={'player_login': 'login'})
+        players['nickname'] = [nicknames.get(login, login) for login in players['login']]
+        players['improvements'] = players['total_records'] - players['unique_tracks']
+        players['first_record'] = players['first_record'].str[:10]
+        players['last_record'] = players['last_record'].str[:10]
+        players['activity_span'] = (pd.to_datetime(players['last_record']) -
+                                    pd.to_datetime(players['first_record'])).dt.days + 1
+        players['records_per_day'] = [round(records / max(days, 1), 1)
+                                      for records, days in zip(players['total_records'], players['days_active'])]
+        self.players = players.sort_values(
+            ['server', 'total_records', 'days_active', 'login'], ascending=[True, False, False, True],
+            kind='mergesort').reset_index(drop=True)
+        self._by_server = {server: frame[PLAYER_COLUMNS].reset_index(drop=True)
+                           for server, frame in self.players.groupby('server', sort=False)}
+
+        self.player_days = cells.groupby('player_login')['day'].nunique()
+
+        by_server = cells.groupby('server')
+        self.summary = pd.DataFrame({
+            'players': by_server['player_login'].nunique(),
+            'records': by_server['records'].sum(),
+            'unique_tracks': by_server['Challenge'].nunique(),
+            'days_active': by_server['day'].nunique(),
+        })
+        self.summary.insert(0, 'display_name', [self.display_name(server) for server in self.summary.index])
+        self.summary = self.summary.sort_values('records', ascending=False, kind='mergesort')
+
+    def display_name(self, server):
+        return self.display_names.get(server) or server
+
+    def server_players(self, server, min_records=1):
+        """Per-player activity on one server, most records first (empty when it had none)"""
+        frame = self._by_server.get(server)
+        if frame is None:
+            return pd.DataFrame(columns=PLAYER_COLUMNS)
+        return frame[frame['total_records'] >= min_records].reset_index(drop=True)
+
+    def server_report(self, server, min_records=1):
+        """server_players() as a list of dicts, the rows of the Cavern-style report"""
+        return self.server_players(server, min_records).to_dict('records')
+
+    def player_preferences(self, min_records=5):
+        """Per player: the servers with at least min_records records and which of them the
+        player prefers by records and by days, most active players first"""
+        kept = self.players[self.players['total_records'] >= min_records]
+        kept = kept.sort_values(['login', 'total_records', 'server'], ascending=[True, False, True], kind='mergesort')
+        results = []
+        for login, frame in kept.groupby('login', sort=False):
+            servers = [{
+                'server': row.server,
+                'total_records': int(row.total_records),
+                'unique_tracks': int(row.unique_tracks),
+                'improvements': int(row.improvements),
+                'days': int(row.days_active),
+            } for row in frame.itertuples(index=False)]
+            results.append(_preference(login, frame['nickname'].iloc[0], servers, int(self.player_days[login])))
+        # Sort by total activity (records + days)
+        results.sort(key=lambda x: x['total_records'] + x['total_days'], reverse=True)
+        return results
+
+
+def _tied(servers, key):
+    """Leading servers within 10% of the top one by key (servers sorted by key, descending)"""
+    top = servers[0][key]
+    tied = []
+    for server in servers:
+        if server[key] == top or abs(server[key] - top) / top <= 0.1:
+            tied.append(server)
+        else:
+            break
+    return tied
+
+
+def _preference(login, nickname, servers, total_days):
+    total_records = sum(s['total_records'] for s in servers)
+    servers_by_records = sorted(servers, key=lambda x: x['total_records'], reverse=True)
+    servers_by_days = sorted(servers, key=lambda x: x['days'], reverse=True)
+    top_server_records = servers_by_records[0]
+    top_server_days = servers_by_days[0]
+    return {
+        'login': login,
+        'nickname': nickname,
+        'total_records': total_records,
+        'total_unique_tracks': sum(s['unique_tracks'] for s in servers),
+        'total_improvements': sum(s['improvements'] for s in servers),
+        'total_days': total_days,
+        'servers': servers,
+        'top_server_records': top_server_records,
+        'top_server_days': top_server_days,
+        'records_percentage': (top_server_records['total_records'] / total_records) * 100,
+        'days_percentage': (top_server_days['days'] / total_days) * 100,
+        'tied_servers_records': _tied(servers_by_records, 'total_records'),
+        'tied_servers_days': _tied(servers_by_days, 'days'),
+    }
+
+
+def scan_server_activity(conn, start, end):
+    """ServerActivity for the days start..end (inclusive): one scan of the records plus the
+    nickname and server name lookups"""
+    cells = pd.read_sql_query(SCAN_SQL, conn, params=day_bounds(start, end))
+    display_names = dict(conn.execute('SELECT name, display_name FROM servers'))
+    return ServerActivity(str(start)[:10], str(end)[:10], cells, latest_nicknames(conn), display_names)
+
+
+def server_activity(db_path, start, end):
+    """scan_server_activity() cached per (database, window, data version)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        key = (os.path.abspath(db_path), str(start)[:10], str(end)[:10], get_data_version(conn))
+        activity = _activity_cache.get(key)
+        if activity is None:
+            activity = scan_server_activity(conn, start, end)
+            if len(_activity_cache) >= MAX_CACHED_WINDOWS:
+                _activity_cache.pop(next(iter(_activity_cache)))
+            _activity_cache[key] = activity
+        return activity
+    finally:
+        conn.close()
+
+
+def _parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def main():
+    # Imported here: the reports need PIL, the engine doesn't
+    from server_reports import run_server_report, run_preference_report
+
+    parser = argparse.ArgumentParser(description='Per-server player activity reports')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Database path')
+    parser.add_argument('--months', type=int, default=2, help='Calendar months back from today (default: 2)')
+    parser.add_argument('--start', type=_parse_day, help='First day (YYYY-MM-DD), instead of --months')
+    parser.add_argument('--end', type=_parse_day, help='Last day (YYYY-MM-DD, default: today)')
+    parser.add_argument('--min-records', type=int, help='Minimum records per player and server '
+                                                        '(default: 3 for --server, 5 for --preferences)')
+    parser.add_argument('--output-prefix', help='Prefix of the .txt and .png reports')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--server', help=f'Activity report of one server (e.g. {CAVERN_SERVER})')
+    group.add_argument('--preferences', action='store_true', help='Server preference report of every player')
+    group.add_argument('--list-servers', action='store_true', help='Activity summary of every server')
+    args = parser.parse_args()
+
+    migrate_path(args.db)
+    end = args.end or date.today()
+    start = args.start or months_ago(end, args.months)
+    print(f"📅 Date range: {start} to {end}")
+    activity = server_activity(args.db, start, end)
+
+    if args.server:
+        run_server_report(activity, args.server, min_records=args.min_records or 3,
+                          output_prefix=args.output_prefix or f"{args.server}_analysis")
+    elif args.preferences:
+        run_preference_report(activity, min_records=args.min_records or 5,
+                              output_prefix=args.output_prefix or "server_analysis")
+    else:
+        if activity.summary.empty:
+            print("❌ No server activity in the specified period")
+            return
+        print(activity.summary.to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Server Reports
+Text and PNG reports over server_analytics.ServerActivity.
+
+    run_server_report()      Cavern-style activity report of one server
+    run_preference_report()  which servers every player prefers, by records and by days
+
+Both write <output_prefix>.txt and <output_prefix>.png and print a short summary; the
+root scripts cavern_analysis.py and server_analysis.py and the server_analytics CLI call
+them.
+"""
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+def server_text_report(results, start_date, end_date, display_name):
+    """Generate detailed text report for one server (Cavern-style)"""
+    report_lines = []
+    report_lines.append("=" * 80)
+    report_lines.append(f"🏔️ {display_name.upper()} SERVER ACTIVITY ANALYSIS")
+    report_lines.append(f"📅 Period: {start_date} to {end_date}")
+    report_lines.append(f"👥 Players analyzed: {len(results)}")
+    report_lines.append("=" * 80)
+    report_lines.append("")
+
+    for i, player in enumerate(results, 1):
+        nickname = player['nickname'][:25]
+        total_records = player['total_records']
+        unique_tracks = player['unique_tracks']
+        improvements = player['improvements']
+        days_active = player['days_active']
+        records_per_day = player['records_per_day']
+
+        report_lines.append(f"{i:2d}. {nickname:<25} | {total_records:4d} records ({unique_tracks} dedi's, {improvements} improvements) | {days_active:3d} days active")
+        report_lines.append(f"    📊 Activity: {records_per_day} records/day | First: {player['first_record']} | Last: {player['last_record']}")
+        report_lines.append("")
+
+    return "\n".join(report_lines)
+
+def server_visual_report(results, start_date, end_date, display_name, output_file='cavern_analysis.png'):
+    """Generate visual report for one server's activity (Cavern theme)"""
+    print(f"🎨 Generating {display_name} visual report...")
+
+    # Image dimensions
+    width = 1400
+    height = min(2000, 200 + len(results) * 80)
+
+    # Create image with mountain/cavern theme
+    img = Image.new('RGB', (width, height), (15, 25, 35))
+    draw = ImageDraw.Draw(img)
+
+    # Add gradient background with cavern theme
+    for y in range(height):
+        gradient_factor = y / height
+        r = int(15 + gradient_factor * 20)
+        g = int(25 + gradient_factor * 30)
+        b = int(35 + gradient_factor * 40)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+
+    # Load fonts
+    try:
+        font_title = ImageFont.truetype("DejaVuSans-Bold.ttf", 48)
+        font_subtitle = ImageFont.truetype("DejaVuSans-Bold.ttf", 26)
+        font_header = ImageFont.truetype("DejaVuSans-Bold.ttf", 22)
+        font_text = ImageFont.truetype("DejaVuSans-Bold.ttf", 18)
+        font_small = ImageFont.truetype("DejaVuSans-Bold.ttf", 15)
+        font_rank = ImageFont.truetype("DejaVuSans-Bold.ttf", 24)
+    except:
+        try:
+            font_title = ImageFont.truetype("arialbd.ttf", 48)
+            font_subtitle = ImageFont.truetype("arialbd.ttf", 26)
+            font_header = ImageFont.truetype("arialbd.ttf", 22)
+            font_text = ImageFont.truetype("arialbd.ttf", 18)
+            font_small = ImageFont.truetype("arialbd.ttf", 15)
+            font_rank = ImageFont.truetype("arialbd.ttf", 24)
+        except:
+            font_title = ImageFont.load_default()
+            font_subtitle = font_header = font_text = font_small = font_rank = font_title
+
+    # Cavern-themed colors
+    colors = {
+        'title': (100, 200, 255),       # Ice blue
+        'subtitle': (255, 215, 0),      # Gold
+        'header': (255, 255, 255),      # White
+        'text': (220, 220, 220),        # Light gray
+        'rank_gold': (255, 215, 0),     # Gold
+        'rank_silver': (192, 192, 192), # Silver
+        'rank_bronze': (205, 127, 50),  # Bronze
+        'rank_normal': (150, 200, 255), # Light blue
+        'records': (255, 140, 0),       # Dark orange
+        'tracks': (100, 255, 200),      # Aqua
+        'days': (150, 255, 150),        # Light green
+        'improvements': (255, 180, 100), # Light orange
+        'separator': (100, 200, 255),   # Ice blue
+    }
+
+    y = 40
+
+    # Header background
+    header_bg_height = 120
+    draw.rectangle([(0, 0), (width, header_bg_height)], fill=(30, 45, 65))
+
+    # Title
+    title_text = f"🏔️ {display_name.upper()} SERVER ACTIVITY"
+    title_bbox = draw.textbbox((0, 0), title_text, font=font_title)
+    title_width = title_bbox[2] - title_bbox[0]
+    draw.text((width//2 - title_width//2, y), title_text, fill=colors['title'], font=font_title)
+    y += 65
+
+    # Subtitle
+    subtitle_text = f"📅 {start_date} to {end_date} | 👥 {len(results)} Players"
+    subtitle_bbox = draw.textbbox((0, 0), subtitle_text, font=font_subtitle)
+    subtitle_width = subtitle_bbox[2] - subtitle_bbox[0]
+    draw.text((width//2 - subtitle_width//2, y), subtitle_text, fill=colors['subtitle'], font=font_subtitle)
+    y += 60
+
+    # Headers
+    headers = ["#", "Player", "Records", "Dedi's", "Improvements", "Days Active", "Records/Day"]
+    x_positions = [60, 120, 300, 400, 500, 620, 750]
+
+    # Header background
+    header_y = y
+    draw.rectangle([(30, header_y - 10), (width - 30, header_y + 45)], fill=(40, 55, 75))
+
+    for i, header in enumerate(headers):
+        draw.text((x_positions[i], y), header, fill=colors['header'], font=font_header)
+    y += 50
+
+    # Separator line
+    for offset in range(3):
+        draw.line([(40, y + offset), (width-40, y + offset)], fill=colors['separator'], width=1)
+    y += 25
+
+    # Player data
+    for i, player in enumerate(results[:25]):  # Show top 25 players
+        # Alternating row backgrounds
+        row_bg_color = (25, 35, 50) if i % 2 == 0 else (20, 30, 45)
+        draw.rectangle([(30, y - 5), (width - 30, y + 65)], fill=row_bg_color)
+
+        rank = str(i + 1)
+        nickname = player['nickname'][:18]
+        total_records = str(player['total_records'])
+        unique_tracks = str(player['unique_tracks'])
+        improvements = str(player['improvements'])
+        days_active = str(player['days_active'])
+        records_per_day = str(player['records_per_day'])
+
+        # Rank colors
+        if i == 0:
+            rank_color = colors['rank_gold']
+            rank_font = font_rank
+        elif i == 1:
+            rank_color = colors['rank_silver']
+            rank_font = font_rank
+        elif i == 2:
+            rank_color = colors['rank_bronze']
+            rank_font = font_rank
+        else:
+            rank_color = colors['rank_normal']
+            rank_font = font_text
+
+        # Draw data
+        draw.text((x_positions[0], y + 10), rank, fill=rank_color, font=rank_font)
+        draw.text((x_positions[1], y + 10), nickname, fill=colors['header'], font=font_text)
+        draw.text((x_positions[2], y + 10), total_records, fill=colors['records'], font=font_text)
+        draw.text((x_positions[3], y + 10), unique_tracks, fill=colors['tracks'], font=font_text)
+        draw.text((x_positions[4], y + 10), improvements, fill=colors['improvements'], font=font_text)
+        draw.text((x_positions[5], y + 10), days_active, fill=colors['days'], font=font_text)
+        draw.text((x_positions[6], y + 10), records_per_day, fill=colors['text'], font=font_text)
+
+        y += 70
+
+    # Save image
+    img.save(output_file)
+    print(f"✅ {display_name} visual report saved to: {output_file}")
+    return output_file
+
+
+def preference_text_report(results, start_date, end_date):
+    """Generate detailed text report"""
+    report_lines = []
+    report_lines.append("=" * 80)
+    report_lines.append("🏢 SERVER PREFERENCE ANALYSIS")
+    report_lines.append(f"📅 Period: {start_date} to {end_date}")
+    report_lines.append(f"👥 Players analyzed: {len(results)}")
+    report_lines.append("=" * 80)
+    report_lines.append("")
+
+    for i, player in enumerate(results, 1):
+        nickname = player['nickname'][:25]  # Limit length
+        total_records = player['total_records']
+        total_unique_tracks = player['total_unique_tracks']
+        total_improvements = player['total_improvements']
+        total_days = player['total_days']
+
+        # Calculate enhanced days for display (but cap at reasonable limit)
+        improvement_bonus = int(total_improvements * 0.1)
+        enhanced_days = total_days + improvement_bonus
+        enhanced_days = min(enhanced_days, 62)  # Cap at 2 months max
+        report_lines.append(f"{i:2d}. {nickname:<25} | {total_unique_tracks:4d} dedi's, {enhanced_days:3d} days active")
+
+        # Most records breakdown
+        report_lines.append(f"    📊 RECORDS:")
+        for server_data in player['servers'][:3]:  # Top 3 servers
+            server = server_data['server'][:20]
+            records = server_data['total_records']
+            unique_tracks = server_data['unique_tracks']
+            percentage = (records / total_records) * 100
+            report_lines.append(f"       {server:<20} {records:4d} records ({unique_tracks} dedi's) ({percentage:5.1f}%)")
+
+        # Most days breakdown
+        report_lines.append(f"    📅 DAYS PLAYED:")
+        servers_by_days = sorted(player['servers'], key=lambda x: x['days'], reverse=True)
+        for server_data in servers_by_days[:3]:  # Top 3 servers
+            server = server_data['server'][:20]
+            days = server_data['days']
+            percentage = (days / total_days) * 100
+            report_lines.append(f"       {server:<20} {days:4d} days    ({percentage:5.1f}%)")
+
+        report_lines.append("")
+
+    return "\n".join(report_lines)
+
+def preference_visual_report(results, start_date, end_date, output_file='server_analysis.png'):
+    """Generate clean, modern visual report"""
+    print("🎨 Generating clean visual report...")
+
+    # Clean, modern dimensions
+    width = 1000
+    height = min(1400, 180 + len(results) * 45)
+
+    # Create image with clean dark theme
+    img = Image.new('RGB', (width, height), (22, 27, 34))
+    draw = ImageDraw.Draw(img)
+
+    # Load fonts
+    try:
+        font_title = ImageFont.truetype("DejaVuSans-Bold.ttf", 32)
+        font_subtitle = ImageFont.truetype("DejaVuSans-Bold.ttf", 18)
+        font_header = ImageFont.truetype("DejaVuSans-Bold.ttf", 16)
+        font_text = ImageFont.truetype("DejaVuSans-Bold.ttf", 14)
+        font_rank = ImageFont.truetype("DejaVuSans-Bold.ttf", 18)
+    except:
+        try:
+            font_title = ImageFont.truetype("arialbd.ttf", 32)
+            font_subtitle = ImageFont.truetype("arialbd.ttf", 18)
+            font_header = ImageFont.truetype("arialbd.ttf", 16)
+            font_text = ImageFont.truetype("arialbd.ttf", 14)
+            font_rank = ImageFont.truetype("arialbd.ttf", 18)
+        except:
+            font_title = ImageFont.load_default()
+            font_subtitle = font_header = font_text = font_rank = font_title
+
+    # Clean, professional color scheme
+    colors = {
+        'title': (255, 255, 255),
+        'subtitle': (156, 163, 175),
+        'header': (209, 213, 219),
+        'text': (156, 163, 175),
+        'rank_gold': (251, 191, 36),
+        'rank_silver': (156, 163, 175),
+        'rank_bronze': (217, 119, 6),
+        'rank_normal': (107, 114, 128),
+        'accent': (59, 130, 246),
+        'records': (239, 68, 68),
+        'days': (34, 197, 94),
+        'server': (168, 85, 247)
+    }
+
+    y = 30
+
+    # Clean title
+    title_text = "🎮 Server Preferences"
+    title_bbox = draw.textbbox((0, 0), title_text, font=font_title)
+    title_width = title_bbox[2] - title_bbox[0]
+    draw.text((width//2 - title_width//2, y), title_text, fill=colors['title'], font=font_title)
+    y += 45
+
+    # Subtitle
+    subtitle_text = f"{start_date} to {end_date} • {len(results)} players"
+    subtitle_bbox = draw.textbbox((0, 0), subtitle_text, font=font_subtitle)
+    subtitle_width = subtitle_bbox[2] - subtitle_bbox[0]
+    draw.text((width//2 - subtitle_width//2, y), subtitle_text, fill=colors['subtitle'], font=font_subtitle)
+    y += 40
+
+    # Clean headers
+    headers = ["Rank", "Player", "Records", "Days", "Top Server", "Preference"]
+    x_positions = [40, 100, 250, 320, 390, 600]
+
+    # Header separator
+    draw.line([(30, y), (width-30, y)], fill=colors['accent'], width=2)
+    y += 15
+
+    for i, header in enumerate(headers):
+        draw.text((x_positions[i], y), header, fill=colors['header'], font=font_header)
+    y += 30
+
+    # Subtle separator
+    draw.line([(30, y), (width-30, y)], fill=(55, 65, 81), width=1)
+    y += 15
+
+    # Clean player data
+    for i, player in enumerate(results[:25]):
+        # Subtle alternating backgrounds
+        if i % 2 == 0:
+            draw.rectangle([(30, y - 5), (width - 30, y + 30)], fill=(31, 41, 55))
+
+        rank = str(i + 1)
+        nickname = player['nickname'][:16]
+        total_records = str(player['total_records'])
+        total_days = str(player['total_days'])  # Clean days without artificial enhancement
+
+        # Get top server
+        top_server = player['servers'][0]
+        server_name = top_server['server'][:12]
+        server_records = top_server['total_records']
+        server_pct = (server_records / player['total_records']) * 100
+
+        # Clean rank colors
+        if i == 0:
+            rank_color = colors['rank_gold']
+        elif i == 1:
+            rank_color = colors['rank_silver']
+        elif i == 2:
+            rank_color = colors['rank_bronze']
+        else:
+            rank_color = colors['rank_normal']
+
+        # Draw clean data
+        draw.text((x_positions[0], y), rank, fill=rank_color, font=font_rank)
+        draw.text((x_positions[1], y), nickname, fill=colors['text'], font=font_text)
+        draw.text((x_positions[2], y), total_records, fill=colors['records'], font=font_text)
+        draw.text((x_positions[3], y), total_days, fill=colors['days'], font=font_text)
+        draw.text((x_positions[4], y), server_name, fill=colors['server'], font=font_text)
+        draw.text((x_positions[5], y), f"{server_records} ({server_pct:.0f}%)", fill=colors['text'], font=font_text)
+
+        y += 35
+
+    # Save image
+    img.save(output_file)
+    print(f"✅ Clean visual report saved to: {output_file}")
+    return output_file
+
+
+def run_server_report(activity, server, min_records=3, output_prefix="cavern_analysis"):
+    """Activity report of one server over the activity's window"""
+    display_name = activity.display_name(server)
+    start_date, end_date = activity.start, activity.end
+    results = activity.server_report(server, min_records)
+    print(f"🏔️ Found {len(results)} players active on {display_name} server")
+    
+    if not results:
+        print(f"❌ No data found for {display_name} server in the specified period")
+        return
+    
+    # Generate text report
+    text_report = server_text_report(results, start_date, end_date, display_name)
+    text_file = f"{output_prefix}.txt"
+    with open(text_file, 'w', encoding='utf-8') as f:
+        f.write(text_report)
+    print(f"📄 {display_name} text report saved to: {text_file}")
+    
+    # Generate visual report
+    visual_file = f"{output_prefix}.png"
+    server_visual_report(results, start_date, end_date, display_name, visual_file)
+    
+    # Print summary
+    print(f"\n🏔️ {display_name.upper()} SERVER SUMMARY:")
+    print(f"   • {len(results)} players analyzed")
+    print(f"   • Period: {start_date} to {end_date}")
+    print(f"   • Minimum records threshold: {min_records}")
+    
+    # Top 5 most active players on the server
+    print(f"\n🏆 TOP 5 MOST ACTIVE ON {display_name.upper()}:")
+    for i, player in enumerate(results[:5], 1):
+        nickname = player['nickname'][:20]
+        records = player['total_records']
+        tracks = player['unique_tracks']
+        days = player['days_active']
+        rate = player['records_per_day']
+        print(f"   {i}. {nickname:<20} | {records:4d} records ({tracks} dedi's), {days:3d} days active | {rate} rec/day")
+    return results
+
+
+def run_preference_report(activity, min_records=5, output_prefix="server_analysis"):
+    """Server preference report of every player over the activity's window"""
+    start_date, end_date = activity.start, activity.end
+    results = activity.player_preferences(min_records)
+    print(f"📊 Found {len(results)} players with server activity")
+    
+    if not results:
+        print("❌ No data found for the specified period")
+        return
+    
+    # Generate text report
+    text_report = preference_text_report(results, start_date, end_date)
+    text_file = f"{output_prefix}.txt"
+    with open(text_file, 'w', encoding='utf-8') as f:
+        f.write(text_report)
+    print(f"📄 Text report saved to: {text_file}")
+    
+    # Generate visual report
+    visual_file = f"{output_prefix}.png"
+    preference_visual_report(results, start_date, end_date, visual_file)
+    
+    # Print summary
+    print("\n🎯 SUMMARY:")
+    print(f"   • {len(results)} players analyzed")
+    print(f"   • Period: {start_date} to {end_date}")
+    print(f"   • Minimum records threshold: {min_records}")
+    
+    # Top 5 most active players
+    print(f"\n🏆 TOP 5 MOST ACTIVE PLAYERS:")
+    for i, player in enumerate(results[:5], 1):
+        nickname = player['nickname'][:20]
+        records = player['total_records']
+        tracks = player['total_unique_tracks']
+        improvements = player['total_improvements']
+        days = player['total_days']
+        enhanced_days = days + int(improvements * 0.1)
+        top_server = player['top_server_records']['server'][:15]
+        print(f"   {i}. {nickname:<20} | {tracks:4d} dedi's, {enhanced_days:3d} days active | {top_server}")
+    return results
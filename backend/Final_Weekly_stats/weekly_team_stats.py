@@ -7,11 +7,17 @@ Creates engaging weekly reports for TrackMania team performance
 import sqlite3
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
+from functools import cached_property
 import os
+import sys
 import argparse
-import requests
-from bs4 import BeautifulSoup
-import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database'))
+from schema import day_bounds
+from migrations import migrate_path
+from rivalry_engine import records_to_frame, weekly_rivalries
+from record_model import parse_records, day_number, day_string
+from servers import MINILOL_SERVER, server_tracks
 
 # Configuration
 PLAYER_LOGINS = [
@@ -69,6 +75,65 @@ def calculate_weeks_back_dates(weeks_back):
     
     return target_week_start.strftime('%Y-%m-%d'), target_week_end.strftime('%Y-%m-%d')
 
+class WeeklySnapshot:
+    """One date range's records and every analysis of them, each computed at most once.
+
+    The report, the Discord summary and all images of a run read from the same snapshot
+    (WeeklyStatsGenerator.snapshot()), so generating everything costs one database read
+    and one pass of each analyzer. Records are ParsedRecords (record_model.py), parsed
+    when the snapshot is loaded.
+    """
+
+    def __init__(self, generator, raw_records, date_range):
+        self.generator = generator
+        self.raw_records = raw_records
+        self.date_range = date_range
+        # Fills the generator's nickname cache from the raw records for every analyzer
+        self.latest_nicks = generator.get_all_latest_nicknames(raw_records)
+
+    @cached_property
+    def deduplicated_records(self):
+        return self.generator.deduplicate_records(self.raw_records)
+
+    # Time masters, server and humorous stats use the raw records (activity over time);
+    # the other analyzers count unique track achievements
+
+    @cached_property
+    def time_masters(self):
+        return self.generator.analyze_time_masters(self.raw_records)
+
+    @cached_property
+    def performance_elite(self):
+        """Performance stats, including the solo explorer"""
+        performance_elite = self.generator.analyze_performance_elite(self.deduplicated_records)
+        performance_elite.update(self.generator.analyze_solo_explorer(self.raw_records))
+        return performance_elite
+
+    @cached_property
+    def volume_champions(self):
+        return self.generator.analyze_volume_champions(self.deduplicated_records)
+
+    @cached_property
+    def lolsport_stats(self):
+        return self.generator.analyze_lolsport_addict(self.deduplicated_records)
+
+    @cached_property
+    def track_owners(self):
+        return self.generator.analyze_track_ownership(self.deduplicated_records)
+
+    @cached_property
+    def server_stats(self):
+        return self.generator.analyze_server_stats(self.raw_records)
+
+    @cached_property
+    def humorous_stats(self):
+        return self.generator.analyze_humorous_stats(self.raw_records)
+
+    @cached_property
+    def rivalries(self):
+        return self.generator.detect_rivalries(self.deduplicated_records)
+
+
 class WeeklyStatsGenerator:
     def __init__(self, db_path=None):
         if db_path is None:
@@ -79,6 +144,10 @@ class WeeklyStatsGenerator:
             db_path = os.path.abspath(db_path)
         self.db_path = db_path
         self._latest_nicks_cache = None
+        self._challenge_cache = None
+        self._minilol_tracks = None
+        self._snapshot = None
+        migrate_path(self.db_path)
         
     def format_time(self, time_str):
         """Convert time string to seconds for comparison"""
@@ -103,18 +172,29 @@ class WeeklyStatsGenerator:
         # Get most recent Sunday to current day date range
         start_date, end_date = get_weekly_date_range()
         
+        # Half-open bounds so records set on end_date itself are included
         cursor.execute("""
-            SELECT player_login, NickName, Challenge, Record, Rank, RecordDate, Envir, Mode, server
+            SELECT player_login, NickName, Challenge, Record, Rank, RecordDate, Envir, Mode, server,
+                   rank_int, record_ms, record_epoch
             FROM dedimania_records 
-            WHERE RecordDate >= ? AND RecordDate <= ?
-            ORDER BY RecordDate DESC
-        """, (start_date, end_date))
+            WHERE RecordDate >= ? AND RecordDate < ?
+            ORDER BY RecordDate DESC, id
+        """, day_bounds(start_date, end_date))
         
         records = cursor.fetchall()
         conn.close()
         
         return records
     
+    def snapshot(self):
+        """The WeeklySnapshot of the selected date range, loaded on first use"""
+        date_range = get_weekly_date_range()
+        if self._snapshot is None or self._snapshot.date_range != date_range:
+            # Nicknames are per date range too
+            self._latest_nicks_cache = None
+            self._snapshot = WeeklySnapshot(self, parse_records(self.get_latest_data()), date_range)
+        return self._snapshot
+    
     def deduplicate_records(self, records):
         """
         Deduplicate records to keep only the best rank for each player-track combination.
@@ -124,32 +204,14 @@ class WeeklyStatsGenerator:
         track_records = {}
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
-            if not login or not track:
+            if not record.login or not record.track:
                 continue
-                
-            # Convert rank to integer for comparison (higher values for non-numeric ranks)
-            try:
-                rank_int = int(rank) if rank else 999
-            except:
-                rank_int = 999
-            
-            key = (login, track)
             
-            if key not in track_records:
+            # Keep the record with the better (lower) rank; non-numeric ranks count as 999
+            key = (record.login_id, record.track_id)
+            existing_record = track_records.get(key)
+            if existing_record is None or record.sort_rank < existing_record.sort_rank:
                 track_records[key] = record
-            else:
-                # Keep the record with the better (lower) rank
-                existing_record = track_records[key]
-                existing_rank = existing_record[4]  # rank is at index 4
-                try:
-                    existing_rank_int = int(existing_rank) if existing_rank else 999
-                except:
-                    existing_rank_int = 999
-                
-                if rank_int < existing_rank_int:
-                    track_records[key] = record
         
         # Return deduplicated records
         return list(track_records.values())
@@ -162,27 +224,17 @@ class WeeklyStatsGenerator:
         latest_nicks = self.get_all_latest_nicknames(records)
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
-            if rank == '1':  # World record holder
-                if track not in track_owners:
+            if record.rank == '1':  # World record holder
+                track = record.track
+                # Keep most recent #1
+                if track not in track_owners or record.date > track_owners[track]['date']:
                     track_owners[track] = {
-                        'owner': latest_nicks.get(login, login),
-                        'login': login,
-                        'time': time,
-                        'envir': envir,
-                        'date': date
+                        'owner': latest_nicks.get(record.login, record.login),
+                        'login': record.login,
+                        'time': record.time,
+                        'envir': record.envir,
+                        'date': record.date
                     }
-                else:
-                    # Keep most recent #1
-                    if date > track_owners[track]['date']:
-                        track_owners[track] = {
-                            'owner': latest_nicks.get(login, login),
-                            'login': login,
-                            'time': time,
-                            'envir': envir,
-                            'date': date
-                        }
         
         return track_owners
     
@@ -195,143 +247,31 @@ class WeeklyStatsGenerator:
         login_to_latest_date = {}
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            if nick:  # Only update if we have a nickname
+            login, date = record.login, record.date
+            if record.nick:  # Only update if we have a nickname
                 if login not in login_to_latest_date or date > login_to_latest_date[login]:
                     login_to_latest_date[login] = date
-                    login_to_nick[login] = nick
+                    login_to_nick[login] = record.nick
         
         self._latest_nicks_cache = login_to_nick
         return login_to_nick
     
     def detect_rivalries(self, records):
-        """Detect ongoing rivalries between players with win/loss records"""
-        # Track wins per login directly - much simpler approach
-        rivalry_data = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))  # rivalry_key -> track -> login -> wins
-        
-        # Get latest nicknames for all logins
-        login_to_nick = self.get_all_latest_nicknames(records)
-        
-        # Group records by track to compare players
-        track_records = defaultdict(list)
-        
-        for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
-            try:
-                rank_int = int(rank) if rank else 999
-                track_records[track].append({
-                    'login': login,
-                    'nick': nick,
-                    'rank': rank_int,
-                    'time': time
-                })
-            except:
-                continue
-        
-        # Find head-to-head comparisons on each track
-        for track, records_list in track_records.items():
-            if len(records_list) >= 2:
-                # Get best record for each player on this track
-                player_best = {}
-                for record in records_list:
-                    login = record['login']
-                    if login not in player_best or record['rank'] < player_best[login]['rank']:
-                        player_best[login] = record
-                
-                # Compare all player pairs (including yogeshdeshwari back in rivalries)
-                players = list(player_best.keys())
-                for i in range(len(players)):
-                    for j in range(i + 1, len(players)):
-                        p1_login = players[i]
-                        p2_login = players[j]
-                        
-                        p1_record = player_best[p1_login]
-                        p2_record = player_best[p2_login]
-                        
-                        # Create rivalry key (consistent ordering)
-                        rivalry_key = tuple(sorted([p1_login, p2_login]))
-                        
-                        # Determine winner (lower rank wins) and directly track wins per login
-                        if p1_record['rank'] < p2_record['rank']:
-                            rivalry_data[rivalry_key][track][p1_login] += 1
-                        elif p2_record['rank'] < p1_record['rank']:
-                            rivalry_data[rivalry_key][track][p2_login] += 1
-                        # If ranks are equal, it's a tie (no points awarded)
-        
-        # Calculate overall rivalries - first pass with standard threshold
-        rivalries = []
-        potential_2_track_rivalries = []
-        
-        for rivalry_key, track_data in rivalry_data.items():
-            # Calculate total wins per login
-            login1, login2 = rivalry_key
-            total_wins_login1 = sum(track_wins.get(login1, 0) for track_wins in track_data.values())
-            total_wins_login2 = sum(track_wins.get(login2, 0) for track_wins in track_data.values())
-            shared_tracks = len(track_data)
-            
-            # Get current nicknames
-            nick1 = login_to_nick.get(login1, login1)
-            nick2 = login_to_nick.get(login2, login2)
-            
-            # Determine leader and order names (leader first)
-            if total_wins_login1 > total_wins_login2:
-                leader_name = nick1
-                loser_name = nick2
-                leader = leader_name
-                player1_wins = total_wins_login1
-                player2_wins = total_wins_login2
-            elif total_wins_login2 > total_wins_login1:
-                leader_name = nick2
-                loser_name = nick1
-                leader = leader_name
-                player1_wins = total_wins_login2
-                player2_wins = total_wins_login1
-            else:
-                # For ties, use alphabetical order
-                leader_name = nick1 if nick1 < nick2 else nick2
-                loser_name = nick2 if nick1 < nick2 else nick1
-                leader = "Tied"
-                if nick1 < nick2:
-                    player1_wins = total_wins_login1
-                    player2_wins = total_wins_login2
-                else:
-                    player1_wins = total_wins_login2
-                    player2_wins = total_wins_login1
-            
-            # Score always matches player order: Player1 vs Player2 (Player1_wins-Player2_wins)
-            score = f"{player1_wins}-{player2_wins}"
-            
-            rivalry_data_obj = {
-                'player1': leader_name,  # Leader always first
-                'player2': loser_name,   # Loser always second
-                'shared_tracks': shared_tracks,
-                'p1_wins': player1_wins,  # Wins for player1 (as displayed)
-                'p2_wins': player2_wins,  # Wins for player2 (as displayed)
-                'leader': leader,
-                'score': score,
-                'tracks': list(track_data.keys())
-            }
-            
-            if shared_tracks >= 3:  # Standard rivalry threshold
-                rivalries.append(rivalry_data_obj)
-            elif shared_tracks == 2:  # Store potential 2-track rivalries
-                potential_2_track_rivalries.append(rivalry_data_obj)
-        
-        # Always include 2-track rivalries to ensure we have at least 15 total rivalries
-        if potential_2_track_rivalries:
-            print(f"🔍 Including 2-track rivalries to reach target ({len(rivalries)} main rivalries)")
-            # Sort 2-track rivalries by total battles (wins) to get the most active ones
-            potential_2_track_rivalries.sort(key=lambda x: x['p1_wins'] + x['p2_wins'], reverse=True)
-            # Add 2-track rivalries to reach at least 15 total rivalries
-            target_rivalries = 15
-            needed = max(0, min(target_rivalries - len(rivalries), len(potential_2_track_rivalries)))
-            rivalries.extend(potential_2_track_rivalries[:needed])
-        
-        return sorted(rivalries, key=lambda x: x['shared_tracks'], reverse=True)
+        """Detect ongoing rivalries between players with win/loss records.
+
+        Computed by the shared head-to-head engine (rivalry_engine.py); the snapshot keeps
+        the result, so the report, Discord message, image and heatmap of a week share it.
+        """
+        # Records whose rank is set but not a number take no part in head-to-heads
+        records_df = records_to_frame(
+            r.fields() for r in records if not r.rank or str(r.rank).isdigit())
+        return weekly_rivalries(records_df, self.get_all_latest_nicknames(records))
     
     def get_challenge_info_cache(self):
         """Get challenge info from database and cache it"""
+        if self._challenge_cache is not None:
+            return self._challenge_cache
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -347,7 +287,16 @@ class WeeklyStatsGenerator:
             challenge_cache[challenge_name] = total_records
         
         conn.close()
+        self._challenge_cache = challenge_cache
         return challenge_cache
+
+    def get_minilol_tracks(self):
+        """Tracks that ever had a record on the MiniLol FreeZone server (any spelling), cached"""
+        if self._minilol_tracks is None:
+            conn = sqlite3.connect(self.db_path)
+            self._minilol_tracks = server_tracks(conn, MINILOL_SERVER)
+            conn.close()
+        return self._minilol_tracks
     
     def create_report_folder(self):
         """Create a timestamped folder for the weekly report"""
@@ -401,38 +350,31 @@ class WeeklyStatsGenerator:
         write_line()
         
         # Get data
-        raw_records = self.get_latest_data()
+        snapshot = self.snapshot()
+        raw_records = snapshot.raw_records
         
         if not raw_records:
             write_line("❌ No data available for this week")
             return
         
-        # Deduplicate records to keep only best rank per player-track combination
+        # Deduplicated records keep only the best rank per player-track combination
         # (for statistics that should count unique track achievements)
-        deduplicated_records = self.deduplicate_records(raw_records)
+        deduplicated_records = snapshot.deduplicated_records
         
         write_line(f"📊 Analyzing {len(deduplicated_records)} unique records from {len(raw_records)} total dedi's this week...")
         write_line()
         
         # Get all analysis results
-        # Time masters uses raw data to track activity patterns across time
-        time_masters = self.analyze_time_masters(raw_records)
-        # Performance stats use deduplicated data (only best rank per track matters)
-        performance_elite = self.analyze_performance_elite(deduplicated_records)
-        # Solo explorer analysis (most solo tracks)
-        solo_explorer_results = self.analyze_solo_explorer(raw_records)
-        performance_elite.update(solo_explorer_results)
-        # Volume stats use deduplicated data (unique track counts)
-        volume_champions = self.analyze_volume_champions(deduplicated_records)
-        # Lolsport analysis uses deduplicated data (unique track achievements)
-        lolsport_stats = self.analyze_lolsport_addict(deduplicated_records)
+        time_masters = snapshot.time_masters
+        performance_elite = snapshot.performance_elite
+        volume_champions = snapshot.volume_champions
+        lolsport_stats = snapshot.lolsport_stats
         
         # 1. TRACK OWNERSHIP
         write_line("🏆 TRACK OWNERSHIP - WHO'S THE KING?")
         write_line("-" * 40)
         
-        # Track ownership uses deduplicated data (only best records matter for WR)
-        track_owners = self.analyze_track_ownership(deduplicated_records)
+        track_owners = snapshot.track_owners
         
         if track_owners:
             # Group by login for consistent counting, but use most recent nickname for display
@@ -509,14 +451,12 @@ class WeeklyStatsGenerator:
             lolsport = lolsport_stats['lolsport_addict']
             write_line(f"🏃 Lolsport Addict: {lolsport['player']} ({lolsport['lolsport_count']} lolsport dedi's)")
         
-        # Server-specific stats use raw data
-        server_stats = self.analyze_server_stats(raw_records)
+        server_stats = snapshot.server_stats
         if 'minilol_champion' in server_stats:
             minilol = server_stats['minilol_champion']
             write_line(f"🏆 MiniLol FreeZone Champion: {minilol['player']} ({minilol['unique_tracks']} unique minilol tracks)")
         
-        # Humorous stats use raw data (some need improvement tracking)
-        humorous_stats = self.analyze_humorous_stats(raw_records)
+        humorous_stats = snapshot.humorous_stats
         if 'benchwarmer' in humorous_stats:
             bench = humorous_stats['benchwarmer']
             write_line(f"🪑 The Benchwarmer: {bench['player']} ({bench['total_records']} dedi's total - where you at?)")
@@ -532,7 +472,7 @@ class WeeklyStatsGenerator:
         write_line("-" * 40)
         
         # Rivalries use deduplicated data (head-to-head best records)
-        rivalries = self.detect_rivalries(deduplicated_records)
+        rivalries = snapshot.rivalries
         
         if rivalries:
             write_line("⚡ ONGOING RIVALRIES:")
@@ -569,15 +509,15 @@ class WeeklyStatsGenerator:
         write_line("-" * 40)
         
         total_records = len(deduplicated_records)  # Unique track achievements
-        unique_tracks = len(set(record[2] for record in deduplicated_records))  # Unique tracks with records
-        unique_players = len(set(record[0] for record in deduplicated_records))  # Unique players with records
+        unique_tracks = len(set(record.track for record in deduplicated_records))  # Unique tracks with records
+        unique_players = len(set(record.login for record in deduplicated_records))  # Unique players with records
         
         write_line(f"📈 {total_records} total dedi's set this week")
         write_line(f"🏁 {unique_tracks} different tracks conquered")
         write_line(f"👥 {unique_players} players participated")
         
         # Most popular track
-        track_popularity = Counter(record[2] for record in deduplicated_records)
+        track_popularity = Counter(record.track for record in deduplicated_records)
         if track_popularity:
             hottest_track = track_popularity.most_common(1)[0]
             write_line(f"🔥 Hottest track: {hottest_track[0]} ({hottest_track[1]} dedi's)")
@@ -623,24 +563,21 @@ class WeeklyStatsGenerator:
                 print(text)
         
         # Get data
-        raw_records = self.get_latest_data()
+        snapshot = self.snapshot()
         
-        if not raw_records:
+        if not snapshot.raw_records:
             write_line("❌ No data available for this week")
             return output_lines
         
-        # Deduplicate records for statistics that need unique track achievements
-        deduplicated_records = self.deduplicate_records(raw_records)
+        # Deduplicated records for statistics that need unique track achievements
+        deduplicated_records = snapshot.deduplicated_records
         
         # Get analysis results
-        time_masters = self.analyze_time_masters(raw_records)
-        performance_elite = self.analyze_performance_elite(deduplicated_records)
-        # Solo explorer analysis (most solo tracks)
-        solo_explorer_results = self.analyze_solo_explorer(raw_records)
-        performance_elite.update(solo_explorer_results)
-        volume_champions = self.analyze_volume_champions(deduplicated_records)
-        lolsport_stats = self.analyze_lolsport_addict(deduplicated_records)
-        track_owners = self.analyze_track_ownership(deduplicated_records)
+        time_masters = snapshot.time_masters
+        performance_elite = snapshot.performance_elite
+        volume_champions = snapshot.volume_champions
+        lolsport_stats = snapshot.lolsport_stats
+        track_owners = snapshot.track_owners
         
         write_line("🏁 **WEEKLY TRACKMANIA HIGHLIGHTS**")
         
@@ -678,7 +615,7 @@ class WeeklyStatsGenerator:
             write_line(f"🏃 **Lolsport Addict:** {lolsport['player']} ({lolsport['lolsport_count']} lolsport dedi's)")
         
         # Server stats
-        server_stats = self.analyze_server_stats(raw_records)
+        server_stats = snapshot.server_stats
         if 'minilol_champion' in server_stats:
             minilol = server_stats['minilol_champion']
             write_line(f"🏆 **MiniLol Champion:** {minilol['player']} ({minilol['unique_tracks']} minilol tracks)")
@@ -706,13 +643,13 @@ class WeeklyStatsGenerator:
         # 📈 QUICK STATS
         write_line("📈 **QUICK STATS**")
         total_records = len(deduplicated_records)  # Unique track achievements
-        unique_tracks = len(set(record[2] for record in deduplicated_records))  # Unique tracks with records
-        unique_players = len(set(record[0] for record in deduplicated_records))  # Unique players with records
+        unique_tracks = len(set(record.track for record in deduplicated_records))  # Unique tracks with records
+        unique_players = len(set(record.login for record in deduplicated_records))  # Unique players with records
         
         write_line(f"📊 {total_records} dedi's • {unique_tracks} tracks • {unique_players} players")
         
         # Most popular track
-        track_popularity = Counter(record[2] for record in deduplicated_records)
+        track_popularity = Counter(record.track for record in deduplicated_records)
         if track_popularity:
             hottest_track = track_popularity.most_common(1)[0]
             write_line(f"🔥 Hottest: {hottest_track[0][:25]} ({hottest_track[1]} dedi's)")
@@ -734,7 +671,11 @@ class WeeklyStatsGenerator:
         return output_lines
     
     def analyze_time_masters(self, records):
-        """Analyze time-based patterns: Night Owl, Weekend Warrior, Binge Racer, Daily Grinder"""
+        """Analyze time-based patterns: Night Owl, Weekend Warrior, Binge Racer, Daily Grinder
+
+        One pass over the records' parsed timestamps; the week bounds and the per-login
+        record totals are computed up front.
+        """
         time_stats = {
             'night_owl': defaultdict(int),
             'weekend_warrior': defaultdict(int),
@@ -745,50 +686,45 @@ class WeeklyStatsGenerator:
         # Get latest nicknames for all logins
         player_nicks = self.get_all_latest_nicknames(records)
         
+        # Only count records within the weekly date range (Sunday to current day)
+        start_date_str, end_date_str = get_weekly_date_range()
+        start_day = day_number(datetime.strptime(start_date_str, '%Y-%m-%d').date())
+        end_day = day_number(datetime.strptime(end_date_str, '%Y-%m-%d').date())
+        
+        # Percentages are of all the player's records, in the range or not
+        total_records = Counter(record.login for record in records)
+        
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
+            if record.timestamp is None:
+                continue
             
-            try:
-                # Parse date and time
-                if ' ' in date:
-                    date_part, time_part = date.split(' ', 1)
-                    record_datetime = datetime.strptime(f"{date_part} {time_part}", '%Y-%m-%d %H:%M:%S')
-                else:
-                    record_datetime = datetime.strptime(date, '%Y-%m-%d')
-                
-                # Only count records within the weekly date range (Sunday to current day)
-                start_date_str, end_date_str = get_weekly_date_range()
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                record_date = record_datetime.date()
-                if not (start_date <= record_date <= end_date):
-                    continue
-                
-                # Night Owl: Different time windows for different time zones
-                # EU players: 0:00 to 6:00 EU time
-                # knotisaac/travulsa (Canada): 4:00 to 12:00 EU time (equivalent to 22:00-06:00 in Eastern Canada)
-                if login == 'knotisaac':
-                    # knotisaac (travulsa) is from Canada - count 4:00-12:00 EU time as his "night owl" hours (night time in Canada)
-                    if 4 <= record_datetime.hour <= 12:
-                        time_stats['night_owl'][login] += 1
-                else:
-                    # EU players: 0:00 to 6:00 EU time
-                    if 0 <= record_datetime.hour <= 6:
-                        time_stats['night_owl'][login] += 1
-                
-                # Weekend Warrior: Saturday (5) and Sunday (6)
-                if record_datetime.weekday() in [5, 6]:
-                    time_stats['weekend_warrior'][login] += 1
-                
-                # Binge Racer: records per day
-                day_key = record_datetime.strftime('%Y-%m-%d')
-                time_stats['binge_racer'][login][day_key] += 1
-                
-                # Daily Grinder: unique days played
-                time_stats['daily_grinder'][login].add(day_key)
-                
-            except:
+            day = record.day
+            if not (start_day <= day <= end_day):
                 continue
+            
+            login = record.login
+            # Night Owl: Different time windows for different time zones
+            # EU players: 0:00 to 6:00 EU time
+            # knotisaac/travulsa (Canada): 4:00 to 12:00 EU time (equivalent to 22:00-06:00 in Eastern Canada)
+            hour = record.hour
+            if login == 'knotisaac':
+                # knotisaac (travulsa) is from Canada - count 4:00-12:00 EU time as his "night owl" hours (night time in Canada)
+                if 4 <= hour <= 12:
+                    time_stats['night_owl'][login] += 1
+            else:
+                # EU players: 0:00 to 6:00 EU time
+                if 0 <= hour <= 6:
+                    time_stats['night_owl'][login] += 1
+            
+            # Weekend Warrior: Saturday (5) and Sunday (6)
+            if record.weekday >= 5:
+                time_stats['weekend_warrior'][login] += 1
+            
+            # Binge Racer: records per day
+            time_stats['binge_racer'][login][day] += 1
+            
+            # Daily Grinder: unique days played
+            time_stats['daily_grinder'][login].add(day)
         
         # Process results
         results = {}
@@ -805,8 +741,7 @@ class WeeklyStatsGenerator:
         if time_stats['weekend_warrior']:
             weekend_totals = []
             for login, weekend_count in time_stats['weekend_warrior'].items():
-                total_records = sum(1 for r in records if r[0] == login)
-                percentage = (weekend_count / total_records * 100) if total_records > 0 else 0
+                percentage = (weekend_count / total_records[login] * 100) if total_records[login] > 0 else 0
                 weekend_totals.append((login, weekend_count, percentage))
             
             best_weekend = max(weekend_totals, key=lambda x: x[1])
@@ -821,12 +756,11 @@ class WeeklyStatsGenerator:
         for login, daily_records in time_stats['binge_racer'].items():
             for day, count in daily_records.items():
                 if count > best_binge['count']:
-                    total_records = sum(1 for r in records if r[0] == login)
-                    percentage = (count / total_records * 100) if total_records > 0 else 0
+                    percentage = (count / total_records[login] * 100) if total_records[login] > 0 else 0
                     best_binge = {
                         'player': player_nicks.get(login, login),
                         'count': count,
-                        'date': day,
+                        'date': day_string(day),
                         'percentage': percentage
                     }
         
@@ -864,37 +798,35 @@ class WeeklyStatsGenerator:
         challenge_cache = self.get_challenge_info_cache()
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
-            try:
-                rank_int = int(rank) if rank else 999
-                player_stats[login]['total_records'] += 1
-                player_stats[login]['nick'] = latest_nicks.get(login, login)
-                player_stats[login]['ranks'].append(rank_int)
-                
-                # Get track competition level
-                total_players = challenge_cache.get(track, 1)  # Default to 1 if unknown
-                
-                # Only include competitive tracks (3+ players) for Steady Eddie calculation
-                if total_players >= 3:
-                    player_stats[login]['competitive_records'] += 1
-                    # Weight the rank by competition level (more competitive = more weight)
-                    competition_weight = min(total_players / 10.0, 2.0)  # Cap at 2x weight for 10+ players
-                    weighted_rank = rank_int / competition_weight
-                    player_stats[login]['weighted_ranks'].append(weighted_rank)
-                
-                if rank_int == 1:
-                    player_stats[login]['rank_1'] += 1
-                elif rank_int == 2:
-                    player_stats[login]['rank_2'] += 1
-                elif rank_int == 3:
-                    player_stats[login]['rank_3'] += 1
-                
-                if rank_int <= 3:
-                    player_stats[login]['top_3'] += 1
-                    
-            except:
+            rank_int = record.rank_int
+            if rank_int is None:  # Rank set but not a number
                 continue
+            
+            login = record.login
+            player_stats[login]['total_records'] += 1
+            player_stats[login]['nick'] = latest_nicks.get(login, login)
+            player_stats[login]['ranks'].append(rank_int)
+            
+            # Get track competition level
+            total_players = challenge_cache.get(record.track, 1)  # Default to 1 if unknown
+            
+            # Only include competitive tracks (3+ players) for Steady Eddie calculation
+            if total_players >= 3:
+                player_stats[login]['competitive_records'] += 1
+                # Weight the rank by competition level (more competitive = more weight)
+                competition_weight = min(total_players / 10.0, 2.0)  # Cap at 2x weight for 10+ players
+                weighted_rank = rank_int / competition_weight
+                player_stats[login]['weighted_ranks'].append(weighted_rank)
+            
+            if rank_int == 1:
+                player_stats[login]['rank_1'] += 1
+            elif rank_int == 2:
+                player_stats[login]['rank_2'] += 1
+            elif rank_int == 3:
+                player_stats[login]['rank_3'] += 1
+            
+            if rank_int <= 3:
+                player_stats[login]['top_3'] += 1
         
         results = {}
         
@@ -957,12 +889,10 @@ class WeeklyStatsGenerator:
         player_solo_tracks = defaultdict(set)
         
         for record in deduplicated_records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
             # Check if this track has only 1 total player
-            total_records = challenge_cache.get(track, 999)
+            total_records = challenge_cache.get(record.track, 999)
             if total_records == 1:
-                player_solo_tracks[login].add(track)
+                player_solo_tracks[record.login].add(record.track)
         
         if player_solo_tracks:
             # Find player with most solo tracks
@@ -990,15 +920,12 @@ class WeeklyStatsGenerator:
         latest_nicks = self.get_all_latest_nicknames(records)
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
-            try:
-                rank_int = int(rank) if rank else 999
-                player_stats[login]['total_records'] += 1
-                player_stats[login]['nick'] = latest_nicks.get(login, login)
-                player_stats[login]['ranks'].append(rank_int)
-            except:
+            if record.rank_int is None:  # Rank set but not a number
                 continue
+            login = record.login
+            player_stats[login]['total_records'] += 1
+            player_stats[login]['nick'] = latest_nicks.get(login, login)
+            player_stats[login]['ranks'].append(record.rank_int)
         
         results = {}
         
@@ -1023,10 +950,9 @@ class WeeklyStatsGenerator:
         latest_nicks = self.get_all_latest_nicknames(records)
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            
             # Check if track name contains "lolsport" (case insensitive)
-            if 'lolsport' in track.lower():
+            if 'lolsport' in record.track.lower():
+                login = record.login
                 player_stats[login]['lolsport_records'] += 1
                 player_stats[login]['nick'] = latest_nicks.get(login, login)
         
@@ -1061,23 +987,22 @@ class WeeklyStatsGenerator:
         })
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            player_data[login]['records'].append(record)
-            player_data[login]['nick'] = latest_nicks.get(login, login)
-            player_data[login]['tracks'].add(track)
+            data = player_data[record.login]
+            data['records'].append(record)
+            data['nick'] = latest_nicks.get(record.login, record.login)
+            data['tracks'].add(record.track)
             
-            try:
-                if rank:
-                    player_data[login]['ranks'].append(int(rank))
-                if time:
-                    player_data[login]['times'].append(self.format_time(time))
-                
-                # Extract hour from date
-                if ' ' in date:
-                    hour = int(date.split(' ')[1].split(':')[0])
-                    player_data[login]['hours'].add(hour)
-            except:
+            # A rank that is set but not a number leaves the rest of the record out
+            if record.rank_int is None:
                 continue
+            if record.rank:
+                data['ranks'].append(record.rank_int)
+            if record.time:
+                data['times'].append(record.time_ms)
+            
+            # Hour of the day, for records with a time of day
+            if record.timestamp is not None and ' ' in record.date:
+                data['hours'].add(record.hour)
         
         # The Benchwarmer - least active player (fewest UNIQUE tracks, with avg rank tiebreaker)
         if player_data:
@@ -1110,7 +1035,7 @@ class WeeklyStatsGenerator:
         for login, data in player_data.items():
             track_records = defaultdict(list)
             for record in data['records']:
-                track_records[record[2]].append(record)
+                track_records[record.track].append(record)
             
             max_drop = 0
             worst_track = ""
@@ -1119,19 +1044,18 @@ class WeeklyStatsGenerator:
             for track, track_recs in track_records.items():
                 if len(track_recs) >= 2:
                     # Sort by date
-                    track_recs.sort(key=lambda x: x[5])
+                    track_recs.sort(key=lambda x: x.date)
                     for i in range(len(track_recs) - 1):
-                        try:
-                            rank1 = int(track_recs[i][4]) if track_recs[i][4] else 999
-                            rank2 = int(track_recs[i+1][4]) if track_recs[i+1][4] else 999
-                            drop = rank2 - rank1
-                            if drop > max_drop:
-                                max_drop = drop
-                                worst_track = track
-                                original_rank = rank1
-                                final_rank = rank2
-                        except:
+                        rank1 = track_recs[i].rank_int
+                        rank2 = track_recs[i+1].rank_int
+                        if rank1 is None or rank2 is None:
                             continue
+                        drop = rank2 - rank1
+                        if drop > max_drop:
+                            max_drop = drop
+                            worst_track = track
+                            original_rank = rank1
+                            final_rank = rank2
             
             if max_drop > 0:
                 rage_quit_candidates.append((login, data, max_drop, worst_track, original_rank, final_rank))
@@ -1171,37 +1095,16 @@ class WeeklyStatsGenerator:
         # Get latest nicknames for all logins
         latest_nicks = self.get_all_latest_nicknames(records)
         
-        # First, identify which tracks are "minilol tracks" from database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        minilol_server_names = [
-            'minilol_freezone', 'minilol_freezone.', 'minilol freezone',
-            'Mini Lol FreeZone', 'MiniLol FreeZone', 'MINILOL_FREEZONE'
-        ]
-        
-        # Find all tracks that have ever been on minilol servers
-        minilol_tracks = set()
-        for variant in minilol_server_names:
-            cursor.execute("""
-                SELECT DISTINCT Challenge 
-                FROM dedimania_records 
-                WHERE server LIKE ?
-            """, (f"%{variant}%",))
-            
-            for row in cursor.fetchall():
-                minilol_tracks.add(row[0])
-        
-        conn.close()
+        # Tracks that have ever been on minilol servers, from the server dimension
+        minilol_tracks = self.get_minilol_tracks()
         
         # Now count unique minilol tracks played by each player (regardless of server played on)
         minilol_records = defaultdict(set)
         
         for record in records:
-            login, nick, track, time, rank, date, envir, mode, server = record
             # If this track is a minilol track, count it regardless of which server it was played on
-            if track in minilol_tracks:
-                minilol_records[login].add(track)
+            if record.track in minilol_tracks:
+                minilol_records[record.login].add(record.track)
         
         if minilol_records:
             # Convert sets to counts and find the player with most unique minilol tracks
@@ -1221,7 +1124,7 @@ class WeeklyStatsGenerator:
         print("="*80)
         
         # Get data
-        raw_records = self.get_latest_data()
+        raw_records = self.snapshot().raw_records
         if not raw_records:
             print("❌ No data available")
             return
@@ -1232,31 +1135,9 @@ class WeeklyStatsGenerator:
         print()
         
         # Identify minilol tracks from database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        minilol_server_names = [
-            'minilol_freezone', 'minilol_freezone.', 'minilol freezone',
-            'Mini Lol FreeZone', 'MiniLol FreeZone', 'MINILOL_FREEZONE'
-        ]
-        
-        # Find all tracks that have ever been on minilol servers
-        minilol_tracks = set()
         print("🔍 IDENTIFYING MINILOL TRACKS FROM DATABASE:")
         print("-" * 50)
-        
-        for variant in minilol_server_names:
-            cursor.execute("""
-                SELECT DISTINCT Challenge 
-                FROM dedimania_records 
-                WHERE server LIKE ?
-            """, (f"%{variant}%",))
-            
-            tracks_found = [row[0] for row in cursor.fetchall()]
-            for track in tracks_found:
-                minilol_tracks.add(track)
-        
-        conn.close()
+        minilol_tracks = self.get_minilol_tracks()
         
         print(f"Found {len(minilol_tracks)} unique minilol tracks in database")
         for track in sorted(minilol_tracks)[:10]:  # Show first 10
@@ -1271,7 +1152,7 @@ class WeeklyStatsGenerator:
         latest_nicks = self.get_all_latest_nicknames(raw_records)
         
         for record in raw_records:
-            login, nick, track, time, rank, date, envir, mode, server = record
+            login, nick, track, time, rank, date, envir, mode, server = record.fields()
             # If this track is a minilol track, count it regardless of which server it was played on
             if track in minilol_tracks:
                 minilol_records[login].append({
@@ -1391,15 +1272,15 @@ class WeeklyStatsGenerator:
             output_file = os.path.join(folder, 'weekly_rivalry_heatmap.png')
         
         # Get data
-        records = self.get_latest_data()
+        snapshot = self.snapshot()
         
-        if not records:
+        if not snapshot.raw_records:
             print("❌ No data available for generating rivalry heatmap")
             return
         
         # Get analysis results
-        deduplicated_records = self.deduplicate_records(records)
-        rivalries = self.detect_rivalries(deduplicated_records)
+        deduplicated_records = snapshot.deduplicated_records
+        rivalries = snapshot.rivalries
         
         # Image dimensions and setup - make it taller for more rivalries
         width = 1200
@@ -1561,12 +1442,12 @@ class WeeklyStatsGenerator:
         
         # Calculate stats
         total_records = len(deduplicated_records)
-        unique_tracks = len(set(record[2] for record in deduplicated_records))
-        unique_players = len(set(record[0] for record in deduplicated_records))
+        unique_tracks = len(set(record.track for record in deduplicated_records))
+        unique_players = len(set(record.login for record in deduplicated_records))
         
         # Calculate additional stats
-        top1_records = len([r for r in deduplicated_records if r[4] == '1'])
-        top5_records = len([r for r in deduplicated_records if r[4] and r[4].isdigit() and int(r[4]) <= 5])
+        top1_records = len([r for r in deduplicated_records if r.rank == '1'])
+        top5_records = len([r for r in deduplicated_records if r.rank and r.rank.isdigit() and r.rank_int <= 5])
         
         top1_percentage = (top1_records / len(deduplicated_records) * 100) if len(deduplicated_records) > 0 else 0
         top5_percentage = (top5_records / len(deduplicated_records) * 100) if len(deduplicated_records) > 0 else 0
@@ -1657,23 +1538,17 @@ class WeeklyStatsGenerator:
         from PIL import Image, ImageDraw, ImageFont
         
         # Get data
-        raw_records = self.get_latest_data()
+        snapshot = self.snapshot()
         
-        if not raw_records:
+        if not snapshot.raw_records:
             print("❌ No data available for generating image")
             return
         
-        # Deduplicate records for performance and volume stats
-        deduplicated_records = self.deduplicate_records(raw_records)
-        
         # Get analysis results
-        time_masters = self.analyze_time_masters(raw_records)
-        performance_elite = self.analyze_performance_elite(deduplicated_records)
-        # Solo explorer analysis (most solo tracks)
-        solo_explorer_results = self.analyze_solo_explorer(raw_records)
-        performance_elite.update(solo_explorer_results)
-        volume_champions = self.analyze_volume_champions(deduplicated_records)
-        lolsport_stats = self.analyze_lolsport_addict(deduplicated_records)
+        time_masters = snapshot.time_masters
+        performance_elite = snapshot.performance_elite
+        volume_champions = snapshot.volume_champions
+        lolsport_stats = snapshot.lolsport_stats
         
         # Image dimensions and setup
         width = 1200
@@ -1835,8 +1710,7 @@ class WeeklyStatsGenerator:
             })
         
         # Add Caffeine Addict from humorous stats
-        # Humorous stats use raw data (some need improvement tracking)
-        humorous_stats = self.analyze_humorous_stats(raw_records)
+        humorous_stats = snapshot.humorous_stats
         if 'caffeine_addict' in humorous_stats:
             caffeine = humorous_stats['caffeine_addict']
             time_items.append({
@@ -1937,17 +1811,16 @@ class WeeklyStatsGenerator:
         from PIL import Image, ImageDraw, ImageFont
         
         # Get data
-        records = self.get_latest_data()
+        snapshot = self.snapshot()
         
-        if not records:
+        if not snapshot.raw_records:
             print("❌ No data available for generating image")
             return
         
         # Get analysis results
-        # First deduplicate records for track ownership and rivalries
-        deduplicated_records = self.deduplicate_records(records)
-        track_owners = self.analyze_track_ownership(deduplicated_records)
-        rivalries = self.detect_rivalries(deduplicated_records)
+        deduplicated_records = snapshot.deduplicated_records
+        track_owners = snapshot.track_owners
+        rivalries = snapshot.rivalries
         
         # Image dimensions and setup
         width = 1200
@@ -2119,12 +1992,12 @@ class WeeklyStatsGenerator:
         
         # QUICK STATS Section
         total_records = len(deduplicated_records)  # Unique track achievements, not all attempts
-        unique_tracks = len(set(record[2] for record in deduplicated_records))  # Unique tracks with records
-        unique_players = len(set(record[0] for record in deduplicated_records))  # Unique players with records
+        unique_tracks = len(set(record.track for record in deduplicated_records))  # Unique tracks with records
+        unique_players = len(set(record.login for record in deduplicated_records))  # Unique players with records
         
         # Calculate top1 and top5 statistics based on deduplicated records (best rank per track only)
-        top1_records = len([r for r in deduplicated_records if r[4] == '1'])
-        top5_records = len([r for r in deduplicated_records if r[4] and r[4].isdigit() and int(r[4]) <= 5])
+        top1_records = len([r for r in deduplicated_records if r.rank == '1'])
+        top5_records = len([r for r in deduplicated_records if r.rank and r.rank.isdigit() and r.rank_int <= 5])
         
         top1_percentage = (top1_records / len(deduplicated_records) * 100) if len(deduplicated_records) > 0 else 0
         top5_percentage = (top5_records / len(deduplicated_records) * 100) if len(deduplicated_records) > 0 else 0
@@ -2134,9 +2007,8 @@ class WeeklyStatsGenerator:
         track_times = defaultdict(lambda: defaultdict(set))  # track -> time -> set of players
         
         for record in deduplicated_records:
-            login, nick, track, time, rank, date, envir, mode, server = record
-            if time:  # Only count if we have a time
-                track_times[track][time].add(login)
+            if record.time:  # Only count if we have a time
+                track_times[record.track][record.time].add(record.login)
         
         for track, times in track_times.items():
             for time, players in times.items():
@@ -2150,7 +2022,7 @@ class WeeklyStatsGenerator:
         ]
         
         # Track popularity uses deduplicated data to show unique records per track
-        track_popularity = Counter(record[2] for record in deduplicated_records)
+        track_popularity = Counter(record.track for record in deduplicated_records)
         if track_popularity:
             hottest_track = track_popularity.most_common(1)[0]
             stats_items.append(f"• Hottest track: {hottest_track[0]} ({hottest_track[1]} dedi's)")
@@ -2210,24 +2082,18 @@ class WeeklyStatsGenerator:
             output_file = os.path.join(folder, 'weekly_achievement_dashboard.png')
         
         # Get data
-        raw_records = self.get_latest_data()
+        snapshot = self.snapshot()
         
-        if not raw_records:
+        if not snapshot.raw_records:
             print("❌ No data available for generating achievement dashboard")
             return
         
-        # Deduplicate records for performance and volume stats
-        deduplicated_records = self.deduplicate_records(raw_records)
-        
         # Get analysis results
-        time_masters = self.analyze_time_masters(raw_records)
-        performance_elite = self.analyze_performance_elite(deduplicated_records)
-        # Solo explorer analysis (most solo tracks)
-        solo_explorer_results = self.analyze_solo_explorer(raw_records)
-        performance_elite.update(solo_explorer_results)
-        volume_champions = self.analyze_volume_champions(deduplicated_records)
-        lolsport_stats = self.analyze_lolsport_addict(deduplicated_records)
-        humorous_stats = self.analyze_humorous_stats(raw_records)
+        time_masters = snapshot.time_masters
+        performance_elite = snapshot.performance_elite
+        volume_champions = snapshot.volume_champions
+        lolsport_stats = snapshot.lolsport_stats
+        humorous_stats = snapshot.humorous_stats
         
         # Enhanced gaming dimensions
         width = 1500
@@ -2577,7 +2443,7 @@ class WeeklyStatsGenerator:
             })
         
         # Server achievements
-        server_stats = self.analyze_server_stats(raw_records)
+        server_stats = snapshot.server_stats
         if 'minilol_champion' in server_stats:
             achievements.append({
                 'title': 'MINILOL CHAMPION',
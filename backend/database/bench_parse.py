@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Parser Benchmark
+Times every installed dedimania_parse backend over saved Dedimania HTML pages and checks
+that each one extracts exactly what the BeautifulSoup reference does.
+
+Fixtures are named by page type: player_*.html, challenge_*.html, record_*.html, maps_*.html.
+The pages in fixtures/ follow the live site's markup: Latin-1, a search form table.tabl
+before the records, striped tr.tabl rows and a menu "Account" link above the record
+table. Use --save to replace them with freshly downloaded pages; without fixtures a
+synthetic records page is used.
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from dedimania_parse import BACKENDS, available_backends
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+STATS_URL = "http://dedimania.net/tmstats/?do=stat"
+
+# What each page type is parsed for during a refresh
+EXTRACTORS = {
+    'player': lambda p, html: p.table_rows(html),
+    'challenge': lambda p, html: (p.tabl_row_counts(html), p.data_rows(html)),
+    'record': lambda p, html: p.account_name(html),
+    'maps': lambda p, html: p.uid_links(html),
+}
+
+
+def save_fixtures(fixtures_dir, logins):
+    """Download one page of each type per login into fixtures_dir"""
+    from dedimania_http import get_client
+    from dedimania_parse import get_parser
+
+    client = get_client()
+    parser = get_parser()
+    os.makedirs(fixtures_dir, exist_ok=True)
+
+    def write(name, content):
+        path = os.path.join(fixtures_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        print(f"💾 Saved {path} ({len(content)} bytes)")
+
+    for login in logins:
+        resp = client.get(STATS_URL, params={"RGame": "TMU", "Login": login, "Show": "RECORDS", "LIMIT": 100})
+        write(f'player_{login}.html', resp.content)
+
+        rows = parser.table_rows(resp.content) or []
+        challenge = next((cells[11] for cells in rows[1:] if len(cells) > 11), None)
+        if not challenge:
+            continue
+        resp = client.post(STATS_URL, data={'Challenge': challenge, 'RGame': 'TMU', 'Show': 'MAPS'})
+        write(f'maps_{login}.html', resp.content)
+
+        links = parser.uid_links(resp.content)
+        if not links:
+            continue
+        uid = links[0][0].split('Uid=')[1].split('&')[0]
+        resp = client.get(f"{STATS_URL}&RGame=TMU&Uid={uid}&Show=RECORDS")
+        write(f'challenge_{login}.html', resp.content)
+        resp = client.get(f"{STATS_URL}&Login={login}&Uid={uid}&Show=RECORD")
+        write(f'record_{login}.html', resp.content)
+
+
+def synthetic_player_page(rows=100):
+    """A records page shaped like Dedimania's, for running the benchmark without fixtures"""
+    header = ''.join(f'<td><b>{h}</b></td>' for h in
+                     ['', '', 'Game', 'Login', 'NickName', 'Rank', 'Max', 'Record', 'Mode',
+                      'CPs', 'MapCPs', 'Challenge', 'Envir', 'RecordDate', '#'])
+    body = []
+    for i in range(rows):
+        color = '#FFFFFF' if i % 2 else '#F0F0F0'
+        cells = ['&nbsp;', '<img src="x.gif">', 'TMU', f'<a href="?Login=player{i}">player{i}</a>',
+                 f'<font color="#f00">Nick</font>&nbsp;{i}', str(i % 30 + 1), '30', f'00:{i % 60:02d}.{i:02d}',
+                 'TA', '5', '5', f'<a href="?Uid=uid{i}&Show=RECORDS">Challenge {i}</a>', 'Stadium',
+                 f'2025-07-{i % 28 + 1:02d} 12:{i % 60:02d}:00', str(i)]
+        body.append(f'<tr class="tabl" bgcolor="{color}">' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>')
+    return ('<html><head><title>Dedimania</title></head><body>'
+            '<table class="tabl"><tr class="tabl"><td><form><input name="Login"></form></td></tr></table>'
+            f'<table class="tabl"><tr class="tabl">{header}</tr>{"".join(body)}</table>'
+            '</body></html>').encode('utf-8')
+
+
+def load_fixtures(fixtures_dir):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        kind = os.path.basename(path).split('_')[0]
+        if kind in EXTRACTORS:
+            with open(path, 'rb') as f:
+                fixtures.append((os.path.basename(path), kind, f.read()))
+    return fixtures
+
+
+def run_benchmark(fixtures, backends, repeat):
+    reference = BACKENDS['beautifulsoup']()
+    expected = {name: EXTRACTORS[kind](reference, html) for name, kind, html in fixtures}
+
+    results = {}
+    for backend in backends:
+        parser = BACKENDS[backend]()
+        mismatches = [name for name, kind, html in fixtures if EXTRACTORS[kind](parser, html) != expected[name]]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, kind, html in fixtures:
+                EXTRACTORS[kind](parser, html)
+        elapsed = time.perf_counter() - start
+        results[backend] = (elapsed / (repeat * len(fixtures)) * 1000, mismatches)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Dedimania HTML parser backends')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help='Directory with saved HTML pages')
+    parser.add_argument('--save', nargs='*', metavar='LOGIN',
+                        help='Download fixtures for these logins first (default: yrdk)')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the fixtures per backend')
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), help='Backends to compare')
+    args = parser.parse_args()
+
+    if args.save is not None:
+        save_fixtures(args.fixtures, args.save or ['yrdk'])
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"⚠️ No fixtures in {args.fixtures}, using a synthetic 100-row records page (run with --save)")
+        fixtures = [('synthetic', 'player', synthetic_player_page())]
+
+    backends = args.backends or available_backends()
+    print(f"📄 {len(fixtures)} pages, {args.repeat} passes, backends: {', '.join(backends)}\n")
+
+    results = run_benchmark(fixtures, backends, args.repeat)
+    baseline = results.get('beautifulsoup', (None,))[0]
+    for backend, (ms_per_page, mismatches) in sorted(results.items(), key=lambda item: item[1][0]):
+        speedup = f"{baseline / ms_per_page:5.1f}x" if baseline else "  n/a"
+        status = "✅ matches reference" if not mismatches else f"❌ differs on {', '.join(mismatches)}"
+        print(f"  {backend:<14} {ms_per_page:8.2f} ms/page  {speedup}  {status}")
+
+
+if __name__ == '__main__':
+    main()
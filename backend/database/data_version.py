@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Data Version
+A cheap change marker for the database, used to key cached query results.
+
+Writers call bump_data_version() in the same transaction as their changes. Readers call
+get_data_version(), which also folds in MAX(id) of dedimania_records so rows inserted by
+a tool that doesn't bump the counter still invalidate caches. Both are index lookups.
+"""
+
+
+def bump_data_version(conn):
+    """Mark the data as changed (call inside the writing transaction)"""
+    conn.execute('''
+        INSERT INTO store_meta (key, value) VALUES ('data_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+
+
+def get_data_version(conn):
+    row = conn.execute('''
+        SELECT (SELECT value FROM store_meta WHERE key = 'data_version'),
+               (SELECT MAX(id) FROM dedimania_records)
+    ''').fetchone()
+    return f"{row[0] or 0}.{row[1] or 0}"
@@ -1,11 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
 import sqlite3
 from datetime import datetime
-import time
 import os
 import re
 import html
+import argparse
+import hashlib
+
+from dedimania_http import get_client, TransientFetchError
+from dedimania_parse import parser as html_parser
+from fetch_engine import FetchEngine, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_CONCURRENCY, DEFAULT_MIN_INTERVAL
+from schema import TYPED_COLUMNS, typed_values
+from migrations import migrate, migrate_path, add_missing_columns
+from data_version import bump_data_version
+from rollup import refresh_daily_rollup
+from servers import SERVER_PLACEHOLDERS, refresh_server_aliases
 
 player_logins = [
     '2nd', 'yrdk', 'niyck', 'youngblizzard', 'pointiff', 'yogeshdeshwari', 'bananaapple',
@@ -19,49 +27,37 @@ headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
 }
 
+# Paging of the player records list. The offset parameter name is what the stats pages use
+# for "next page" links; change it here if Dedimania ever renames it.
+PAGE_SIZE = 100
+PAGE_OFFSET_PARAM = 'Start'
+DEFAULT_PAGE_WINDOW = 4  # Pages fetched concurrently per backfill step
+
 class ComprehensiveDataFetcher:
     """Fetches UUIDs, challenge info, and server information for player records from Dedimania"""
     
-    def __init__(self, db_path, db_connection=None):
+    def __init__(self, db_path, db_connection=None, engine=None):
         self.db_path = db_path
         self.db_conn = db_connection  # Use shared connection to avoid locks
         self.base_url = "http://dedimania.net/tmstats/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.engine = engine  # Optional FetchEngine for concurrent use
+        self.client = get_client()  # Shared rate limiter + retries
         self._server_cache = {}  # Cache to avoid repeated requests
         self._uuid_cache = {}    # Cache to avoid repeated UUID lookups
         if self.db_conn:
-            self._ensure_challenge_info_table()
-    
-    def _ensure_challenge_info_table(self):
-        """Ensure challenge_info table exists"""
-        if self.db_conn:
-            cursor = self.db_conn.cursor()
+            migrate(self.db_conn)
         else:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS challenge_info (
-                challenge_name TEXT PRIMARY KEY,
-                challenge_uuid TEXT,
-                environment TEXT,
-                mood TEXT,
-                difficulty TEXT,
-                total_records INTEGER,
-                world_record TEXT,
-                world_record_holder TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        if self.db_conn:
-            self.db_conn.commit()
-        else:
-            conn.commit()
-            conn.close()
+            migrate_path(self.db_path)
+    
+    def _get(self, url, **kwargs):
+        if self.engine:
+            return self.engine.get(url, **kwargs)
+        return self.client.get(url, **kwargs)
+    
+    def _post(self, url, **kwargs):
+        if self.engine:
+            return self.engine.post(url, **kwargs)
+        return self.client.post(url, **kwargs)
     
     def _names_similar(self, name1, name2):
         """Check if two challenge names are similar (basic comparison)"""
@@ -93,18 +89,11 @@ class ComprehensiveDataFetcher:
                 'Show': 'MAPS'
             }
             
-            response = self.session.post(search_url, data=search_data, timeout=10)
+            response = self._post(search_url, data=search_data, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Look for challenge links with UUIDs
-            all_links = soup.find_all('a', href=True)
-            
-            for link in all_links:
-                href = link.get('href', '')
-                text = link.get_text().strip()
-                
+            for href, text in html_parser.uid_links(response.content):
                 # Check if this link matches our challenge name
                 original_match = (challenge_name.lower() in text.lower() or 
                                  text.lower() in challenge_name.lower() or
@@ -126,15 +115,10 @@ class ComprehensiveDataFetcher:
             
             # Search with just the challenge name
             search_data = {'Challenge': challenge_name[:20], 'Show': 'MAPS', 'RGame': 'TMU'}
-            response = self.session.post(search_url, data=search_data, timeout=10)
+            response = self._post(search_url, data=search_data, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
             
-            all_links = soup.find_all('a', href=True)
-            for link in all_links:
-                href = link.get('href', '')
-                text = link.get_text().strip()
-                
+            for href, text in html_parser.uid_links(response.content):
                 if ('Uid=' in href and 
                     len(text) > 3 and
                     (self._names_similar(challenge_name, text) or 
@@ -150,6 +134,10 @@ class ComprehensiveDataFetcher:
             self._uuid_cache[challenge_name] = None
             return None
             
+        except TransientFetchError as e:
+            # Don't cache: the lookup is retried on the next run
+            print(f"⚠️ Dedimania unavailable while searching UUID: {e}")
+            return None
         except Exception as e:
             print(f"❌ Error searching for UUID: {e}")
             self._uuid_cache[challenge_name] = None
@@ -159,19 +147,14 @@ class ComprehensiveDataFetcher:
         """Fetch basic challenge information using UUID"""
         try:
             stats_url = f"{self.base_url}?do=stat&RGame=TMU&Uid={challenge_uuid}&Show=RECORDS"
-            response = self.session.get(stats_url, timeout=10)
+            response = self._get(stats_url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Count records in the table
-            records_tables = soup.find_all('table', class_='tabl')
             total_records = 0
-            
-            for table in records_tables:
-                data_rows = table.find_all('tr', class_='tabl')
-                if len(data_rows) > 1:  # Has header + data rows
-                    total_records = len(data_rows) - 1  # Subtract header row
+            for row_count in html_parser.tabl_row_counts(response.content):
+                if row_count > 1:  # Has header + data rows
+                    total_records = row_count - 1  # Subtract header row
                     break
             
             return {
@@ -188,58 +171,71 @@ class ComprehensiveDataFetcher:
             print(f"❌ Error fetching challenge info: {e}")
             return None
 
-    def ensure_challenge_uuid_and_info(self, challenge_name):
-        """Ensure we have UUID and basic info for a challenge"""
+    def lookup_stored_uuid(self, challenge_name):
+        """Return the UUID already stored in challenge_info, or None"""
         # Use shared connection or create new one
         if self.db_conn:
             cursor = self.db_conn.cursor()
         else:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-        
-        # Check if we already have it in database
+
         cursor.execute('''
-            SELECT challenge_uuid 
-            FROM challenge_info 
+            SELECT challenge_uuid
+            FROM challenge_info
             WHERE challenge_name = ?
         ''', (challenge_name,))
-        
+
         result = cursor.fetchone()
-        if result and result[0]:
-            if not self.db_conn:
-                conn.close()
-            return result[0]  # Already have UUID
-        
-        # Need to fetch UUID
+        if not self.db_conn:
+            conn.close()
+        return result[0] if result and result[0] else None
+
+    def fetch_challenge_uuid_and_info(self, challenge_name):
+        """Network-only part of the UUID lookup, safe to run on worker threads. Returns (uuid, info)"""
         uuid = self.search_for_challenge_uuid(challenge_name)
         if not uuid:
-            if not self.db_conn:
-                conn.close()
-            return None
-        
-        # Get challenge info
-        info = self.get_challenge_info(uuid)
-        if info:
-            # Store in database
-            cursor.execute('''
-                INSERT OR REPLACE INTO challenge_info 
-                (challenge_name, challenge_uuid, environment, mood, difficulty, 
-                 total_records, world_record, world_record_holder, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (
-                challenge_name, info['challenge_uuid'], info['environment'],
-                info['mood'], info['difficulty'], info['total_records'],
-                info['world_record'], info['world_record_holder']
-            ))
-            
-            if self.db_conn:
-                self.db_conn.commit()
-            else:
-                conn.commit()
-            print(f"💾 Stored challenge info for: {challenge_name}")
-        
-        if not self.db_conn:
+            return None, None
+        return uuid, self.get_challenge_info(uuid)
+
+    def store_challenge_info(self, challenge_name, info):
+        """Store challenge info in the database (call from the thread owning the connection)"""
+        if self.db_conn:
+            cursor = self.db_conn.cursor()
+        else:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO challenge_info
+            (challenge_name, challenge_uuid, environment, mood, difficulty,
+             total_records, world_record, world_record_holder, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (
+            challenge_name, info['challenge_uuid'], info['environment'],
+            info['mood'], info['difficulty'], info['total_records'],
+            info['world_record'], info['world_record_holder']
+        ))
+        bump_data_version(self.db_conn or conn)
+
+        if self.db_conn:
+            self.db_conn.commit()
+        else:
+            conn.commit()
             conn.close()
+        print(f"💾 Stored challenge info for: {challenge_name}")
+
+    def ensure_challenge_uuid_and_info(self, challenge_name):
+        """Ensure we have UUID and basic info for a challenge"""
+        # Check if we already have it in database
+        uuid = self.lookup_stored_uuid(challenge_name)
+        if uuid:
+            return uuid  # Already have UUID
+
+        # Need to fetch UUID and challenge info
+        uuid, info = self.fetch_challenge_uuid_and_info(challenge_name)
+        if uuid and info:
+            self.store_challenge_info(challenge_name, info)
         return uuid
 
     def get_challenge_uuid(self, challenge_name):
@@ -255,49 +251,19 @@ class ComprehensiveDataFetcher:
         try:
             url = f"{self.base_url}?do=stat&Login={player_login}&Uid={challenge_uuid}&Show=RECORD"
             
-            response = self.session.get(url, timeout=10)
+            # A new record changes this page, so ingest always revalidates instead of trusting the cache
+            response = self._get(url, timeout=10, cache_ttl=0)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for "account" field in the HTML table structure
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                if len(rows) < 2:
-                    continue
-                
-                # Find the Account column
-                account_col_index = -1
-                header_row = None
-                
-                for row_idx, row in enumerate(rows):
-                    cells = row.find_all(['td', 'th'])
-                    for col_idx, cell in enumerate(cells):
-                        cell_text = cell.get_text(strip=True)
-                        if cell_text == 'Account':
-                            account_col_index = col_idx
-                            header_row = row_idx
-                            break
-                    if account_col_index >= 0:
-                        break
-                
-                # Extract server name from data rows
-                if account_col_index >= 0 and header_row is not None:
-                    for data_row in rows[header_row + 1:]:
-                        data_cells = data_row.find_all(['td', 'th'])
-                        if account_col_index < len(data_cells):
-                            server_name = data_cells[account_col_index].get_text(strip=True)
-                            if (server_name and 
-                                server_name.lower() not in ['account', '', '-', '&nbsp;'] and
-                                not server_name.startswith('&nbsp;') and
-                                len(server_name) > 1):
-                                self._server_cache[cache_key] = server_name
-                                return server_name
-            
-            self._server_cache[cache_key] = "Unknown"
-            return "Unknown"
+            # Look for the "Account" column of the record table
+            server_name = html_parser.account_name(response.content) or "Unknown"
+            self._server_cache[cache_key] = server_name
+            return server_name
             
+        except TransientFetchError as e:
+            # Leave the server empty so the next refresh retries it instead of storing "Error" for good
+            print(f"    ⚠️ Server fetch failed for {player_login}, will retry next run: {e}")
+            return None
         except Exception as e:
             print(f"    ❌ Server fetch error for {player_login}: {e}")
             self._server_cache[cache_key] = "Error"
@@ -309,9 +275,7 @@ class ComprehensiveDataFetcher:
         if not challenge_uuid:
             return "No UUID"
         
-        server = self.fetch_server_info(player_login, challenge_uuid)
-        time.sleep(0.1)  # Small delay to be respectful
-        return server
+        return self.fetch_server_info(player_login, challenge_uuid)
 
 def get_all_headers():
     # Fetch one player's data to get all possible headers
@@ -321,18 +285,14 @@ def get_all_headers():
         "Show": "RECORDS",
         "LIMIT": 100
     }
-    resp = requests.get(url, params=params, headers=headers)
-    soup = BeautifulSoup(resp.text, 'html.parser')
-    tables = soup.find_all('table', class_='tabl')
-    if len(tables) < 2:
+    resp = get_client().get(url, params=params, headers=headers)
+    rows = html_parser.table_rows(resp.text)
+    if rows is None:
         raise Exception("No data table found!")
-    data_table = tables[1]
-    rows = data_table.find_all('tr', class_='tabl')
     if not rows:
         raise Exception("No header row found!")
     
-    header_cells = rows[0].find_all('td')
-    headers_row = [cell.get_text(strip=True) for cell in header_cells]
+    headers_row = rows[0]
     
     # Debug: Print the headers to see what we're getting
     print(f"Found {len(headers_row)} headers:")
@@ -355,210 +315,487 @@ def get_all_headers():
     return valid_headers
 
 def create_table_if_needed(conn, headers_row):
-    c = conn.cursor()
-    # Build SQL for dynamic columns
-    columns = ',\n'.join([f'"{h}" TEXT' for h in headers_row])
-    
-    # Find the RecordDate column name
-    recorddate_col = None
+    """Bring the schema up to date and make sure every scraped header has a column"""
+    migrate(conn)
+    if not get_recorddate_column(headers_row):
+        raise Exception("Could not find RecordDate column in headers!")
+
+    # Dedimania added a column since the schema was written: keep it rather than failing inserts
+    added = add_missing_columns(conn, 'dedimania_records', [(h, 'TEXT') for h in headers_row])
+    if added:
+        print(f"🔧 Added new Dedimania columns: {', '.join(added)}")
+    conn.commit()
+
+def get_recorddate_column(headers_row):
+    """Find the RecordDate column name in the headers"""
     for h in headers_row:
         if h.lower().startswith('recorddate'):
-            recorddate_col = h
-            break
-    
-    if not recorddate_col:
-        raise Exception("Could not find RecordDate column in headers!")
-    
-    # Add UNIQUE constraint on player_login and RecordDate (original full datetime)
-    sql = f'''
-    CREATE TABLE IF NOT EXISTS dedimania_records (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        player_login TEXT,
-        {columns},
-        record_date_only TEXT,
-        record_time_only TEXT,
-        fetch_timestamp TEXT,
-        UNIQUE(player_login, "{recorddate_col}")
-    )
+            return h
+    return None
+
+def fetch_player_page(engine, login, page=0):
+    """Fetch one records page for a player (runs on a worker thread). Page 0 is the newest"""
+    params = {
+        "RGame": "TMU",
+        "Login": login,
+        "Show": "RECORDS",
+        "LIMIT": PAGE_SIZE
+    }
+    if page:
+        params[PAGE_OFFSET_PARAM] = page * PAGE_SIZE
+        print(f"Fetching Dedimania data for {login} (page {page + 1})...")
+    else:
+        print(f"Fetching Dedimania data for {login}...")
+    return engine.get(url, params=params, headers=headers)
+
+def parse_player_rows(page_html, headers_row, login, stop_at=None):
+    """Parse a player's records page into record dicts (None if the page has no data table).
+
+    Pages list records newest first, so parsing stops at the first record whose
+    RecordDate is not newer than stop_at (the player's high-water mark).
+    """
+    rows = html_parser.table_rows(page_html)
+    if rows is None:
+        print(f"No data table found for {login}!")
+        return None
+    if not rows:
+        print(f"No data rows found for {login}!")
+        return None
+
+    recorddate_col = get_recorddate_column(headers_row)
+    fetch_timestamp = datetime.now().isoformat(timespec='seconds')
+    records = []
+    for cell_texts in rows[1:]:  # Skip header row
+        # Use the same indices that produced our valid headers
+        valid_cells = cell_texts[2:15]
+
+        if len(valid_cells) != len(headers_row):
+            print(f"  Skipping row with {len(valid_cells)} valid cells, expected {len(headers_row)}")
+            continue
+
+        record = {headers_row[i]: valid_cells[i] for i in range(len(headers_row))}
+        if stop_at and recorddate_col and record.get(recorddate_col) and record[recorddate_col] <= stop_at:
+            break  # Everything from here on is already stored
+        record['player_login'] = login
+        record['fetch_timestamp'] = fetch_timestamp
+
+        # Extract date and time parts from RecordDate (format like "2023-12-25 14:30:15" or "2023-12-25")
+        full_datetime = record.get(recorddate_col, '') if recorddate_col else ''
+        if full_datetime:
+            parts = full_datetime.split(' ')
+            record['record_date_only'] = parts[0]
+            record['record_time_only'] = parts[1] if len(parts) > 1 else ''
+        else:
+            record['record_date_only'] = ''
+            record['record_time_only'] = ''
+        record.update(zip(TYPED_COLUMNS, typed_values(record.get('Rank'), record.get('Record'), full_datetime)))
+        records.append(record)
+    return records
+
+def load_sync_state(conn, recorddate_col):
+    """Return {login: (last_record_date, page_hash)}.
+
+    Players without a sync row yet fall back to their newest stored RecordDate, so the
+    first incremental run on an existing database doesn't treat old rows as new.
+    """
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT player_login, MAX("{recorddate_col}")
+        FROM dedimania_records
+        GROUP BY player_login
+    ''')
+    state = {login: (last_date, None) for login, last_date in c.fetchall()}
+    c.execute('SELECT player_login, last_record_date, page_hash FROM player_sync_state')
+    for login, last_date, page_hash in c.fetchall():
+        state[login] = (last_date, page_hash)
+    return state
+
+def save_sync_state(conn, login, last_record_date, page_hash, changed):
+    now = datetime.now().isoformat(timespec='seconds')
+    conn.execute('''
+        INSERT INTO player_sync_state (player_login, last_record_date, page_hash, last_fetched, last_changed)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(player_login) DO UPDATE SET
+            last_record_date = excluded.last_record_date,
+            page_hash = excluded.page_hash,
+            last_fetched = excluded.last_fetched,
+            last_changed = COALESCE(excluded.last_changed, player_sync_state.last_changed)
+    ''', (login, last_record_date, page_hash, now, now if changed else None))
+
+def get_pending_server_rows(conn, recorddate_col):
+    """Stored rows whose server lookup should be retried: transient failures (NULL / "Error")
+    and "No UUID" rows whose challenge has since been resolved. One query per refresh."""
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT r.player_login, r.Challenge, r."{recorddate_col}"
+        FROM dedimania_records r
+        WHERE r.server IS NULL OR r.server = 'Error'
+           OR (r.server = 'No UUID' AND EXISTS (
+                SELECT 1 FROM challenge_info ci
+                WHERE ci.challenge_name = r.Challenge AND ci.challenge_uuid IS NOT NULL))
+    ''')
+    return [{'player_login': login, 'Challenge': challenge, recorddate_col: record_date, 'server': None}
+            for login, challenge, record_date in c.fetchall() if challenge]
+
+def save_backfill_checkpoint(conn, login, next_page, records_inserted, completed):
+    conn.execute('''
+        INSERT INTO backfill_checkpoint (player_login, next_page, records_inserted, completed, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(player_login) DO UPDATE SET
+            next_page = excluded.next_page,
+            records_inserted = excluded.records_inserted,
+            completed = excluded.completed,
+            updated_at = excluded.updated_at
+    ''', (login, next_page, records_inserted, int(completed), datetime.now().isoformat(timespec='seconds')))
+
+def build_record_statements(headers_row, recorddate_col):
+    """Return (insert_sql, update_server_sql), built once per run"""
+    columns = ', '.join(['player_login'] + [f'"{h}"' for h in headers_row] +
+                        ['record_date_only', 'record_time_only', 'fetch_timestamp', 'server'] + TYPED_COLUMNS)
+    placeholders = ', '.join(['?'] * (len(headers_row) + 5 + len(TYPED_COLUMNS)))
+    insert_sql = f'INSERT OR IGNORE INTO dedimania_records ({columns}) VALUES ({placeholders})'
+    # Existing rows only get their server filled in when it was still a placeholder
+    placeholder_list = ', '.join(['?'] * len(SERVER_PLACEHOLDERS))
+    update_server_sql = f'''
+        UPDATE dedimania_records SET server = ?
+        WHERE player_login = ? AND "{recorddate_col}" = ?
+          AND (server IS NULL OR server IN ({placeholder_list}))
+          AND IFNULL(server, '') != ?
     '''
-    c.execute(sql)
+    return insert_sql, update_server_sql
+
+def record_insert_row(record, headers_row):
+    return ([record['player_login']] + [record.get(h, '') for h in headers_row] +
+            [record['record_date_only'], record['record_time_only'], record['fetch_timestamp'], record['server']] +
+            [record.get(col) for col in TYPED_COLUMNS])
+
+def server_update_row(record, recorddate_col):
+    return [record['server'], record['player_login'], record[recorddate_col]] + SERVER_PLACEHOLDERS + [record['server']]
+
+def mark_known_servers(records, existing_servers, recorddate_col):
+    """Flag records already stored ({RecordDate: server}) and reuse their server when it is a real value"""
+    for record in records:
+        key = record.get(recorddate_col)
+        record['_exists'] = key in existing_servers
+        existing_server = existing_servers.get(key)
+        if existing_server and existing_server not in SERVER_PLACEHOLDERS:
+            record['server'] = existing_server
+        else:
+            record['server'] = None if record.get('Challenge', '') else 'No Challenge'
+
+def resolve_servers(pending, data_fetcher, engine):
+    """Fill record['server'] for pending records: UUID lookups, then server lookups, both concurrent"""
+    if not pending:
+        return
+
+    # Challenge UUIDs (database first, network only for unknown challenges)
+    challenge_uuids = {}
+    missing_challenges = []
+    for challenge_name in dict.fromkeys(r['Challenge'] for r in pending):
+        uuid = data_fetcher.lookup_stored_uuid(challenge_name)
+        if uuid:
+            challenge_uuids[challenge_name] = uuid
+        else:
+            missing_challenges.append(challenge_name)
+
+    if missing_challenges:
+        print(f"🔍 Looking up {len(missing_challenges)} new challenges...")
+    for challenge_name, result in engine.map(data_fetcher.fetch_challenge_uuid_and_info, missing_challenges):
+        uuid, info = result if result else (None, None)
+        if uuid and info:
+            data_fetcher.store_challenge_info(challenge_name, info)
+        challenge_uuids[challenge_name] = uuid
+
+    # Server info per unique (login, uuid)
+    server_keys = list(dict.fromkeys(
+        (r['player_login'], challenge_uuids[r['Challenge']]) for r in pending if challenge_uuids.get(r['Challenge'])
+    ))
+    if server_keys:
+        print(f"🏢 Fetching server info for {len(server_keys)} records...")
+    servers = {key: server for key, server in engine.map(lambda key: data_fetcher.fetch_server_info(*key), server_keys)}
+
+    for record in pending:
+        uuid = challenge_uuids.get(record['Challenge'])
+        if uuid:
+            # None means Dedimania kept failing: store NULL so the next refresh retries it
+            record['server'] = servers.get((record['player_login'], uuid))
+        else:
+            record['server'] = 'No UUID'
+
+def backfill_player(conn, headers_row, login, engine, data_fetcher, start_page=0, stop_at=None,
+                    page_window=DEFAULT_PAGE_WINDOW, checkpoint=True):
+    """Walk a player's record pages from start_page until the history (or stop_at) is reached.
+
+    Pages are fetched page_window at a time and each page is written and committed as soon
+    as it is processed, so memory stays bounded by one window. With checkpoint=True progress
+    is recorded in backfill_checkpoint and an interrupted run resumes where it stopped.
+    Returns (records_inserted, finished).
+    """
+    c = conn.cursor()
+    recorddate_col = get_recorddate_column(headers_row)
+    insert_sql, update_server_sql = build_record_statements(headers_row, recorddate_col)
+    inserted = 0
+    previous_oldest = None
+    page = start_page
+
+    while True:
+        window = engine.map(lambda p: fetch_player_page(engine, login, p), range(page, page + page_window))
+        for page_number, resp in window:
+            if resp is None or resp.status_code != 200:
+                print(f"  ⚠️ Page {page_number + 1} for {login} failed, stopping here (resume later)")
+                return inserted, False
+
+            records = parse_player_rows(resp.text, headers_row, login, stop_at=stop_at)
+            dates = [r[recorddate_col] for r in records or [] if r.get(recorddate_col)]
+            if not dates:
+                return inserted, _finish_backfill(conn, login, page_number, inserted, checkpoint)
+            if previous_oldest and dates[0] >= previous_oldest:
+                # Same rows as the previous page: the offset parameter was ignored
+                print(f"  ⚠️ Dedimania returned page {page_number + 1} unchanged for {login}; "
+                      f"check PAGE_OFFSET_PARAM ('{PAGE_OFFSET_PARAM}')")
+                return inserted, _finish_backfill(conn, login, page_number, inserted, checkpoint)
+            previous_oldest = dates[-1]
+
+            # One range query tells us which of this page's rows are already stored
+            c.execute(f'''
+                SELECT "{recorddate_col}", server FROM dedimania_records
+                WHERE player_login = ? AND "{recorddate_col}" BETWEEN ? AND ?
+            ''', (login, min(dates), max(dates)))
+            mark_known_servers(records, dict(c.fetchall()), recorddate_col)
+            resolve_servers([r for r in records if r['server'] is None], data_fetcher, engine)
+
+            new_rows = [record_insert_row(r, headers_row) for r in records if not r['_exists']]
+            update_rows = [server_update_row(r, recorddate_col) for r in records if r['_exists'] and r['server'] is not None]
+            c.executemany(insert_sql, new_rows)
+            page_inserted = c.rowcount if new_rows else 0
+            if update_rows:
+                c.executemany(update_server_sql, update_rows)
+            refresh_daily_rollup(conn)
+            refresh_server_aliases(conn)
+            if new_rows or update_rows:
+                bump_data_version(conn)
+            inserted += page_inserted
+            print(f"  📥 {login} page {page_number + 1}: {len(records)} rows, {page_inserted} new")
+
+            if len(records) < PAGE_SIZE:
+                # Short page: end of history or reached stop_at
+                return inserted, _finish_backfill(conn, login, page_number + 1, inserted, checkpoint)
+            if checkpoint:
+                save_backfill_checkpoint(conn, login, page_number + 1, inserted, completed=False)
+            conn.commit()
+        page += page_window
+
+def _finish_backfill(conn, login, next_page, inserted, checkpoint):
+    if checkpoint:
+        save_backfill_checkpoint(conn, login, next_page, inserted, completed=True)
     conn.commit()
+    return True
+
+def backfill_history(conn, headers_row, logins=None, max_workers=DEFAULT_MAX_WORKERS,
+                     per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY, min_interval=DEFAULT_MIN_INTERVAL,
+                     page_window=DEFAULT_PAGE_WINDOW, restart=False):
+    """Backfill the full Dedimania history for the given logins (default: all tracked players)"""
+    logins = logins or player_logins
+    engine = FetchEngine(max_workers=max_workers, per_host_concurrency=per_host_concurrency,
+                         min_interval=min_interval)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    db_path = os.path.abspath(os.path.join(script_dir, '..', '..', 'dedimania_history_master.db'))
+    data_fetcher = ComprehensiveDataFetcher(db_path, db_connection=conn, engine=engine)
+
+    migrate(conn)
+    c = conn.cursor()
+    c.execute('SELECT player_login, next_page, records_inserted, completed FROM backfill_checkpoint')
+    checkpoints = {login: (next_page, done_count, completed) for login, next_page, done_count, completed in c.fetchall()}
+
+    total_inserted = 0
+    for login in logins:
+        next_page, done_count, completed = (0, 0, 0) if restart else checkpoints.get(login, (0, 0, 0))
+        if completed:
+            print(f"✅ {login}: backfill already complete ({done_count} records), use --restart to redo")
+            continue
+        if next_page:
+            print(f"⏩ {login}: resuming backfill at page {next_page + 1}")
+        print(f"📚 Backfilling history for {login}...")
+        inserted, finished = backfill_player(conn, headers_row, login, engine, data_fetcher,
+                                             start_page=next_page, page_window=page_window)
+        total_inserted += inserted
+        print(f"  {'✅ Finished' if finished else '⏸️ Paused'} {login}: {inserted} new records")
+
+    print(f"\n📊 BACKFILL SUMMARY: {total_inserted} records inserted for {len(logins)} players")
+    return total_inserted
+
+def fetch_and_store(conn, headers_row, max_workers=DEFAULT_MAX_WORKERS,
+                    per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY, min_interval=DEFAULT_MIN_INTERVAL,
+                    full_refresh=False, commit_every=None):
+    """Fetch all players' records and store them.
+
+    Network work runs on a bounded thread pool in three waves (player pages, challenge UUIDs,
+    server lookups); parsing and every database access stay on the calling thread.
+
+    Refreshes are incremental: a page identical to the last one fetched is skipped without
+    parsing, and parsing stops at the player's newest stored RecordDate. full_refresh
+    ignores both and re-reads every page. If a player's whole first page is new, the older
+    pages are walked until the high-water mark so no history is lost.
 
-def fetch_and_store(conn, headers_row):
+    Writes happen in a single transaction, or one per commit_every players when set.
+    """
     c = conn.cursor()
     total_records_inserted = 0
     server_fetched_count = 0
-    server_skipped_count = 0
-    
+    pages_unchanged = 0
+
+    engine = FetchEngine(max_workers=max_workers, per_host_concurrency=per_host_concurrency,
+                         min_interval=min_interval)
+
     # Initialize comprehensive data fetcher (UUIDs + server info) with shared connection
     script_dir = os.path.dirname(os.path.abspath(__file__))
     db_path = os.path.join(script_dir, '..', '..', 'dedimania_history_master.db')
     db_path = os.path.abspath(db_path)
-    data_fetcher = ComprehensiveDataFetcher(db_path, db_connection=conn)
-    
+    data_fetcher = ComprehensiveDataFetcher(db_path, db_connection=conn, engine=engine)
+
+    print(f"⚡ Fetching with {engine.max_workers} workers, {per_host_concurrency} per host, {min_interval}s spacing")
     print("🔍 Will fetch UUIDs + server info for new records (shared connection)...")
-    print("⚡ Optimization: Skipping records that already have server info")
-    
-    for login in player_logins:
-        params = {
-            "RGame": "TMU",
-            "Login": login,
-            "Show": "RECORDS",
-            "LIMIT": 100
-        }
-        print(f"Fetching Dedimania data for {login}...")
-        resp = requests.get(url, params=params, headers=headers)
+
+    recorddate_col = get_recorddate_column(headers_row)
+    migrate(conn)
+    sync_state = {} if full_refresh else load_sync_state(conn, recorddate_col)
+
+    # Wave 1: player pages
+    pages = engine.map(lambda login: fetch_player_page(engine, login), player_logins)
+
+    records_by_login = {}
+    page_state = {}  # login -> (new high-water mark, page hash)
+    for login, resp in pages:
+        if resp is None:
+            continue
         if resp.status_code != 200:
             print(f"Failed to fetch data for {login}: {resp.status_code}")
             continue
 
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        tables = soup.find_all('table', class_='tabl')
-        if len(tables) < 2:
-            print(f"No data table found for {login}!")
+        last_date, last_hash = sync_state.get(login, (None, None))
+        page_hash = hashlib.sha1(resp.content).hexdigest()
+        if page_hash == last_hash:
+            pages_unchanged += 1
+            page_state[login] = (last_date, page_hash)
             continue
 
-        data_table = tables[1]
-        rows = data_table.find_all('tr', class_='tabl')
-        if not rows:
-            print(f"No data rows found for {login}!")
+        records = parse_player_rows(resp.text, headers_row, login, stop_at=last_date)
+        if records is None:
             continue
 
-        records_for_player = 0
-        # Prepare data extraction
-        for row in rows[1:]:  # Skip header row
-            cells = row.find_all('td')
-            
-            # Apply the same filtering logic as headers
-            cell_texts = [cell.get_text(strip=True) for cell in cells]
-            
-            # Filter cells to match the header filtering logic
-            valid_cells = []
-            for i, cell_text in enumerate(cell_texts):
-                # Use the same indices that produced our valid headers
-                if i < len(cell_texts):
-                    # Skip the same problematic columns we skipped in headers
-                    if i >= 2 and i <= 14:  # This should match our valid header indices
-                        valid_cells.append(cell_text)
-            
-            if len(valid_cells) != len(headers_row):
-                print(f"  Skipping row with {len(valid_cells)} valid cells, expected {len(headers_row)}")
-                continue
-                
-            record = {headers_row[i]: valid_cells[i] for i in range(len(headers_row))}
-            record['player_login'] = login
-            record['fetch_timestamp'] = datetime.now().isoformat(timespec='seconds')
-            
-            # Check if this record already has server info
-            challenge_name = record.get('Challenge', '')
-            recorddate_col = None
-            for h in headers_row:
-                if h.lower().startswith('recorddate'):
-                    recorddate_col = h
-                    break
-            
-            # Check if record already exists and has server info
-            existing_server = None
-            if recorddate_col and record.get(recorddate_col):
-                # Build query with column name (can't use parameter for column names)
-                query = f'''
-                    SELECT server FROM dedimania_records 
-                    WHERE player_login = ? AND "{recorddate_col}" = ?
-                '''
-                c.execute(query, (login, record[recorddate_col]))
-                
-                existing_record = c.fetchone()
-                if existing_record:
-                    existing_server = existing_record[0]
-            
-            # Only fetch server info if we don't already have it
-            if existing_server and existing_server not in ['', 'No UUID', 'No Challenge', 'Unknown', 'Error']:
-                print(f"    ✅ Server already exists: {existing_server}")
-                record['server'] = existing_server
-                server_skipped_count += 1
-            elif challenge_name:
-                print(f"    🔍 Processing challenge: {challenge_name[:40]}")
-                
-                # First ensure we have UUID (this may fetch and store challenge info)
-                uuid = data_fetcher.get_challenge_uuid(challenge_name)
-                if uuid:
-                    print(f"    🆔 UUID: {uuid[:12]}...")
-                    
-                    # Now fetch server info using the UUID
-                    server = data_fetcher.get_server_for_record(login, challenge_name)
-                    record['server'] = server
-                    print(f"    🏢 Server: {server}")
-                    server_fetched_count += 1
-                else:
-                    print(f"    ❌ No UUID found for challenge")
-                    record['server'] = 'No UUID'
-                    server_fetched_count += 1
-            else:
-                record['server'] = 'No Challenge'
-                server_fetched_count += 1
-            
-            # Extract date part from RecordDate for the record_date_only column
-            recorddate_col = None
-            for h in headers_row:
-                if h.lower().startswith('recorddate'):
-                    recorddate_col = h
-                    break
-            
-            if recorddate_col and record.get(recorddate_col):
-                # Extract just the date part (assuming format like "2023-12-25 14:30:15" or "2023-12-25")
-                full_datetime = record[recorddate_col]
-                try:
-                    # Try to parse and extract date part
-                    if ' ' in full_datetime:
-                        date_part = full_datetime.split(' ')[0]  # Get date before space
-                        time_part = full_datetime.split(' ')[1] if len(full_datetime.split(' ')) > 1 else ''  # Get time after space
-                    else:
-                        date_part = full_datetime  # Already just date
-                        time_part = ''  # No time component
-                    record['record_date_only'] = date_part
-                    record['record_time_only'] = time_part
-                except:
-                    record['record_date_only'] = full_datetime  # Fallback to full value
-                    record['record_time_only'] = ''  # Empty time on error
-            else:
-                record['record_date_only'] = ''
-                record['record_time_only'] = ''
-            
-            # Build insert statement dynamically (including server column)
-            columns = ', '.join(['player_login'] + [f'"{h}"' for h in headers_row] + ['record_date_only', 'record_time_only', 'fetch_timestamp', 'server'])
-            placeholders = ', '.join(['?'] * (len(headers_row) + 5))
-            values = [record.get('player_login')] + [record.get(h, '') for h in headers_row] + [record.get('record_date_only')] + [record.get('record_time_only')] + [record.get('fetch_timestamp')] + [record.get('server')]
-            
-            try:
-                c.execute(f'INSERT OR IGNORE INTO dedimania_records ({columns}) VALUES ({placeholders})', values)
-                if c.rowcount > 0:
-                    records_for_player += 1
-                    total_records_inserted += 1
-            except Exception as e:
-                print(f"  Error inserting record for {login}: {e}")
-                print(f"  Record: {record}")
-                break
-        
+        # Everything above the high-water mark is new, so no per-row lookups are needed.
+        # A full refresh reads the player's stored servers in one query instead.
+        existing_servers = {}
+        if full_refresh:
+            c.execute(f'SELECT "{recorddate_col}", server FROM dedimania_records WHERE player_login = ?', (login,))
+            existing_servers = dict(c.fetchall())
+        mark_known_servers(records, existing_servers, recorddate_col)
+        records_by_login[login] = records
+
+        new_dates = [r[recorddate_col] for r in records if r.get(recorddate_col)]
+        page_state[login] = (max(new_dates + ([last_date] if last_date else [])) if new_dates else last_date, page_hash)
+
+    print(f"📄 {pages_unchanged} unchanged pages skipped, {sum(len(r) for r in records_by_login.values())} new records parsed")
+
+    # Stored rows whose server lookup failed before get another try in the same waves
+    retry_rows = [] if full_refresh else get_pending_server_rows(conn, recorddate_col)
+    if retry_rows:
+        print(f"🔁 Retrying server lookup for {len(retry_rows)} stored records")
+
+    # Waves 2 and 3: challenge UUIDs and server info
+    pending = [r for records in records_by_login.values() for r in records if r['server'] is None] + retry_rows
+    resolve_servers(pending, data_fetcher, engine)
+    server_fetched_count += len(pending)
+
+    # Statements are built once per refresh; rows are staged per player and written with executemany
+    insert_sql, update_server_sql = build_record_statements(headers_row, recorddate_col)
+    servers_updated = 0
+
+    # One transaction per refresh (or per commit_every players); sync state rides in the same transaction
+    players_since_commit = 0
+    for login, records in records_by_login.items():
+        new_rows = [record_insert_row(r, headers_row) for r in records if not r['_exists']]
+        update_rows = [server_update_row(r, recorddate_col) for r in records if r['_exists'] and r['server'] is not None]
+        try:
+            c.executemany(insert_sql, new_rows)
+            records_for_player = c.rowcount if new_rows else 0
+            if update_rows:
+                c.executemany(update_server_sql, update_rows)
+                servers_updated += c.rowcount
+        except sqlite3.Error as e:
+            print(f"  Error inserting records for {login}: {e}")
+            continue
         print(f"  Inserted {records_for_player} records for {login}")
-        conn.commit()
-        time.sleep(1)  # Be nice to the server
-    
+
+        last_date = sync_state.get(login, (None, None))[0]
+        if last_date and len(records) >= PAGE_SIZE:
+            # The whole first page was new: walk older pages down to the high-water mark
+            print(f"  📚 {login} set more than {PAGE_SIZE} records since the last refresh, fetching older pages...")
+            gap_inserted, finished = backfill_player(conn, headers_row, login, engine, data_fetcher,
+                                                     start_page=1, stop_at=last_date, checkpoint=False)
+            records_for_player += gap_inserted
+            if not finished:
+                continue  # Keep the old high-water mark so the next refresh tries again
+
+        total_records_inserted += records_for_player
+        # Only advance the high-water mark once every row of the page is stored
+        last_record_date, page_hash = page_state[login]
+        save_sync_state(conn, login, last_record_date, page_hash, changed=records_for_player > 0)
+
+        players_since_commit += 1
+        if commit_every and players_since_commit >= commit_every:
+            conn.commit()
+            players_since_commit = 0
+
+    # Unchanged pages just get their fetch time bumped
+    for login, (last_record_date, page_hash) in page_state.items():
+        if login not in records_by_login:
+            save_sync_state(conn, login, last_record_date, page_hash, changed=False)
+
+    retry_updates = [server_update_row(r, recorddate_col) for r in retry_rows if r['server'] is not None]
+    if retry_updates:
+        c.executemany(update_server_sql, retry_updates)
+        servers_updated += c.rowcount
+    refresh_daily_rollup(conn)  # Recomputes only the days that received new records
+    refresh_server_aliases(conn)  # track_servers itself is kept current by triggers
+    if total_records_inserted or servers_updated:
+        bump_data_version(conn)  # Invalidates the dashboard's cached results
+    conn.commit()
+
     print(f"\n📊 PROCESSING SUMMARY:")
     print(f"   Total records inserted: {total_records_inserted}")
+    print(f"   Existing records with server filled in: {servers_updated}")
     print(f"   Server info fetched: {server_fetched_count}")
-    print(f"   Server info skipped (already existed): {server_skipped_count}")
-    print(f"   Efficiency: {server_skipped_count/(server_fetched_count + server_skipped_count)*100:.1f}% records skipped" if (server_fetched_count + server_skipped_count) > 0 else "   No server processing needed")
+    print(f"   Unchanged player pages skipped: {pages_unchanged}/{len(player_logins)}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fetch Dedimania records for all tracked players into SQLite')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'Maximum concurrent requests (default: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST_CONCURRENCY,
+                        help=f'Maximum in-flight requests per host (default: {DEFAULT_PER_HOST_CONCURRENCY})')
+    parser.add_argument('--min-interval', type=float, default=DEFAULT_MIN_INTERVAL,
+                        help=f'Minimum seconds between request starts per host (default: {DEFAULT_MIN_INTERVAL})')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore high-water marks and re-read every player page')
+    parser.add_argument('--commit-every', type=int, default=None,
+                        help='Commit after this many players (default: one transaction per refresh)')
+    parser.add_argument('--backfill', metavar='LOGIN', nargs='+',
+                        help="Backfill full history page by page for these logins ('all' for every tracked player)")
+    parser.add_argument('--page-window', type=int, default=DEFAULT_PAGE_WINDOW,
+                        help=f'Pages fetched concurrently during a backfill (default: {DEFAULT_PAGE_WINDOW})')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore backfill checkpoints and start from the newest page again')
+    args = parser.parse_args()
+
     headers_row = get_all_headers()
     # Use absolute path to ensure consistent database location regardless of where script is run
-    import os
     script_dir = os.path.dirname(os.path.abspath(__file__))
     db_path = os.path.join(script_dir, '..', '..', 'dedimania_history_master.db')
     db_path = os.path.abspath(db_path)
     print(f"Connecting to database: {db_path}")
     conn = sqlite3.connect(db_path)
-    
+
     # Count existing records before fetching
     c = conn.cursor()
     try:
@@ -568,20 +805,28 @@ if __name__ == '__main__':
     except sqlite3.OperationalError:
         # Table doesn't exist yet
         records_before = 0
-    
+
     create_table_if_needed(conn, headers_row)
-    fetch_and_store(conn, headers_row)
-    
+    if args.backfill:
+        logins = player_logins if 'all' in args.backfill else args.backfill
+        backfill_history(conn, headers_row, logins, max_workers=args.workers,
+                         per_host_concurrency=args.per_host, min_interval=args.min_interval,
+                         page_window=args.page_window, restart=args.restart)
+    else:
+        fetch_and_store(conn, headers_row, max_workers=args.workers,
+                        per_host_concurrency=args.per_host, min_interval=args.min_interval,
+                        full_refresh=args.full, commit_every=args.commit_every)
+
     # Count total records after fetching
     c.execute("SELECT COUNT(*) FROM dedimania_records")
     records_after = c.fetchone()[0]
-    
+
     new_records = records_after - records_before
-    
+
     print(f"\n📊 Summary:")
     print(f"Records before: {records_before}")
     print(f"Records after: {records_after}")
     print(f"New records added: {new_records}")
-    
+
     conn.close()
-    print("Done! All data saved with all fields.")
\ No newline at end of file
+    print("Done! All data saved with all fields.")
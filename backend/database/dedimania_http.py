@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Dedimania HTTP Client
+Shared rate limiting and retry layer for every Dedimania scraper.
+
+Requests are paced by a token bucket per endpoint (the ``Show=`` parameter) instead of
+fixed sleeps. Buckets start at a conservative rate, creep up while Dedimania answers
+normally and back off when it starts throttling. Every endpoint bucket also draws from
+one fixed host-wide bucket (HOST_BUDGET), so together they never send Dedimania more
+requests per second than the old sequential fetch loop did. Timeouts, connection errors, 429 and
+5xx responses are retried with exponential backoff and full jitter; if every attempt
+fails a TransientFetchError is raised so callers can leave the value empty and try
+again next run instead of storing a permanent "Error".
+
+Responses go through the persistent http_cache, so fresh pages are served from disk and
+stale ones are revalidated. Set DEDIMANIA_HTTP_CACHE=off to disable it.
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from http_cache import ResponseCache
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Per-endpoint budgets: (starting requests/second, burst size, ceiling requests/second)
+ENDPOINT_BUDGETS = {
+    'RECORDS': (4.0, 4, 10.0),   # player record pages and challenge record lists
+    'MAPS': (1.0, 2, 4.0),       # challenge search (POST), the heaviest page
+    'RECORD': (8.0, 8, 20.0),    # single record detail used for server lookups
+    None: (2.0, 2, 5.0),         # anything else
+}
+
+# Host-wide budget shared by all endpoints: (requests/second, burst size). The old fetch
+# loop made one request at a time and paused 0.1 s after each server lookup, so with
+# Dedimania's ~0.1 s best-case response time it never exceeded about 5 requests/second.
+HOST_BUDGET = (5.0, 1)
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_TIMEOUT = 15
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TransientFetchError(Exception):
+    """Raised when a request still fails after all retries"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket with additive-increase / multiplicative-decrease rate.
+
+    With a parent bucket, every token taken here also takes one from the parent.
+    """
+
+    def __init__(self, rate, capacity, max_rate=None, min_rate=0.2, parent=None):
+        self.rate = rate
+        self.parent = parent
+        self.capacity = capacity
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+        if self.parent is not None:
+            self.parent.acquire()
+
+    def reward(self):
+        """Successful response: nudge the rate up towards the ceiling"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.05)
+
+    def penalize(self):
+        """Throttled or failing response: halve the rate and drop the burst"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+
+def endpoint_for(url, params=None, data=None):
+    """Return the Show= value of a request, looking at params, form data and the query string"""
+    for source in (params, data):
+        if isinstance(source, dict) and source.get('Show'):
+            return str(source['Show']).upper()
+    show = parse_qs(urlparse(url).query).get('Show')
+    return show[0].upper() if show else None
+
+
+class DedimaniaClient:
+    """Rate-limited, retrying HTTP client shared by all Dedimania scrapers"""
+
+    def __init__(self, budgets=None, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_cap=DEFAULT_BACKOFF_CAP, timeout=DEFAULT_TIMEOUT, cache=None, host_budget=HOST_BUDGET):
+        budgets = budgets or ENDPOINT_BUDGETS
+        host_rate, host_burst = host_budget
+        # Fixed rate: the endpoint buckets adapt below it, the host cap itself never grows
+        self.host_bucket = TokenBucket(host_rate, host_burst)
+        self.buckets = {endpoint: TokenBucket(rate, burst, max_rate, parent=self.host_bucket)
+                        for endpoint, (rate, burst, max_rate) in budgets.items()}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.cache = cache
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """requests.Session is not thread-safe, so every thread gets its own"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': USER_AGENT})
+            self._local.session = session
+        return session
+
+    def _bucket(self, endpoint):
+        return self.buckets.get(endpoint) or self.buckets[None]
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, cache_ttl=None, **kwargs):
+        """Perform a request through the cache, retrying transient failures.
+
+        cache_ttl overrides the endpoint's freshness window (0 forces revalidation).
+        Raises TransientFetchError when retries are exhausted.
+        """
+        if not self.cache:
+            return self._fetch(method, url, **kwargs)
+
+        key, normalized, form, endpoint = self.cache.key_for(method, url, kwargs.get('params'), kwargs.get('data'))
+        entry = self.cache.get(key)
+        if entry and entry.is_fresh(cache_ttl):
+            return entry.to_response()
+
+        if entry:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **entry.validators())
+        response = self._fetch(method, url, **kwargs)
+        if response.status_code == 304 and entry:
+            self.cache.touch(key)
+            return entry.to_response()
+        if response.status_code == 200:
+            self.cache.put(key, normalized, form, endpoint, response)
+        return response
+
+    def _fetch(self, method, url, **kwargs):
+        """Network request with token-bucket pacing and retries"""
+        kwargs.setdefault('timeout', self.timeout)
+        bucket = self._bucket(endpoint_for(url, kwargs.get('params'), kwargs.get('data')))
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    bucket.reward()
+                    return response
+                last_error = requests.HTTPError(f"{response.status_code} from {urlparse(url).netloc}", response=response)
+
+            bucket.penalize()
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt)
+                retry_after = getattr(last_error, 'response', None) is not None and last_error.response.headers.get('Retry-After')
+                if retry_after and str(retry_after).isdigit():
+                    delay = max(delay, int(retry_after))
+                print(f"    ⏳ Retry {attempt + 1}/{self.max_retries} in {delay:.1f}s ({last_error})")
+                time.sleep(delay)
+
+        raise TransientFetchError(f"{method} {url} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client so every scraper shares the same endpoint budgets"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            cache = None if os.environ.get('DEDIMANIA_HTTP_CACHE', '').lower() in ('0', 'off', 'false') else ResponseCache()
+            _shared_client = DedimaniaClient(cache=cache)
+        return _shared_client
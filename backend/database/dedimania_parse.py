@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Dedimania HTML Parsing
+Pluggable parser layer for Dedimania stats pages.
+
+Scrapers ask for exactly what they need (the rows of a records table, the "Account"
+cell of a record page, challenge links) instead of walking a full BeautifulSoup tree.
+The fastest installed backend is used: selectolax (lexbor), then lxml, then
+BeautifulSoup as the always-available fallback. Set DEDIMANIA_PARSER to force one.
+
+Cell text matches BeautifulSoup's get_text(strip=True): every text node is stripped
+and the pieces are joined without a separator.
+
+A backend implements the abstract primitives of BaseParser (parse, element lookup, cell
+text, links); the extraction walks are shared, so every backend returns what the
+BeautifulSoup reference does.
+"""
+
+import os
+from abc import ABC, abstractmethod
+
+DATA_ROW_COLORS = ('#FFFFFF', '#F0F0F0')
+_SEP = '\x1f'
+
+
+def _to_text(html):
+    """Decode page bytes once (UTF-8, falling back to Latin-1 like the site's older pages)"""
+    if isinstance(html, bytes):
+        try:
+            return html.decode('utf-8')
+        except UnicodeDecodeError:
+            return html.decode('latin-1')
+    return html
+
+
+def _join_stripped(pieces):
+    return ''.join(piece.strip() for piece in pieces)
+
+
+def _is_server_name(value):
+    return (value and value.lower() not in ['account', '', '-', '&nbsp;'] and
+            not value.startswith('&nbsp;') and len(value) > 1)
+
+
+class BaseParser(ABC):
+    """Backend-independent extraction built on a few primitive methods"""
+
+    name = 'base'
+
+    @abstractmethod
+    def parse(self, html):
+        """Document tree of a page (bytes or text)"""
+
+    @abstractmethod
+    def _text(self, node):
+        """Text of an element, as BeautifulSoup's get_text(strip=True)"""
+
+    @abstractmethod
+    def _find_all(self, node, tags):
+        """Descendant elements of node with one of tags, in document order"""
+
+    @abstractmethod
+    def _tables(self, doc):
+        """All table.tabl elements in document order"""
+
+    @abstractmethod
+    def _rows(self, table):
+        """[(bgcolor, [cell text, ...]), ...] for every tr.tabl of a table"""
+
+    @abstractmethod
+    def uid_links(self, html):
+        """[(href, text)] of links whose href carries a challenge Uid"""
+
+    def table_rows(self, html, table_index=1):
+        """Cell texts of every tr.tabl row of the table_index-th table.tabl (None if missing)"""
+        tables = self._tables(self.parse(html))
+        if len(tables) <= table_index:
+            return None
+        return [cells for _, cells in self._rows(tables[table_index])]
+
+    def tabl_row_counts(self, html):
+        """Number of tr.tabl rows in each table.tabl"""
+        return [len(self._rows(table)) for table in self._tables(self.parse(html))]
+
+    def data_rows(self, html, min_cells=11):
+        """Record rows (striped background, enough cells) of the first table.tabl that has any"""
+        for table in self._tables(self.parse(html)):
+            rows = [cells for bgcolor, cells in self._rows(table)
+                    if len(cells) >= min_cells and bgcolor in DATA_ROW_COLORS]
+            if rows:
+                return rows
+        return []
+
+    def _account_column(self, rows):
+        """(row index, column index) of the first "Account" cell among rows, or None"""
+        for row_idx, row in enumerate(rows):
+            for col_idx, cell in enumerate(self._find_all(row, ('td', 'th'))):
+                if self._text(cell) == 'Account':
+                    return row_idx, col_idx
+        return None
+
+    def account_name(self, html):
+        """Server account shown on a single record page, or None.
+
+        Every table (nested ones too) is searched for an "Account" cell; the first server
+        name below it in the same column wins, otherwise the next table is tried.
+        """
+        doc = self.parse(html)
+        for table in self._find_all(doc, ('table',)):
+            rows = self._find_all(table, ('tr',))
+            if len(rows) < 2:
+                continue
+            header = self._account_column(rows)
+            if header is None:
+                continue
+            header_row, col_index = header
+            for data_row in rows[header_row + 1:]:
+                data_cells = self._find_all(data_row, ('td', 'th'))
+                if col_index < len(data_cells):
+                    value = self._text(data_cells[col_index])
+                    if _is_server_name(value):
+                        return value
+        return None
+
+
+class SelectolaxParser(BaseParser):
+    name = 'selectolax'
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as HTMLParser
+        except ImportError:
+            from selectolax.parser import HTMLParser
+        self._parser_cls = HTMLParser
+
+    def parse(self, html):
+        return self._parser_cls(_to_text(html))
+
+    @staticmethod
+    def _text(node):
+        return _join_stripped(node.text(deep=True, separator=_SEP, strip=False).split(_SEP))
+
+    def _tables(self, doc):
+        return doc.css('table.tabl')
+
+    def _rows(self, table):
+        return [(row.attributes.get('bgcolor'), [self._text(td) for td in row.css('td')])
+                for row in table.css('tr.tabl')]
+
+    def _find_all(self, node, tags):
+        if isinstance(node, self._parser_cls):
+            node = node.root
+        # css() would also match node itself
+        return [child for child in node.traverse() if child.tag in tags and child.mem_id != node.mem_id]
+
+    def uid_links(self, html):
+        return [(a.attributes.get('href') or '', a.text(deep=True, separator='', strip=False).strip())
+                for a in self.parse(html).css('a[href*="Uid="]')]
+
+
+class LxmlParser(BaseParser):
+    name = 'lxml'
+
+    _TABL = 'contains(concat(" ", normalize-space(@class), " "), " tabl ")'
+
+    def __init__(self):
+        import lxml.html
+        self._lxml_html = lxml.html
+
+    def parse(self, html):
+        return self._lxml_html.document_fromstring(_to_text(html))
+
+    @staticmethod
+    def _text(node):
+        return _join_stripped(node.itertext())
+
+    def _tables(self, doc):
+        return doc.xpath(f'//table[{self._TABL}]')
+
+    def _rows(self, table):
+        return [(row.get('bgcolor'), [self._text(td) for td in row.iter('td')])
+                for row in table.xpath(f'.//tr[{self._TABL}]')]
+
+    def _find_all(self, node, tags):
+        return list(node.iterdescendants(*tags))
+
+    def uid_links(self, html):
+        return [(a.get('href') or '', ''.join(a.itertext()).strip())
+                for a in self.parse(html).xpath('//a[contains(@href, "Uid=")]')]
+
+
+class SoupParser(BaseParser):
+    """Reference implementation: the original BeautifulSoup walks"""
+
+    name = 'beautifulsoup'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup_cls = BeautifulSoup
+
+    def parse(self, html):
+        return self._soup_cls(html, 'html.parser')
+
+    def _text(self, node):
+        return node.get_text(strip=True)
+
+    def _find_all(self, node, tags):
+        return node.find_all(list(tags))
+
+    def _tables(self, doc):
+        return doc.find_all('table', class_='tabl')
+
+    def _rows(self, table):
+        return [(row.get('bgcolor'), [td.get_text(strip=True) for td in row.find_all('td')])
+                for row in table.find_all('tr', class_='tabl')]
+
+    def uid_links(self, html):
+        return [(a.get('href', ''), a.get_text().strip())
+                for a in self.parse(html).find_all('a', href=True) if 'Uid=' in a.get('href', '')]
+
+    def account_name(self, html):
+        # Kept as the original walk: the shared BaseParser.account_name is checked against it
+        soup = self.parse(html)
+        for table in soup.find_all('table'):
+            rows = table.find_all('tr')
+            if len(rows) < 2:
+                continue
+
+            # Find the Account column
+            account_col_index = -1
+            header_row = None
+            for row_idx, row in enumerate(rows):
+                cells = row.find_all(['td', 'th'])
+                for col_idx, cell in enumerate(cells):
+                    if cell.get_text(strip=True) == 'Account':
+                        account_col_index = col_idx
+                        header_row = row_idx
+                        break
+                if account_col_index >= 0:
+                    break
+
+            # Extract server name from data rows
+            if account_col_index >= 0 and header_row is not None:
+                for data_row in rows[header_row + 1:]:
+                    data_cells = data_row.find_all(['td', 'th'])
+                    if account_col_index < len(data_cells):
+                        server_name = data_cells[account_col_index].get_text(strip=True)
+                        if _is_server_name(server_name):
+                            return server_name
+        return None
+
+
+BACKENDS = {
+    'selectolax': SelectolaxParser,
+    'lxml': LxmlParser,
+    'beautifulsoup': SoupParser,
+}
+
+
+def available_backends():
+    """Names of the backends whose libraries are installed, fastest first"""
+    names = []
+    for name, cls in BACKENDS.items():
+        try:
+            cls()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_parser(name=None):
+    """Return the requested backend, or the fastest installed one"""
+    name = name or os.environ.get('DEDIMANIA_PARSER')
+    if name:
+        return BACKENDS[name]()
+    for cls in BACKENDS.values():
+        try:
+            return cls()
+        except ImportError:
+            continue
+    raise ImportError("No HTML parser available (install beautifulsoup4)")
+
+
+parser = get_parser()
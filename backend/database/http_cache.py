@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP Response Cache
+SQLite-backed cache for Dedimania pages, shared by every scraper and every run.
+
+Entries are keyed by method + normalized URL (sorted query params) + sorted form data.
+Each endpoint type has its own freshness window; stale entries are revalidated with
+If-None-Match / If-Modified-Since when the server sent an ETag or Last-Modified, and the
+cache is kept under a size limit by evicting the least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Freshness per endpoint type, in seconds. 0 = always revalidate (the copy is only used for 304s)
+ENDPOINT_TTLS = {
+    'player_records': 0,          # Show=RECORDS&Login=... changes whenever the player drives
+    'challenge_records': 6 * HOUR,  # Show=RECORDS&Uid=... record list / total_records of a track
+    'maps': DAY,                  # Show=MAPS challenge search
+    'record': 30 * DAY,           # Show=RECORD single record detail (server account)
+    None: 0,
+}
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'dedimania_http_cache.db'))
+
+
+def normalize_request(method, url, params=None, data=None):
+    """Return (normalized url, form string): lower-cased host, query merged with params and sorted"""
+    parts = urlparse(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in (params.items() if isinstance(params, dict) else params)]
+    normalized = urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', '',
+                             urlencode(sorted(query)), ''))
+    form = urlencode(sorted((k, str(v)) for k, v in data.items())) if isinstance(data, dict) else (data or '')
+    return normalized, form
+
+
+def endpoint_type(normalized_url, form=''):
+    """Classify a request by its Show= value (and Login/Uid for record lists)"""
+    fields = dict(parse_qsl(urlparse(normalized_url).query))
+    fields.update(parse_qsl(form))
+    show = fields.get('Show', '').upper()
+    if show == 'RECORDS':
+        return 'player_records' if fields.get('Login') else 'challenge_records'
+    if show == 'MAPS':
+        return 'maps'
+    if show == 'RECORD':
+        return 'record'
+    return None
+
+
+class CachedEntry:
+    def __init__(self, key, url, status, headers, content, etag, last_modified, fetched_at, ttl):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    def is_fresh(self, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        return ttl > 0 and time.time() - self.fetched_at < ttl
+
+    def validators(self):
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self):
+        """Rebuild a requests.Response so callers can't tell a cache hit from a download"""
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = self.content
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = self.url
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """Thread-safe persistent response cache with per-endpoint TTLs and LRU size bound"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(ENDPOINT_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                cache_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                form TEXT,
+                endpoint TEXT,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                content BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_accessed ON http_cache(accessed_at)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+
+    def key_for(self, method, url, params=None, data=None):
+        """Return (cache key, normalized url, form, endpoint type)"""
+        normalized, form = normalize_request(method, url, params, data)
+        key = hashlib.sha1(f"{method.upper()} {normalized} {form}".encode('utf-8')).hexdigest()
+        return key, normalized, form, endpoint_type(normalized, form)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('''
+                SELECT url, endpoint, status, headers, content, etag, last_modified, fetched_at
+                FROM http_cache WHERE cache_key = ?
+            ''', (key,)).fetchone()
+            if not row:
+                return None
+            self._conn.execute('UPDATE http_cache SET accessed_at = ? WHERE cache_key = ?', (time.time(), key))
+            self._conn.commit()
+        url, endpoint, status, headers, content, etag, last_modified, fetched_at = row
+        return CachedEntry(key, url, status, json.loads(headers or '{}'), content, etag, last_modified,
+                           fetched_at, self.ttls.get(endpoint, 0))
+
+    def put(self, key, normalized_url, form, endpoint, response):
+        """Store a successful response"""
+        content = response.content
+        headers = dict(response.headers)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM http_cache WHERE cache_key = ?', (key,)).fetchone()
+            self._conn.execute('''
+                INSERT OR REPLACE INTO http_cache
+                (cache_key, url, form, endpoint, status, headers, content, etag, last_modified,
+                 fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, normalized_url, form, endpoint, response.status_code, json.dumps(headers), content,
+                  headers.get('ETag'), headers.get('Last-Modified'), now, now, len(content)))
+            self._total_bytes += len(content) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def touch(self, key):
+        """A 304 revalidation: the stored copy is current again"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE http_cache SET fetched_at = ?, accessed_at = ? WHERE cache_key = ?',
+                               (now, now, key))
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its limit"""
+        target = self.max_bytes * 0.9
+        while self._total_bytes > target:
+            victims = self._conn.execute(
+                'SELECT cache_key, size FROM http_cache ORDER BY accessed_at LIMIT 100').fetchall()
+            if not victims:
+                self._total_bytes = 0
+                break
+            self._conn.executemany('DELETE FROM http_cache WHERE cache_key = ?', [(k,) for k, _ in victims])
+            self._total_bytes -= sum(size for _, size in victims)
+
+    def clear(self, endpoint=None):
+        with self._lock:
+            if endpoint:
+                self._conn.execute('DELETE FROM http_cache WHERE endpoint = ?', (endpoint,))
+            else:
+                self._conn.execute('DELETE FROM http_cache')
+            self._conn.commit()
+            self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+
+    def stats(self):
+        """{endpoint: (entries, bytes)}"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT endpoint, COUNT(*), SUM(size) FROM http_cache GROUP BY endpoint').fetchall()
+        return {endpoint: (count, size) for endpoint, count, size in rows}
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations
+Versioned, ordered migrations for dedimania_history_master.db.
+
+The applied version is kept in SQLite's PRAGMA user_version. migrate() runs every
+migration above it, each one in its own transaction together with the version bump, so
+a failing migration leaves the database at the previous version. The first migrations
+are written to be safe on databases created by the older ad hoc CREATE TABLE code.
+
+Add a migration by appending a (version, description, function) entry to MIGRATIONS;
+the function receives the connection and must not commit.
+
+    python migrations.py            # migrate the default database
+    python migrations.py --status   # show the current and latest version
+"""
+
+import argparse
+import os
+import sqlite3
+
+from schema import TYPED_COLUMN_DEFS, INDEXES, fill_typed_columns
+from rollup import create_rollup_table, rebuild_daily_rollup
+from servers import create_server_tables, rebuild_track_servers, refresh_server_aliases
+from players import create_profile_table, rebuild_player_profile
+
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'dedimania_history_master.db'))
+
+# Dedimania's record columns as scraped from the player records page
+DEDIMANIA_COLUMNS = ['Game', 'Login', 'NickName', 'Rank', 'Max', 'Record', 'Mode', 'CPs', 'MapCPs',
+                     'Challenge', 'Envir', 'RecordDate', '#']
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def add_missing_columns(conn, table, columns):
+    """ALTER TABLE ADD COLUMN for every (name, type) not already present; returns the added names"""
+    existing = set(table_columns(conn, table))
+    added = []
+    for name, col_type in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN "{name}" {col_type}')
+            added.append(name)
+    return added
+
+
+def _001_base_tables(conn):
+    columns = ',\n'.join(f'"{h}" TEXT' for h in DEDIMANIA_COLUMNS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS dedimania_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_login TEXT,
+            {columns},
+            record_date_only TEXT,
+            record_time_only TEXT,
+            fetch_timestamp TEXT,
+            server TEXT,
+            UNIQUE(player_login, "RecordDate")
+        )
+    ''')
+    # Databases created before server lookups existed
+    add_missing_columns(conn, 'dedimania_records', [('server', 'TEXT')])
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS challenge_info (
+            challenge_name TEXT PRIMARY KEY,
+            challenge_uuid TEXT,
+            environment TEXT,
+            mood TEXT,
+            difficulty TEXT,
+            total_records INTEGER,
+            world_record TEXT,
+            world_record_holder TEXT,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_challenge_uuid ON challenge_info(challenge_uuid)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_challenge_updated ON challenge_info(last_updated)')
+
+
+def _002_typed_columns(conn):
+    added = add_missing_columns(conn, 'dedimania_records', TYPED_COLUMN_DEFS)
+    if added:
+        fill_typed_columns(conn)
+    for name, target in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+
+def _003_sync_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_sync_state (
+            player_login TEXT PRIMARY KEY,
+            last_record_date TEXT,
+            page_hash TEXT,
+            last_fetched TEXT,
+            last_changed TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_checkpoint (
+            player_login TEXT PRIMARY KEY,
+            next_page INTEGER NOT NULL DEFAULT 0,
+            records_inserted INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    ''')
+
+
+def _004_store_meta(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS store_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def _005_daily_rollup(conn):
+    create_rollup_table(conn)
+    rebuild_daily_rollup(conn)
+
+
+def _006_weekly_standings(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS weekly_standings (
+            week_start TEXT NOT NULL,
+            player_login TEXT NOT NULL,
+            nickname TEXT,
+            position INTEGER NOT NULL,
+            points REAL NOT NULL,
+            top1 INTEGER NOT NULL,
+            top3 INTEGER NOT NULL,
+            top5 INTEGER NOT NULL,
+            total_records INTEGER NOT NULL,
+            avg_rank REAL,
+            PRIMARY KEY (week_start, player_login)
+        )
+    ''')
+    # One row per computed week: what it was computed from, so only changed weeks are redone
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS standings_weeks (
+            week_start TEXT PRIMARY KEY,
+            roster_hash TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            content_signature TEXT,
+            computed_at TEXT
+        )
+    ''')
+
+
+def _007_server_dimension(conn):
+    create_server_tables(conn)
+    rebuild_track_servers(conn)
+    refresh_server_aliases(conn)
+
+
+def _008_player_profile(conn):
+    create_profile_table(conn)
+    rebuild_player_profile(conn)
+
+
+MIGRATIONS = [
+    (1, 'records and challenge_info tables', _001_base_tables),
+    (2, 'typed record columns and read indexes', _002_typed_columns),
+    (3, 'incremental sync and backfill state', _003_sync_tables),
+    (4, 'data version marker for read caches', _004_store_meta),
+    (5, 'daily per-player rollup for dashboard metrics', _005_daily_rollup),
+    (6, 'weekly leaderboard standings history', _006_weekly_standings),
+    (7, 'server dimension and track/server index', _007_server_dimension),
+    (8, 'latest nickname per player', _008_player_profile),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, verbose=False):
+    """Bring the database up to LATEST_VERSION. Cheap when it already is."""
+    # WAL lets the dashboard's read-only connections read while a fetch is writing (persistent)
+    if not conn.in_transaction:
+        conn.execute('PRAGMA journal_mode=WAL')
+    if get_version(conn) >= LATEST_VERSION:
+        return LATEST_VERSION
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, apply in MIGRATIONS:
+        # IMMEDIATE takes the write lock up front, so two processes starting together
+        # can't both apply the same migration; the version is re-read under the lock
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_version(conn) >= version:
+                conn.rollback()
+                continue
+            if verbose:
+                print(f"🔧 Migration {version}: {description}")
+            apply(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return get_version(conn)
+
+
+def migrate_path(db_path=DEFAULT_DB_PATH, verbose=False):
+    conn = sqlite3.connect(db_path)
+    try:
+        return migrate(conn, verbose=verbose)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply schema migrations to the Dedimania database')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Database path')
+    parser.add_argument('--status', action='store_true', help='Only show the schema version')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    current = get_version(conn)
+    if args.status:
+        print(f"📋 Schema version {current} (latest {LATEST_VERSION})")
+    elif current >= LATEST_VERSION:
+        print(f"✅ Schema is up to date (version {current})")
+    else:
+        print(f"🚀 Migrating {args.db} from version {current} to {LATEST_VERSION}")
+        migrate(conn, verbose=True)
+        print(f"✅ Schema is at version {get_version(conn)}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Player Profile
+The latest nickname of every player login, kept in player_profile.
+
+    player_profile  one row per player_login: the NickName of its most recent record
+                    with a non-empty nickname, and that record's RecordDate
+
+An AFTER INSERT trigger on dedimania_records keeps the table current in the writing
+transaction, so "latest nickname" is a primary-key lookup or a join instead of an
+ORDER BY RecordDate DESC LIMIT 1 query per login. The table is created and filled by
+migration 8.
+"""
+
+# Upsert of one (login, nickname, date) that only replaces an older nickname
+_UPSERT_CONFLICT = '''
+    ON CONFLICT(player_login) DO UPDATE SET
+        nickname = excluded.nickname,
+        nickname_date = excluded.nickname_date
+    WHERE player_profile.nickname_date IS NULL OR excluded.nickname_date >= player_profile.nickname_date
+'''
+
+PROFILE_TRIGGER = f'''
+    AFTER INSERT ON dedimania_records
+    WHEN NEW.player_login IS NOT NULL AND NEW.NickName IS NOT NULL AND NEW.NickName != ''
+    BEGIN
+        INSERT INTO player_profile (player_login, nickname, nickname_date)
+        VALUES (NEW.player_login, NEW.NickName, NEW."RecordDate")
+        {_UPSERT_CONFLICT};
+    END
+'''
+
+
+def create_profile_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_profile (
+            player_login TEXT PRIMARY KEY,
+            nickname TEXT NOT NULL,
+            nickname_date TEXT
+        )
+    ''')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS trg_player_profile_insert {PROFILE_TRIGGER}')
+
+
+def rebuild_player_profile(conn):
+    """Recompute player_profile from dedimania_records (does not commit)"""
+    conn.execute('DELETE FROM player_profile')
+    conn.execute('''
+        INSERT INTO player_profile (player_login, nickname, nickname_date)
+        SELECT player_login, NickName, "RecordDate"
+        FROM (
+            SELECT player_login, NickName, "RecordDate",
+                   ROW_NUMBER() OVER (PARTITION BY player_login ORDER BY "RecordDate" DESC) AS rn
+            FROM dedimania_records
+            WHERE player_login IS NOT NULL AND NickName IS NOT NULL AND NickName != ''
+        )
+        WHERE rn = 1
+    ''')
+
+
+def latest_nicknames(conn, logins=None):
+    """{login: latest nickname}, for every known player or only the given logins"""
+    if logins is None:
+        return dict(conn.execute('SELECT player_login, nickname FROM player_profile'))
+    logins = list(logins)
+    if not logins:
+        return {}
+    return dict(conn.execute(f'''
+        SELECT player_login, nickname FROM player_profile
+        WHERE player_login IN ({', '.join(['?'] * len(logins))})
+    ''', logins))
@@ -5,14 +5,17 @@ Automatically discovers new challenges and populates challenge_info table with m
 """
 
 import sqlite3
-import requests
 from bs4 import BeautifulSoup
 import re
 from datetime import datetime
-import time
 import sys
 from urllib.parse import urljoin, quote, quote_plus
 
+from dedimania_http import get_client
+from dedimania_parse import parser as html_parser
+from migrations import migrate_path
+from data_version import bump_data_version
+
 class ChallengeInfoPopulator:
     def __init__(self, db_path=None):
         if db_path is None:
@@ -23,10 +26,8 @@ class ChallengeInfoPopulator:
             db_path = os.path.abspath(db_path)
         self.db_path = db_path
         self.base_url = "http://dedimania.net/tmstats/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.client = get_client()  # Shared rate limiter + retries
+        migrate_path(self.db_path)
     
     def get_new_challenges(self):
         """Get challenges from dedimania_records that aren't in challenge_info"""
@@ -69,19 +70,11 @@ class ChallengeInfoPopulator:
                 'Show': 'MAPS'  # Search for challenges/maps
             }
             
-            response = self.session.post(search_url, data=search_data, timeout=10)
+            response = self.client.post(search_url, data=search_data, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Look for challenge links with UUIDs in the results
-            # Find all links that might contain challenge UUIDs
-            all_links = soup.find_all('a', href=True)
-            
-            for link in all_links:
-                href = link.get('href', '')
-                text = link.get_text().strip()
-                
+            for href, text in html_parser.uid_links(response.content):
                 # Check if this link contains our challenge name and has a Uid parameter
                 # Try matching with both original and clean names
                 original_match = (challenge_name.lower() in text.lower() or 
@@ -107,16 +100,10 @@ class ChallengeInfoPopulator:
             short_name = ' '.join(clean_challenge_name.split()[:3])  # First 3 words
             search_data['Challenge'] = short_name
             
-            response = self.session.post(search_url, data=search_data, timeout=10)
+            response = self.client.post(search_url, data=search_data, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            all_links = soup.find_all('a', href=True)
-            
-            for link in all_links:
-                href = link.get('href', '')
-                text = link.get_text().strip()
-                
+            for href, text in html_parser.uid_links(response.content):
                 if ('Uid=' in href and 
                     (short_name.lower() in text.lower() or 
                      self._names_similar(clean_challenge_name, text, threshold=0.6))):
@@ -135,7 +122,7 @@ class ChallengeInfoPopulator:
                 'Show': 'RECORDS'
             }
             
-            response = self.session.post(search_url, data=search_data, timeout=10)
+            response = self.client.post(search_url, data=search_data, timeout=10)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -195,7 +182,7 @@ class ChallengeInfoPopulator:
             stats_url = f"{self.base_url}?do=stat&RGame=TMU&Uid={challenge_uuid}&Show=RECORDS"
             print(f"🔗 Requesting URL: {stats_url}")
             
-            response = self.session.get(stats_url, timeout=15)
+            response = self.client.get(stats_url, timeout=15)
             response.raise_for_status()
             
             print(f"📄 Response status: {response.status_code}")
@@ -384,6 +371,7 @@ class ChallengeInfoPopulator:
                 info['total_records'],
                 datetime.now()
             ))
+            bump_data_version(conn)
             
             conn.commit()
             print(f"✅ Saved info for: {info['challenge_name']}")
@@ -440,9 +428,6 @@ class ChallengeInfoPopulator:
                 successful += 1
             else:
                 failed += 1
-            
-            # Be respectful to the server
-            time.sleep(2)
         
         print(f"\n🏁 Processing Complete!")
         print(f"✅ Successfully processed: {successful}")
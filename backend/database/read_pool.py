@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Read-Only Connection Pool
+Pooled, read-only SQLite connections for the dashboard and other readers.
+
+Connections are opened once with mode=ro and query_only, a large page cache and
+memory-mapped I/O, then handed out to whichever thread needs one. With the database in
+WAL mode (set by migrations) readers never block the fetcher and vice versa.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = 4
+CACHE_SIZE_KB = 64 * 1024           # page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024       # bytes of the file mapped into memory
+
+
+def open_read_only(db_path):
+    """A tuned read-only connection, usable from any thread"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, check_same_thread=False)
+    conn.execute('PRAGMA query_only = ON')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+class ReadOnlyPool:
+    """Fixed-size pool of read-only connections, opened lazily"""
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                return open_read_only(self.db_path)
+        return self._idle.get()
+
+    def query(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def read_df(self, sql, params=()):
+        import pandas as pd
+        with self.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._opened = 0
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Daily Rollup
+Per-day aggregates of dedimania_records for the dashboard metrics.
+
+daily_player_rollup holds one row per (day, player_login, nickname, envir) with the
+record, world record, top 3 and top 5 counts, the number of distinct tracks and the
+latest fetch_timestamp. Totals over a date range, the players list and the records
+timeline are answered from it with a scan of a few rows per day instead of the whole
+records table. unique_tracks is per day; distinct tracks over a longer range still have
+to be counted on dedimania_records.
+
+The table is created and filled by migration 5. Writers call refresh_daily_rollup()
+in the transaction that inserted records: it recomputes only the days of rows added
+since the last refresh (tracked by id in store_meta), so it is cheap and idempotent.
+"""
+
+from schema import day_bounds
+
+ROLLUP_LAST_ID_KEY = 'rollup_last_id'
+
+# Rows without a usable RecordDate are rolled up under day ''
+DAY_EXPR = '''COALESCE(SUBSTR("RecordDate", 1, 10), '')'''
+
+ROLLUP_SELECT = f'''
+    SELECT {DAY_EXPR},
+           COALESCE(player_login, ''),
+           COALESCE(NickName, ''),
+           COALESCE(Envir, ''),
+           COUNT(*),
+           COALESCE(SUM(rank_int = 1), 0),
+           COALESCE(SUM(rank_int <= 3), 0),
+           COALESCE(SUM(rank_int <= 5), 0),
+           COUNT(DISTINCT Challenge),
+           MAX(fetch_timestamp)
+    FROM dedimania_records
+'''
+
+ROLLUP_GROUP_BY = f'''GROUP BY {DAY_EXPR}, COALESCE(player_login, ''), COALESCE(NickName, ''), COALESCE(Envir, '')'''
+
+ROLLUP_INSERT = '''
+    INSERT INTO daily_player_rollup
+        (day, player_login, nickname, envir, records, world_records, top3_records, top5_records,
+         unique_tracks, last_fetch)
+'''
+
+
+def create_rollup_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_player_rollup (
+            day TEXT NOT NULL,
+            player_login TEXT NOT NULL,
+            nickname TEXT NOT NULL,
+            envir TEXT NOT NULL,
+            records INTEGER NOT NULL,
+            world_records INTEGER NOT NULL,
+            top3_records INTEGER NOT NULL,
+            top5_records INTEGER NOT NULL,
+            unique_tracks INTEGER NOT NULL,
+            last_fetch TEXT,
+            PRIMARY KEY (day, player_login, nickname, envir)
+        )
+    ''')
+
+
+def _set_last_id(conn, last_id):
+    conn.execute('''
+        INSERT INTO store_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (ROLLUP_LAST_ID_KEY, last_id))
+
+
+def rebuild_daily_rollup(conn):
+    """Recompute the whole rollup from dedimania_records (does not commit)"""
+    conn.execute('DELETE FROM daily_player_rollup')
+    conn.execute(f'{ROLLUP_INSERT} {ROLLUP_SELECT} {ROLLUP_GROUP_BY}')
+    _set_last_id(conn, conn.execute('SELECT COALESCE(MAX(id), 0) FROM dedimania_records').fetchone()[0])
+
+
+def refresh_daily_rollup(conn):
+    """Recompute the days touched by records inserted since the last refresh (does not commit).
+
+    Returns the number of days refreshed.
+    """
+    row = conn.execute('SELECT value FROM store_meta WHERE key = ?', (ROLLUP_LAST_ID_KEY,)).fetchone()
+    last_id = row[0] if row else 0
+    max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM dedimania_records').fetchone()[0]
+    if max_id <= last_id:
+        return 0
+
+    days = [d for (d,) in conn.execute(f'''
+        SELECT DISTINCT {DAY_EXPR} FROM dedimania_records WHERE id > ?
+    ''', (last_id,))]
+    for day in days:
+        conn.execute('DELETE FROM daily_player_rollup WHERE day = ?', (day,))
+        try:
+            # Same half-open bounds as the dashboard, so the RecordDate index is used
+            where, params = f'"RecordDate" >= ? AND "RecordDate" < ? AND {DAY_EXPR} = ?', day_bounds(day, day) + (day,)
+        except ValueError:
+            where, params = f'{DAY_EXPR} = ?', (day,)
+        conn.execute(f'{ROLLUP_INSERT} {ROLLUP_SELECT} WHERE {where} {ROLLUP_GROUP_BY}', params)
+    _set_last_id(conn, max_id)
+    return len(days)
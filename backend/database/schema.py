@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Dedimania Records Schema
+Typed derived columns and indexes for dedimania_records.
+
+Dedimania columns are stored as TEXT exactly as scraped. Next to them every row carries
+typed copies that queries can compare and index without parsing strings:
+
+    rank_int      Rank as an integer (NULL when it is not a number)
+    record_ms     Record time in milliseconds ("01:02.34" -> 62340)
+    record_epoch  RecordDate as seconds since 1970 (the site's local time, taken as UTC)
+    record_day    RecordDate as a YYYYMMDD integer
+
+The columns and indexes are created by migrations.py. Date-range filters should compare
+the raw "RecordDate" text against day_bounds() so the (RecordDate) indexes are used
+instead of wrapping the column in DATE().
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+
+RECORD_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Rank used in best-record comparisons for a record without a numeric rank
+NO_RANK = 999
+
+# Added to existing databases by migration 2 (see migrations.py)
+TYPED_COLUMN_DEFS = [
+    ('rank_int', 'INTEGER'),
+    ('record_ms', 'INTEGER'),
+    ('record_epoch', 'INTEGER'),
+    ('record_day', 'INTEGER'),
+]
+
+TYPED_COLUMNS = [name for name, _ in TYPED_COLUMN_DEFS]
+
+INDEXES = {
+    'idx_records_date': 'dedimania_records("RecordDate", rank_int)',
+    'idx_records_challenge_rank': 'dedimania_records("Challenge", rank_int, record_ms)',
+    'idx_records_player_date': 'dedimania_records(player_login, "RecordDate", rank_int)',
+}
+
+
+def rank_to_int(rank):
+    """'3' -> 3; anything that is not a plain number -> None"""
+    rank = (rank or '').strip()
+    return int(rank) if rank.isdigit() else None
+
+
+def record_to_ms(record):
+    """Dedimania record time ('SS.cc', 'MM:SS.cc' or 'H:MM:SS.cc') -> milliseconds, None if unparsable"""
+    record = (record or '').strip()
+    if not record:
+        return None
+    try:
+        parts = record.split(':')
+        seconds = float(parts[-1])
+        for unit, value in zip((60, 3600), reversed(parts[:-1])):
+            seconds += int(value) * unit
+    except ValueError:
+        return None
+    return int(round(seconds * 1000))
+
+
+def _parse_record_date(record_date):
+    record_date = (record_date or '').strip()
+    for fmt in (RECORD_DATE_FORMAT, '%Y-%m-%d'):
+        try:
+            return datetime.strptime(record_date, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def recorddate_to_epoch(record_date):
+    parsed = _parse_record_date(record_date)
+    return calendar.timegm(parsed.timetuple()) if parsed else None
+
+
+def recorddate_to_day(record_date):
+    parsed = _parse_record_date(record_date)
+    return parsed.year * 10000 + parsed.month * 100 + parsed.day if parsed else None
+
+
+def typed_values(rank, record, record_date):
+    """Values for TYPED_COLUMNS, in order"""
+    return [rank_to_int(rank), record_to_ms(record), recorddate_to_epoch(record_date), recorddate_to_day(record_date)]
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def day_bounds(start, end):
+    """Half-open RecordDate bounds covering whole days start..end (inclusive).
+
+    Use as  "RecordDate" >= ? AND "RecordDate" < ?  so the comparison stays on the
+    indexed text column. Accepts dates, datetimes or 'YYYY-MM-DD...' strings.
+    """
+    return _as_date(start).isoformat(), (_as_date(end) + timedelta(days=1)).isoformat()
+
+
+def fill_typed_columns(conn, recorddate_col='RecordDate'):
+    """Fill the typed columns from the TEXT ones for every row (used by the migration that adds them)"""
+    print("🔧 Filling typed columns for existing records...")
+    conn.create_function('rank_to_int', 1, rank_to_int, deterministic=True)
+    conn.create_function('record_to_ms', 1, record_to_ms, deterministic=True)
+    conn.create_function('recorddate_to_epoch', 1, recorddate_to_epoch, deterministic=True)
+    conn.create_function('recorddate_to_day', 1, recorddate_to_day, deterministic=True)
+    conn.execute(f'''
+        UPDATE dedimania_records SET
+            rank_int = rank_to_int("Rank"),
+            record_ms = record_to_ms("Record"),
+            record_epoch = recorddate_to_epoch("{recorddate_col}"),
+            record_day = recorddate_to_day("{recorddate_col}")
+    ''')
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Server Dimension
+Canonical servers, their aliases and the tracks that ran on each of them.
+
+    track_servers   one row per (server name as stored, track): record count and the
+                    first/last RecordDate. Kept up to date by triggers on
+                    dedimania_records, so every insert and every server filled in later
+                    is indexed in the writing transaction.
+    servers         canonical servers (id, name, display name)
+    server_aliases  stored server name -> canonical server id
+
+Dedimania reports some servers under several spellings; SERVER_ALIAS_PATTERNS maps
+those to one canonical server, every other name is its own server. "Which tracks ever
+ran on server X" is then a primary-key lookup instead of LIKE scans of the records.
+
+The tables, triggers and the initial index are created by migration 7. Writers call
+refresh_server_aliases() after inserting records so new server names get their alias.
+"""
+
+# Server values that mean "not resolved yet" and are retried on the next refresh (NULL = transient failure)
+SERVER_PLACEHOLDERS = ['', 'No UUID', 'No Challenge', 'Unknown', 'Error']
+
+# Canonical server -> LIKE patterns (case-insensitive for ASCII) of the names it appears under
+SERVER_ALIAS_PATTERNS = {
+    'minilol_freezone': ['%minilol_freezone%', '%minilol freezone%', '%Mini Lol FreeZone%'],
+}
+
+SERVER_DISPLAY_NAMES = {
+    'minilol_freezone': 'MiniLol FreeZone',
+    'tzig_server': 'Cavern',
+}
+
+MINILOL_SERVER = 'minilol_freezone'
+CAVERN_SERVER = 'tzig_server'
+
+_PLACEHOLDER_SQL = ', '.join(f"'{value}'" for value in SERVER_PLACEHOLDERS)
+
+# Shared by the insert and update triggers: index NEW's server/track when the server is real
+_INDEX_NEW_ROW = f'''
+    INSERT INTO track_servers (server, challenge, records, first_seen, last_seen)
+    SELECT NEW.server, NEW.Challenge, 1, NEW."RecordDate", NEW."RecordDate"
+    WHERE NEW.server IS NOT NULL AND NEW.server NOT IN ({_PLACEHOLDER_SQL}) AND NEW.Challenge IS NOT NULL
+    ON CONFLICT(server, challenge) DO UPDATE SET
+        records = records + 1,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen);
+'''
+
+TRIGGERS = {
+    'trg_track_servers_insert': f'''
+        AFTER INSERT ON dedimania_records
+        BEGIN
+            {_INDEX_NEW_ROW}
+        END
+    ''',
+    # Servers are filled in on existing rows once a lookup succeeds
+    'trg_track_servers_update': f'''
+        AFTER UPDATE OF server, Challenge ON dedimania_records
+        WHEN NEW.server IS NOT OLD.server OR NEW.Challenge IS NOT OLD.Challenge
+        BEGIN
+            UPDATE track_servers SET records = records - 1
+            WHERE server = OLD.server AND challenge = OLD.Challenge;
+            DELETE FROM track_servers
+            WHERE server = OLD.server AND challenge = OLD.Challenge AND records <= 0;
+            {_INDEX_NEW_ROW}
+        END
+    ''',
+}
+
+
+def create_server_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS servers (
+            server_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            display_name TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS server_aliases (
+            alias TEXT PRIMARY KEY,
+            server_id INTEGER NOT NULL REFERENCES servers(server_id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_server_aliases_server ON server_aliases(server_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS track_servers (
+            server TEXT NOT NULL,
+            challenge TEXT NOT NULL,
+            records INTEGER NOT NULL,
+            first_seen TEXT,
+            last_seen TEXT,
+            PRIMARY KEY (server, challenge)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_track_servers_challenge ON track_servers(challenge)')
+    for name, body in TRIGGERS.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+def rebuild_track_servers(conn):
+    """Recompute track_servers from dedimania_records (does not commit)"""
+    conn.execute('DELETE FROM track_servers')
+    conn.execute(f'''
+        INSERT INTO track_servers (server, challenge, records, first_seen, last_seen)
+        SELECT server, Challenge, COUNT(*), MIN("RecordDate"), MAX("RecordDate")
+        FROM dedimania_records
+        WHERE server IS NOT NULL AND server NOT IN ({_PLACEHOLDER_SQL}) AND Challenge IS NOT NULL
+        GROUP BY server, Challenge
+    ''')
+
+
+def _server_id(conn, name):
+    conn.execute('INSERT OR IGNORE INTO servers (name, display_name) VALUES (?, ?)',
+                 (name, SERVER_DISPLAY_NAMES.get(name, name)))
+    return conn.execute('SELECT server_id FROM servers WHERE name = ?', (name,)).fetchone()[0]
+
+
+def canonical_name(conn, name):
+    """Canonical server name of a stored server name (SQLite LIKE, as the patterns are written for)"""
+    for canonical, patterns in SERVER_ALIAS_PATTERNS.items():
+        for pattern in patterns:
+            if conn.execute('SELECT ? LIKE ?', (name, pattern)).fetchone()[0]:
+                return canonical
+    return name
+
+
+def refresh_server_aliases(conn):
+    """Give every newly indexed server name its canonical server (does not commit).
+
+    Returns the number of names added.
+    """
+    new_names = [name for (name,) in conn.execute('''
+        SELECT DISTINCT server FROM track_servers
+        WHERE server NOT IN (SELECT alias FROM server_aliases)
+    ''')]
+    for name in new_names:
+        server_id = _server_id(conn, canonical_name(conn, name))
+        conn.execute('INSERT INTO server_aliases (alias, server_id) VALUES (?, ?)', (name, server_id))
+    return len(new_names)
+
+
+def server_tracks(conn, server_name):
+    """Set of tracks that ever had a record on the canonical server server_name (any alias)"""
+    return {challenge for (challenge,) in conn.execute('''
+        SELECT DISTINCT ts.challenge
+        FROM servers s
+        JOIN server_aliases a ON a.server_id = s.server_id
+        JOIN track_servers ts ON ts.server = a.alias
+        WHERE s.name = ?
+    ''', (server_name,))}
+
+
+def server_aliases(conn, server_name):
+    """Stored names of the canonical server server_name"""
+    return [alias for (alias,) in conn.execute('''
+        SELECT a.alias FROM servers s JOIN server_aliases a ON a.server_id = s.server_id
+        WHERE s.name = ? ORDER BY a.alias
+    ''', (server_name,))]
+
+
+def canonical_servers(conn):
+    """{stored server name: (canonical name, display name)}"""
+    return {alias: (name, display_name) for alias, name, display_name in conn.execute('''
+        SELECT a.alias, s.name, s.display_name FROM server_aliases a JOIN servers s ON s.server_id = a.server_id
+    ''')}
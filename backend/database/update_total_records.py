@@ -5,14 +5,16 @@ Updates total_records for all challenges that have UUIDs by fetching current dat
 """
 
 import sqlite3
-import requests
-from bs4 import BeautifulSoup
 import os
 import sys
 from datetime import datetime
-import time
 import argparse
 
+from dedimania_http import get_client
+from dedimania_parse import parser as html_parser
+from migrations import migrate_path
+from data_version import bump_data_version
+
 class TotalRecordsUpdater:
     def __init__(self, db_path=None):
         if db_path is None:
@@ -23,10 +25,8 @@ class TotalRecordsUpdater:
         
         self.db_path = db_path
         self.base_url = "http://dedimania.net/tmstats/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.client = get_client()  # Shared rate limiter + retries
+        migrate_path(self.db_path)
     
     def get_challenges_with_uuids(self):
         """Get all challenges that have UUIDs from the database, excluding those with total_records >= 30"""
@@ -53,45 +53,13 @@ class TotalRecordsUpdater:
             # Construct the stats URL
             stats_url = f"{self.base_url}?do=stat&RGame=TMU&Uid={challenge_uuid}&Show=RECORDS"
             
-            response = self.session.get(stats_url, timeout=15)
+            response = self.client.get(stats_url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find ALL tables with class "tabl" - we need the one with actual data
-            records_tables = soup.find_all('table', class_='tabl')
-            
-            records_table = None
-            # Look for the table that contains data rows (not just form elements)
-            for table in records_tables:
-                data_rows = table.find_all('tr', class_='tabl')
-                data_row_count = 0
-                
-                for row in data_rows:
-                    cells = row.find_all('td')
-                    bgcolor = row.get('bgcolor')
-                    # Check if this is a data row (has bgcolor and enough cells for record data)
-                    if len(cells) > 10 and bgcolor in ['#FFFFFF', '#F0F0F0']:
-                        data_row_count += 1
-                
-                if data_row_count > 0:
-                    records_table = table
-                    break
-            
-            if records_table:
-                # Count actual data rows
-                record_rows = records_table.find_all('tr', class_='tabl')
-                data_rows = []
-                
-                for row in record_rows:
-                    cells = row.find_all('td')
-                    bgcolor = row.get('bgcolor')
-                    # Check if this is a data row
-                    if len(cells) > 10 and bgcolor in ['#FFFFFF', '#F0F0F0']:
-                        data_rows.append(row)
-                
-                total_count = len(data_rows)
-                return total_count
+            # Data rows (striped background, >10 cells) of the first table that has any
+            data_rows = html_parser.data_rows(response.content)
+            if data_rows:
+                return len(data_rows)
             else:
                 print(f"    Warning: No records table found")
                 return 0
@@ -110,6 +78,7 @@ class TotalRecordsUpdater:
             SET total_records = ?, last_updated = ?
             WHERE challenge_name = ? AND challenge_uuid = ?
         """, (new_count, datetime.now(), challenge_name, challenge_uuid))
+        bump_data_version(conn)
         
         conn.commit()
         conn.close()
@@ -165,9 +134,6 @@ class TotalRecordsUpdater:
             else:
                 print(f"  Failed to fetch data")
                 error_count += 1
-            
-            # Small delay to be respectful to Dedimania
-            time.sleep(0.2)
         
         print(f"\n=== UPDATE SUMMARY ===")
         if not dry_run:
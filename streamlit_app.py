@@ -44,6 +44,43 @@ except ImportError as e:
 # Database path
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'dedimania_history_master.db')
 
+# Apply pending schema migrations; date filters below use day_bounds() so they can use the RecordDate index
+from schema import day_bounds
+from migrations import migrate_path
+from read_pool import ReadOnlyPool
+from data_version import get_data_version
+from rivalry_engine import find_rivalries
+from record_stats import prepare_records, player_stats, leaderboard_table, weekend_split, player_summary
+from server_analytics import scan_server_activity, months_ago, CAVERN_SERVER
+
+
+@st.cache_resource
+def ensure_schema(db_path):
+    """Apply pending migrations once per process instead of on every rerun"""
+    migrate_path(db_path)
+
+
+if os.path.exists(DATABASE_PATH):
+    ensure_schema(DATABASE_PATH)
+
+@st.cache_resource
+def get_read_pool():
+    """Process-wide read-only connections shared by every session and rerun"""
+    return ReadOnlyPool(DATABASE_PATH)
+
+def data_version():
+    """Bumped by every fetch; part of every cache key so results refresh exactly when data changes"""
+    with get_read_pool().connection() as conn:
+        return get_data_version(conn)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_query(sql, params=(), version=None):
+    return get_read_pool().query(sql, params)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_df(sql, params=(), version=None):
+    return get_read_pool().read_df(sql, params)
+
 # Custom CSS for better styling - ENHANCED BEAUTIFUL DESIGN
 st.markdown("""
 <style>
@@ -455,22 +492,11 @@ def get_database_info():
         if not os.path.exists(DATABASE_PATH):
             return {"exists": False, "records": 0, "players": 0, "last_update": "Never"}
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # Get total records
-        cursor.execute("SELECT COUNT(*) FROM dedimania_records")
-        total_records = cursor.fetchone()[0]
-        
-        # Get unique players
-        cursor.execute("SELECT COUNT(DISTINCT player_login) FROM dedimania_records")
-        unique_players = cursor.fetchone()[0]
-        
-        # Get last update
-        cursor.execute("SELECT MAX(fetch_timestamp) FROM dedimania_records")
-        last_update = cursor.fetchone()[0] or "Never"
-        
-        conn.close()
+        # Total records, unique players and last update from the daily rollup
+        total_records, unique_players, last_update = cached_query("""
+            SELECT COALESCE(SUM(records), 0), COUNT(DISTINCT player_login), MAX(last_fetch) FROM daily_player_rollup
+        """, version=data_version())[0]
+        last_update = last_update or "Never"
         
         return {
             "exists": True,
@@ -484,11 +510,8 @@ def get_database_info():
 def get_date_range_from_db():
     """Get the min and max dates from database"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT MIN(DATE(RecordDate)), MAX(DATE(RecordDate)) FROM dedimania_records")
-        min_date, max_date = cursor.fetchone()
-        conn.close()
+        min_date, max_date = cached_query(
+            "SELECT MIN(day), MAX(day) FROM daily_player_rollup WHERE day != ''", version=data_version())[0]
         
         if min_date and max_date:
             min_date = datetime.strptime(min_date, '%Y-%m-%d').date()
@@ -518,7 +541,8 @@ def main():
         "🏠 Dashboard", 
         "📈 Team Statistics",
         "🔄 Database Management",
-        "📊 Player Analytics"
+        "📊 Player Analytics",
+        "🖥️ Server Activity"
     ])
     
     # Database info in sidebar
@@ -552,6 +576,8 @@ def main():
         show_database_management()
     elif page == "📊 Player Analytics":
         show_player_analytics()
+    elif page == "🖥️ Server Activity":
+        show_server_activity()
 
 def show_dashboard():
     """Main dashboard with overview"""
@@ -655,17 +681,18 @@ def show_dashboard():
         </div>
         """, unsafe_allow_html=True)
     
+    # Period totals from the daily rollup (O(days) rather than O(records))
+    try:
+        period_records, world_records = cached_query("""
+            SELECT COALESCE(SUM(records), 0), COALESCE(SUM(world_records), 0)
+            FROM daily_player_rollup
+            WHERE day >= ? AND day < ?
+        """, day_bounds(dashboard_start_date, dashboard_end_date), data_version())[0]
+    except Exception:
+        period_records = world_records = None
+    
     with col3:
-        # Get filtered period records
-        try:
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM dedimania_records 
-                WHERE DATE(RecordDate) >= ? AND DATE(RecordDate) <= ?
-            """, (dashboard_start_date, dashboard_end_date))
-            period_records = cursor.fetchone()[0]
-            conn.close()
+        if period_records is not None:
             period_label = "Selected Period" if (dashboard_end_date - dashboard_start_date).days > 1 else "Selected Day"
             
             st.markdown(f"""
@@ -674,7 +701,7 @@ def show_dashboard():
                 <p>{period_label}</p>
             </div>
             """, unsafe_allow_html=True)
-        except:
+        else:
             st.markdown(f"""
             <div class="stat-highlight">
                 <h3>N/A</h3>
@@ -683,24 +710,14 @@ def show_dashboard():
             """, unsafe_allow_html=True)
     
     with col4:
-        # Get world records in selected period
-        try:
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM dedimania_records 
-                WHERE DATE(RecordDate) >= ? AND DATE(RecordDate) <= ? AND Rank = '1'
-            """, (dashboard_start_date, dashboard_end_date))
-            world_records = cursor.fetchone()[0]
-            conn.close()
-            
+        if world_records is not None:
             st.markdown(f"""
             <div class="stat-highlight">
                 <h3>{world_records}</h3>
                 <p>World Records</p>
             </div>
             """, unsafe_allow_html=True)
-        except:
+        else:
             st.markdown(f"""
             <div class="stat-highlight">
                 <h3>N/A</h3>
@@ -713,15 +730,13 @@ def show_dashboard():
     # Recent activity
     st.subheader("🕐 Recent Activity")
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        df = pd.read_sql_query("""
+        df = cached_df("""
             SELECT NickName, Challenge, Rank, Record, RecordDate 
             FROM dedimania_records 
-            WHERE DATE(RecordDate) >= ? AND DATE(RecordDate) <= ?
+            WHERE RecordDate >= ? AND RecordDate < ?
             ORDER BY RecordDate DESC 
             LIMIT 20
-        """, conn, params=(dashboard_start_date, dashboard_end_date))
-        conn.close()
+        """, day_bounds(dashboard_start_date, dashboard_end_date), data_version())
         
         if not df.empty:
             df['RecordDate'] = pd.to_datetime(df['RecordDate']).dt.strftime('%Y-%m-%d %H:%M')
@@ -732,6 +747,65 @@ def show_dashboard():
         st.error(f"Error loading recent activity: {e}")
 
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def compute_team_statistics(start_date, end_date, version):
+    """Everything the Team Statistics page shows for a period, cached per (period, data version)"""
+    raw_records = get_read_pool().query("""
+        SELECT player_login, NickName, Challenge, Record, Rank, RecordDate, Envir, Mode, server
+        FROM dedimania_records 
+        WHERE RecordDate >= ? AND RecordDate < ?
+        ORDER BY RecordDate DESC, id
+    """, day_bounds(start_date, end_date))
+    if not raw_records:
+        return None
+    
+    # Convert once: numeric ranks, datetimes and categorical login/track/environment columns
+    records_df = prepare_records(pd.DataFrame(raw_records, columns=[
+        'player_login', 'NickName', 'Challenge', 'Record', 'Rank', 
+        'RecordDate', 'Envir', 'Mode', 'server'
+    ]))
+    
+    # Headline counts and the environment split come from the daily rollup; distinct
+    # tracks over the period still need the records themselves
+    total_records, world_records, top5_records, unique_players = get_read_pool().query_one("""
+        SELECT SUM(records), SUM(world_records), SUM(top5_records), COUNT(DISTINCT player_login)
+        FROM daily_player_rollup
+        WHERE day >= ? AND day < ?
+    """, day_bounds(start_date, end_date))
+    unique_tracks = records_df['Challenge'].nunique()
+    
+    # Per-player statistics and the comprehensive leaderboard
+    stats_by_player = player_stats(records_df)
+    df_leaderboard = leaderboard_table(stats_by_player)
+    
+    env_counts = get_read_pool().read_df("""
+        SELECT envir, SUM(records) as count
+        FROM daily_player_rollup
+        WHERE day >= ? AND day < ?
+        GROUP BY envir
+        ORDER BY count DESC
+    """, day_bounds(start_date, end_date)).set_index('envir')['count'].rename_axis('Envir')
+    
+    # Rivalries: pairwise head-to-head on shared tracks, computed as matrix operations
+    rivalries = find_rivalries(records_df, stats_by_player['nickname'].to_dict())
+    
+    # Activity distribution
+    weekend_records, weekday_records = weekend_split(records_df)
+    
+    return {
+        'total_records': total_records,
+        'unique_tracks': unique_tracks,
+        'unique_players': unique_players,
+        'world_records': world_records,
+        'top5_records': top5_records,
+        'df_leaderboard': df_leaderboard,
+        'env_counts': env_counts,
+        'rivalries': rivalries,
+        'weekend_records': weekend_records,
+        'weekday_records': weekday_records,
+    }
+
+
 def show_team_statistics():
     """Enhanced team statistics page with comprehensive visualizations and analysis"""
     st.header("📈 Team Statistics")
@@ -833,28 +907,21 @@ def show_team_statistics():
     
     # ENHANCED STATISTICS ANALYSIS
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT player_login, NickName, Challenge, Record, Rank, RecordDate, Envir, Mode, server
-            FROM dedimania_records 
-            WHERE DATE(RecordDate) >= ? AND DATE(RecordDate) <= ?
-            ORDER BY RecordDate DESC
-        """, (stats_start_date, stats_end_date))
-        
-        raw_records = cursor.fetchall()
-        conn.close()
-        
-        if not raw_records:
+        stats = compute_team_statistics(stats_start_date, stats_end_date, data_version())
+        if stats is None:
             st.warning(f"No data available for the selected period ({stats_start_date} to {stats_end_date})")
             return
         
-        # Convert to easier data structure
-        records_df = pd.DataFrame(raw_records, columns=[
-            'player_login', 'NickName', 'Challenge', 'Record', 'Rank', 
-            'RecordDate', 'Envir', 'Mode', 'server'
-        ])
+        total_records = stats['total_records']
+        unique_tracks = stats['unique_tracks']
+        unique_players = stats['unique_players']
+        world_records = stats['world_records']
+        top5_records = stats['top5_records']
+        df_leaderboard = stats['df_leaderboard']
+        env_counts = stats['env_counts']
+        rivalries = stats['rivalries']
+        weekend_records = stats['weekend_records']
+        weekday_records = stats['weekday_records']
         
         # ENHANCED OVERVIEW SECTION
         st.subheader("🏆 Enhanced Performance Overview")
@@ -862,13 +929,6 @@ def show_team_statistics():
         # Top row metrics
         col1, col2, col3, col4, col5 = st.columns(5)
         
-        total_records = len(records_df)
-        unique_tracks = records_df['Challenge'].nunique()
-        unique_players = records_df['player_login'].nunique()
-        world_records = len(records_df[records_df['Rank'] == '1'])
-        top5_records = len(records_df[records_df['Rank'].astype(str).str.isdigit() & 
-                                    (records_df['Rank'].astype(int) <= 5)])
-        
         with col1:
             st.markdown("""
             <div class="stat-highlight">
@@ -911,38 +971,6 @@ def show_team_statistics():
         
         st.markdown("---")
         
-        # Calculate player statistics for analysis
-        player_stats = {}
-        for _, record in records_df.iterrows():
-            login = record['player_login']
-            nick = record['NickName'] if record['NickName'] else login
-            rank = record['Rank']
-            
-            if login not in player_stats:
-                player_stats[login] = {
-                    'nickname': nick,
-                    'total_records': 0,
-                    'world_records': 0,
-                    'top3_records': 0,
-                    'top5_records': 0,
-                    'environments': set(),
-                    'tracks': set()
-                }
-            
-            player_stats[login]['total_records'] += 1
-            player_stats[login]['tracks'].add(record['Challenge'])
-            player_stats[login]['environments'].add(record['Envir'])
-            
-            if rank == '1':
-                player_stats[login]['world_records'] += 1
-            if rank.isdigit() and int(rank) <= 3:
-                player_stats[login]['top3_records'] += 1
-            if rank.isdigit() and int(rank) <= 5:
-                player_stats[login]['top5_records'] += 1
-            
-            # Update nickname to latest
-            player_stats[login]['nickname'] = nick
-        
         # ENHANCED VISUALIZATIONS
         st.subheader("📊 Enhanced Analytics")
         
@@ -950,28 +978,11 @@ def show_team_statistics():
         
         with viz_col1:
             st.subheader("🏆 Leaderboard Standings")
-            # Create a comprehensive leaderboard
-            leaderboard_data = []
-            for login, stats in player_stats.items():
-                leaderboard_data.append({
-                    'Player': stats['nickname'],
-                    'WRs': stats['world_records'],
-                    'Top 3': stats['top3_records'],
-                    'Top 5': stats['top5_records'],
-                    'Total': stats['total_records'],
-                    'Tracks': len(stats['tracks']),
-                    'WR%': f"{stats['world_records']/max(stats['total_records'], 1):.1%}"
-                })
-            
-            df_leaderboard = pd.DataFrame(leaderboard_data)
-            df_leaderboard = df_leaderboard.sort_values(['WRs', 'Top 3', 'Top 5'], ascending=False)
-            
             # Display top players
             st.dataframe(df_leaderboard.head(10), use_container_width=True, hide_index=True)
         
         with viz_col2:
             st.subheader("🌍 Environment Distribution")
-            env_counts = records_df['Envir'].value_counts()
             
             # Create environment chart
             if len(env_counts) > 0:
@@ -987,64 +998,6 @@ def show_team_statistics():
         # PLAYER RIVALRIES - STREAMLINED
         st.subheader("🔥 Player Rivalries")
         
-        # Find rivalries based on shared tracks
-        rivalries = []
-        players_list = list(player_stats.keys())
-        
-        for i in range(len(players_list)):
-            for j in range(i + 1, len(players_list)):
-                player1_login = players_list[i]
-                player2_login = players_list[j]
-                
-                player1_tracks = player_stats[player1_login]['tracks']
-                player2_tracks = player_stats[player2_login]['tracks']
-                shared_tracks = player1_tracks.intersection(player2_tracks)
-                
-                if len(shared_tracks) >= 3:  # At least 3 shared tracks for rivalry
-                    # Calculate head-to-head on shared tracks
-                    p1_wins = 0
-                    p2_wins = 0
-                    
-                    for track in shared_tracks:
-                        p1_records = records_df[(records_df['player_login'] == player1_login) & 
-                                              (records_df['Challenge'] == track)]
-                        p2_records = records_df[(records_df['player_login'] == player2_login) & 
-                                              (records_df['Challenge'] == track)]
-                        
-                        if not p1_records.empty and not p2_records.empty:
-                            p1_best_rank = p1_records['Rank'].astype(str)
-                            p2_best_rank = p2_records['Rank'].astype(str)
-                            
-                            # Convert to numeric for comparison (handle non-numeric ranks)
-                            try:
-                                p1_rank = min([int(r) for r in p1_best_rank if r.isdigit()] or [999])
-                                p2_rank = min([int(r) for r in p2_best_rank if r.isdigit()] or [999])
-                                
-                                if p1_rank < p2_rank:
-                                    p1_wins += 1
-                                elif p2_rank < p1_rank:
-                                    p2_wins += 1
-                            except:
-                                continue
-                    
-                    total_battles = p1_wins + p2_wins
-                    if total_battles >= 2:  # At least 2 head-to-head battles
-                        rivalries.append({
-                            'player1': player_stats[player1_login]['nickname'],
-                            'player2': player_stats[player2_login]['nickname'],
-                            'shared_tracks': len(shared_tracks),
-                            'p1_wins': p1_wins,
-                            'p2_wins': p2_wins,
-                            'total_battles': total_battles,
-                            'score': f"{p1_wins}-{p2_wins}",
-                            'leader': player_stats[player1_login]['nickname'] if p1_wins > p2_wins 
-                                     else player_stats[player2_login]['nickname'] if p2_wins > p1_wins 
-                                     else 'Tied'
-                        })
-        
-        # Sort rivalries by number of battles
-        rivalries.sort(key=lambda x: x['total_battles'], reverse=True)
-        
         if rivalries:
             # Create a clean table-like format
             st.markdown("### 🏆 Top Rivalries")
@@ -1118,16 +1071,6 @@ def show_team_statistics():
         
         with insights_col3:
             # Activity distribution
-            weekend_records = 0
-            weekday_records = 0
-            
-            for _, record in records_df.iterrows():
-                record_date = pd.to_datetime(record['RecordDate'])
-                if record_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
-                    weekend_records += 1
-                else:
-                    weekday_records += 1
-            
             weekend_pct = weekend_records / max(total_records, 1) * 100
             
             st.markdown(f"""
@@ -1207,27 +1150,25 @@ def show_database_management():
         st.subheader("📊 Database Statistics")
         
         try:
-            conn = sqlite3.connect(DATABASE_PATH)
+            version = data_version()
             
             # Records per player
-            df_players = pd.read_sql_query("""
-                SELECT NickName, COUNT(*) as record_count
-                FROM dedimania_records 
-                GROUP BY player_login, NickName
+            df_players = cached_df("""
+                SELECT nickname as NickName, SUM(records) as record_count
+                FROM daily_player_rollup 
+                GROUP BY player_login, nickname
                 ORDER BY record_count DESC
                 LIMIT 10
-            """, conn)
-            
-            # Records over time
-            df_timeline = pd.read_sql_query("""
-                SELECT DATE(RecordDate) as date, COUNT(*) as daily_records
-                FROM dedimania_records 
-                WHERE RecordDate >= date('now', '-30 days')
-                GROUP BY DATE(RecordDate)
+            """, version=version)
+            
+            # Records over time (the cutoff is a parameter so the cached result rolls over daily)
+            df_timeline = cached_df("""
+                SELECT day as date, SUM(records) as daily_records
+                FROM daily_player_rollup 
+                WHERE day >= ?
+                GROUP BY day
                 ORDER BY date
-            """, conn)
-            
-            conn.close()
+            """, ((datetime.now().date() - timedelta(days=30)).isoformat(),), version)
             
             col1, col2 = st.columns(2)
             
@@ -1330,11 +1271,10 @@ def show_player_analytics():
     st.markdown("---")
     
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+        version = data_version()
         
         # Get ALL unique players with their most recent nicknames (not filtered by date range)
-        cursor.execute("""
+        all_records = cached_query("""
             SELECT 
                 player_login,
                 NickName,
@@ -1342,9 +1282,7 @@ def show_player_analytics():
                 ROW_NUMBER() OVER (PARTITION BY player_login ORDER BY RecordDate DESC) as rn
             FROM dedimania_records 
             WHERE NickName IS NOT NULL AND NickName != ''
-        """)
-        
-        all_records = cursor.fetchall()
+        """, version=version)
         
         # Get the most recent nickname for each unique login
         unique_players = {}
@@ -1354,7 +1292,6 @@ def show_player_analytics():
         
         if not unique_players:
             st.warning("No players found in database")
-            conn.close()
             return
         
         # Sort players by their current nickname
@@ -1397,28 +1334,28 @@ def show_player_analytics():
             st.subheader(f"📊 Analytics for {player_name}")
             
             # Get all player stats within selected date range
-            df_player = pd.read_sql_query("""
+            df_player = cached_df("""
                 SELECT Challenge, Rank, Record, RecordDate, Envir, Mode, NickName
                 FROM dedimania_records 
                 WHERE player_login = ?
-                    AND DATE(RecordDate) >= ? AND DATE(RecordDate) <= ?
+                    AND RecordDate >= ? AND RecordDate < ?
                 ORDER BY RecordDate DESC
-            """, conn, params=(player_login, start_date, end_date))
+            """, (player_login, *day_bounds(start_date, end_date)), version)
             
             if df_player.empty:
                 st.warning(f"📭 No records found for **{player_name}** in the selected time period ({start_date} to {end_date})")
                 st.info("💡 Try expanding your date range or select a different time period.")
-                conn.close()
                 return
             
             # Player metrics in cards
             col1, col2, col3, col4 = st.columns(4)
             
-            total_records = len(df_player)
-            world_records = len(df_player[df_player['Rank'] == '1'])
-            top5_records = len(df_player[df_player['Rank'].astype(str).str.isdigit() & 
-                                       (df_player['Rank'].astype(int) <= 5)])
-            unique_tracks = df_player['Challenge'].nunique()
+            df_player = prepare_records(df_player)
+            summary = player_summary(df_player)
+            total_records = summary['total_records']
+            world_records = summary['world_records']
+            top5_records = summary['top5_records']
+            unique_tracks = summary['unique_tracks']
             
             with col1:
                 st.metric("Total Records", f"{total_records:,}")
@@ -1435,25 +1372,10 @@ def show_player_analytics():
             # Additional metrics row
             col5, col6, col7, col8 = st.columns(4)
             
-            # Calculate average rank (only for numeric ranks)
-            numeric_ranks = df_player[df_player['Rank'].astype(str).str.isdigit()]['Rank'].astype(int)
-            avg_rank = numeric_ranks.mean() if len(numeric_ranks) > 0 else 0
-            
-            # Calculate top 3 records
-            top3_records = len(df_player[df_player['Rank'].astype(str).str.isdigit() & 
-                                       (df_player['Rank'].astype(int) <= 3)])
-            
-            # Get activity span
-            if len(df_player) > 0:
-                first_record = pd.to_datetime(df_player['RecordDate']).min()
-                last_record = pd.to_datetime(df_player['RecordDate']).max()
-                activity_days = (last_record - first_record).days + 1
-            else:
-                activity_days = 0
-            
-            # Most common environment
-            most_common_env = df_player['Envir'].mode()
-            favorite_env = most_common_env.iloc[0] if len(most_common_env) > 0 else "Unknown"
+            avg_rank = summary['avg_rank']
+            top3_records = summary['top3_records']
+            activity_days = summary['activity_days']
+            favorite_env = summary['favorite_env']
             
             with col5:
                 st.metric("Average Rank", f"{avg_rank:.1f}" if avg_rank > 0 else "N/A")
@@ -1475,8 +1397,7 @@ def show_player_analytics():
             with col_left:
                 st.subheader("📊 Rank Distribution")
                 # Only show ranks 1-20 for better visualization
-                rank_counts = df_player[df_player['Rank'].astype(str).str.isdigit()]['Rank'].astype(int)
-                rank_counts = rank_counts[rank_counts <= 20].value_counts().sort_index()
+                rank_counts = summary['rank_counts']
                 
                 if len(rank_counts) > 0:
                     st.bar_chart(rank_counts)
@@ -1485,7 +1406,7 @@ def show_player_analytics():
             
             with col_right:
                 st.subheader("🌍 Environment Breakdown")
-                env_counts = df_player['Envir'].value_counts()
+                env_counts = summary['env_counts']
                 
                 if len(env_counts) > 0:
                     # Create a pie-like visualization using metrics
@@ -1502,7 +1423,8 @@ def show_player_analytics():
             
             if not df_recent.empty:
                 # Format the data for better display
-                df_recent['RecordDate'] = pd.to_datetime(df_recent['RecordDate']).dt.strftime('%Y-%m-%d %H:%M')
+                df_recent['RecordDate'] = df_recent['record_dt'].dt.strftime('%Y-%m-%d %H:%M')
+                df_recent['Challenge'] = df_recent['Challenge'].astype(str)
                 df_recent['Track'] = df_recent['Challenge'].str[:40] + '...' if df_recent['Challenge'].str.len().max() > 40 else df_recent['Challenge']
                 
                 # Select and rename columns for display
@@ -1517,7 +1439,7 @@ def show_player_analytics():
             st.subheader("🏆 Best Achievements")
             
             # Get world records
-            world_record_tracks = df_player[df_player['Rank'] == '1']['Challenge'].tolist()
+            world_record_tracks = summary['world_record_tracks']
             
             if world_record_tracks:
                 st.success(f"🥇 **World Records on {len(world_record_tracks)} tracks:**")
@@ -1531,13 +1453,12 @@ def show_player_analytics():
             
             # Nickname history
             st.subheader("📝 Nickname History")
-            nickname_history = df_player[['NickName', 'RecordDate']].drop_duplicates('NickName').sort_values('RecordDate', ascending=False)
+            nickname_history = df_player[['NickName', 'record_dt']].drop_duplicates('NickName').sort_values('record_dt', ascending=False)
             
             if len(nickname_history) > 1:
                 st.write("**Previous nicknames:**")
-                for _, row in nickname_history.iterrows():
-                    date = pd.to_datetime(row['RecordDate']).strftime('%Y-%m-%d')
-                    st.write(f"• **{row['NickName']}** (last used: {date})")
+                for nickname, last_used in zip(nickname_history['NickName'], nickname_history['record_dt'].dt.strftime('%Y-%m-%d')):
+                    st.write(f"• **{nickname}** (last used: {last_used})")
             else:
                 st.write(f"Always used the same nickname: **{player_name}**")
         
@@ -1554,11 +1475,133 @@ def show_player_analytics():
             # Show available players count
             st.info(f"📊 **{len(unique_players)} players** available in the database with recorded statistics.")
         
-        conn.close()
-        
     except Exception as e:
         st.error(f"Error loading player analytics: {e}")
         st.info("Please check the database connection and try again.")
 
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def compute_server_activity(start_date, end_date, version):
+    """Per-(server, player) activity of every server for a period: one scan, cached per (period, data version)"""
+    with get_read_pool().connection() as conn:
+        return scan_server_activity(conn, start_date, end_date)
+
+
+def show_server_activity():
+    """Activity per server and server preferences per player"""
+    st.header("🖥️ Server Activity")
+    
+    if not os.path.exists(DATABASE_PATH):
+        st.error("Database not found. Please update the database first.")
+        return
+    
+    min_date, max_date = get_date_range_from_db()
+    
+    # Calendar months back from the latest data, as the server reports count them
+    if 'server_activity_start_date' not in st.session_state:
+        st.session_state.server_activity_start_date = max(min_date, months_ago(max_date, 2))
+    if 'server_activity_end_date' not in st.session_state:
+        st.session_state.server_activity_end_date = max_date
+    
+    st.markdown('<div class="date-filter-container">', unsafe_allow_html=True)
+    
+    with st.container():
+        date_col1, date_col2, buttons_col = st.columns([1.2, 1.2, 3.5])
+        
+        with date_col1:
+            start_date = st.date_input(
+                "From",
+                value=st.session_state.server_activity_start_date,
+                min_value=min_date,
+                max_value=max_date,
+                key="server_activity_start_input"
+            )
+            st.session_state.server_activity_start_date = start_date
+        
+        with date_col2:
+            end_date = st.date_input(
+                "To",
+                value=st.session_state.server_activity_end_date,
+                min_value=min_date,
+                max_value=max_date,
+                key="server_activity_end_input"
+            )
+            st.session_state.server_activity_end_date = end_date
+        
+        with buttons_col:
+            quick_cols = st.columns(4)
+            for col, (label, months) in zip(quick_cols, [("📆 1m", 1), ("📆 2m", 2), ("📊 6m", 6), ("🌍 All", None)]):
+                with col:
+                    if st.button(label, key=f"server_activity_{label}", use_container_width=True):
+                        st.session_state.server_activity_start_date = (
+                            min_date if months is None else max(min_date, months_ago(max_date, months)))
+                        st.session_state.server_activity_end_date = max_date
+                        st.rerun()
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    try:
+        activity = compute_server_activity(start_date, end_date, data_version())
+        if activity.summary.empty:
+            st.warning("No server activity in the selected period")
+            return
+        
+        st.subheader("🏢 Servers")
+        summary = activity.summary.reset_index().rename(columns={
+            'server': 'Server', 'display_name': 'Name', 'players': 'Players', 'records': 'Records',
+            'unique_tracks': "Dedi's", 'days_active': 'Days Active'})
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        
+        st.subheader("🏔️ Server Details")
+        servers = list(activity.summary.index)
+        detail_col1, detail_col2 = st.columns([3, 1])
+        with detail_col1:
+            server = st.selectbox(
+                "Server",
+                servers,
+                index=servers.index(CAVERN_SERVER) if CAVERN_SERVER in servers else 0,
+                format_func=lambda name: f"{activity.display_name(name)} ({name})" if activity.display_name(name) != name else name,
+                key="server_activity_server"
+            )
+        with detail_col2:
+            min_records = st.number_input("Min records", min_value=1, value=3, key="server_activity_min_records")
+        
+        players = activity.server_players(server, min_records)
+        if players.empty:
+            st.info("No players with enough records on this server")
+        else:
+            metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+            with metric_col1:
+                st.metric("Players", len(players))
+            with metric_col2:
+                st.metric("Records", f"{int(players['total_records'].sum()):,}")
+            with metric_col3:
+                st.metric("Improvements", f"{int(players['improvements'].sum()):,}")
+            with metric_col4:
+                st.metric("Most Active", players['nickname'].iloc[0][:16])
+            st.dataframe(players.drop(columns=['login']).rename(columns={
+                'nickname': 'Player', 'total_records': 'Records', 'unique_tracks': "Dedi's",
+                'improvements': 'Improvements', 'days_active': 'Days Active', 'first_record': 'First',
+                'last_record': 'Last', 'activity_span': 'Span (days)', 'records_per_day': 'Records/Day'}),
+                use_container_width=True, hide_index=True)
+        
+        with st.expander("🎮 Server preferences per player"):
+            preferences = activity.player_preferences(min_records=5)
+            if not preferences:
+                st.info("No player has 5 or more records on a server in this period")
+            else:
+                st.dataframe(pd.DataFrame([{
+                    'Player': player['nickname'],
+                    'Records': player['total_records'],
+                    'Days Active': player['total_days'],
+                    'Top Server': activity.display_name(player['top_server_records']['server']),
+                    'Share': f"{player['records_percentage']:.0f}%",
+                    'Most Days On': activity.display_name(player['top_server_days']['server']),
+                } for player in preferences]), use_container_width=True, hide_index=True)
+    
+    except Exception as e:
+        st.error(f"Error loading server activity: {e}")
+
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
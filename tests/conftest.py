@@ -0,0 +1,46 @@
+"""Shared fixtures: small in-memory databases migrated to the latest schema"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'backend', 'database'))
+sys.path.append(os.path.join(ROOT, 'backend', 'Final_Weekly_stats'))
+
+from migrations import migrate
+from schema import TYPED_COLUMNS, typed_values
+
+RECORD_COLUMNS = ['player_login', 'NickName', 'Rank', 'Record', 'Challenge', 'Envir', 'RecordDate', 'server',
+                  'fetch_timestamp']
+
+
+def insert_records(conn, rows):
+    """Insert records the way the fetcher does: text columns plus their typed copies.
+
+    rows are dicts with any of RECORD_COLUMNS; the typed columns are derived.
+    """
+    columns = RECORD_COLUMNS + TYPED_COLUMNS
+    sql = f'''INSERT INTO dedimania_records ({', '.join(f'"{c}"' for c in columns)})
+              VALUES ({', '.join(['?'] * len(columns))})'''
+    values = []
+    for row in rows:
+        text = [row.get(col) for col in RECORD_COLUMNS]
+        values.append(text + typed_values(row.get('Rank'), row.get('Record'), row.get('RecordDate')))
+    conn.executemany(sql, values)
+
+
+@pytest.fixture
+def empty_conn():
+    conn = sqlite3.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def conn(empty_conn):
+    """In-memory database at the latest schema version"""
+    migrate(empty_conn)
+    return empty_conn
@@ -0,0 +1,106 @@
+import pytest
+import requests
+
+from dedimania_http import DedimaniaClient
+from http_cache import ResponseCache
+
+STATS_URL = 'http://dedimania.net/tmstats/?do=stat'
+RECORD_URL = STATS_URL + '&Login=a&Uid=u1&Show=RECORD'     # 30-day freshness
+PLAYER_URL = STATS_URL + '&RGame=TMU&Login=a&Show=RECORDS'  # Always revalidated
+
+
+class FakeSession:
+    """Plays back queued responses and keeps the headers of every request"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+
+    def queue(self, status, content=b'', headers=None):
+        response = requests.Response()
+        response.status_code = status
+        response._content = content
+        response.headers.update(headers or {})
+        self.responses.append(response)
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(dict(kwargs.get('headers') or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'http_cache.db'))
+
+
+@pytest.fixture
+def client(cache):
+    client = DedimaniaClient(budgets={None: (1000, 100, 1000)}, host_budget=(1000, 100), cache=cache,
+                             max_retries=0)
+    client._local.session = FakeSession()
+    return client
+
+
+def _age(cache, seconds):
+    cache._conn.execute('UPDATE http_cache SET fetched_at = fetched_at - ?', (seconds,))
+    cache._conn.commit()
+
+
+def test_fresh_entry_served_without_request(client):
+    session = client.session
+    session.queue(200, b'<html>srv</html>', {'ETag': '"v1"'})
+    assert client.get(RECORD_URL).content == b'<html>srv</html>'
+
+    response = client.get(RECORD_URL)
+    assert response.content == b'<html>srv</html>'
+    assert response.from_cache
+    assert len(session.requests) == 1
+
+
+def test_expired_entry_revalidated_with_304(client, cache):
+    session = client.session
+    session.queue(200, b'page', {'ETag': '"v1"', 'Last-Modified': 'Mon, 04 Aug 2025 10:00:00 GMT'})
+    client.get(RECORD_URL)
+    _age(cache, 31 * 24 * 3600)
+
+    session.queue(304)
+    response = client.get(RECORD_URL)
+    assert response.status_code == 200 and response.content == b'page' and response.from_cache
+    assert session.requests[-1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 04 Aug 2025 10:00:00 GMT'}
+
+    # The 304 made the copy fresh again
+    client.get(RECORD_URL)
+    assert len(session.requests) == 2
+
+
+def test_changed_page_replaces_entry(client, cache):
+    session = client.session
+    session.queue(200, b'old', {'ETag': '"v1"'})
+    client.get(PLAYER_URL)
+    session.queue(200, b'new', {'ETag': '"v2"'})
+    assert client.get(PLAYER_URL).content == b'new'
+    assert session.requests[-1] == {'If-None-Match': '"v1"'}
+
+    session.queue(304)
+    assert client.get(PLAYER_URL).content == b'new'
+    assert session.requests[-1] == {'If-None-Match': '"v2"'}
+
+
+def test_cache_ttl_override_forces_revalidation(client):
+    session = client.session
+    session.queue(200, b'page', {'ETag': '"v1"'})
+    client.get(RECORD_URL)
+    session.queue(304)
+    client.get(RECORD_URL, cache_ttl=0)
+    assert len(session.requests) == 2
+
+
+def test_errors_are_not_cached(client, cache):
+    session = client.session
+    session.queue(404, b'missing')
+    assert client.get(RECORD_URL).status_code == 404
+    assert cache.stats() == {}
+
+    session.queue(200, b'page')
+    assert client.get(RECORD_URL).content == b'page'
+    assert cache.stats() == {'record': (1, 4)}
@@ -0,0 +1,57 @@
+import pandas as pd
+
+from conftest import insert_records
+from leaderboard_engine import best_records, competition_multipliers, standings
+
+
+def _best(rows):
+    """best_records()-shaped frame from (login, track, rank, total_records) tuples, one period"""
+    return pd.DataFrame([{
+        'period': 0, 'player_login': login, 'NickName': login.upper(), 'Challenge': track, 'Rank': rank,
+        'rank_int': int(rank) if rank.isdigit() else None, 'RecordDate': '2025-08-04 10:00:00',
+        'total_records': total,
+    } for login, track, rank, total in rows])
+
+
+def _order(table):
+    return list(zip(table['player_login'], table['position']))
+
+
+def test_full_ties_keep_roster_order():
+    best = _best([('a', 't1', '2', 20), ('b', 't2', '2', 20), ('c', 't3', '2', 20)])
+    assert _order(standings(best, ['b', 'c', 'a'])) == [('b', 1), ('c', 2), ('a', 3)]
+    assert _order(standings(best, ['a', 'c', 'b'])) == [('a', 1), ('c', 2), ('b', 3)]
+
+
+def test_equal_points_broken_by_top1_then_top3_then_top5():
+    # 10 points each: two world records vs. a top 3 on twice the competition
+    best = _best([
+        ('a', 't1', '3', 20), ('a', 't2', '3', 20), ('a', 't3', '4', 20), ('a', 't4', '4', 20),
+        ('b', 't1', '1', 20), ('b', 't2', '1', 20),
+        ('c', 't1', '4', 20), ('c', 't2', '4', 20), ('c', 't3', '4', 20), ('c', 't4', '4', 20),
+        ('c', 't5', '9', 20), ('c', 't6', '9', 20),
+    ])
+    table = standings(best, ['a', 'c', 'b'])
+    assert list(table['points']) == [10.0, 10.0, 10.0]
+    assert _order(table) == [('b', 1), ('a', 2), ('c', 3)]
+
+
+def test_points_use_competition_multipliers():
+    best = _best([('a', 't1', '1', 1), ('b', 't1', '6', 20), ('c', 't1', '-', None)])
+    table = standings(best, ['a', 'b', 'c'])
+    assert dict(zip(table['player_login'], table['points'])) == {'b': 1.0, 'c': 0.5, 'a': 0.5}
+    # a (0.5) and c (0.5) tie on points; a's world record ranks it first
+    assert _order(table) == [('b', 1), ('a', 2), ('c', 3)]
+    assert list(competition_multipliers([float('nan'), 1, 4, 5, 14, 19, 20])) == [0.5, 0.1, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+
+def test_best_records_keep_lowest_rank_latest_on_ties(conn):
+    insert_records(conn, [
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '4', 'Challenge': 't1', 'RecordDate': '2025-08-04 10:00:00'},
+        {'player_login': 'a', 'NickName': 'A2', 'Rank': '2', 'Challenge': 't1', 'RecordDate': '2025-08-05 10:00:00'},
+        {'player_login': 'a', 'NickName': 'A3', 'Rank': '2', 'Challenge': 't1', 'RecordDate': '2025-08-06 10:00:00'},
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '1', 'Challenge': 't1', 'RecordDate': '2025-07-01 10:00:00'},
+        {'player_login': 'z', 'NickName': 'Z', 'Rank': '1', 'Challenge': 't1', 'RecordDate': '2025-08-05 10:00:00'},
+    ])
+    best = best_records(conn, ['a'], [('2025-08-03', '2025-08-09')])
+    assert best[['player_login', 'Rank', 'NickName']].values.tolist() == [['a', '2', 'A3']]
@@ -0,0 +1,32 @@
+from conftest import insert_records
+from leaderboard_history import update_weekly_standings
+
+WEEK = '2025-08-03'
+POINTS = 'SELECT player_login, points FROM weekly_standings ORDER BY player_login'
+
+
+def _setup(conn):
+    insert_records(conn, [
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '1', 'Challenge': 't1', 'RecordDate': '2025-08-04 10:00:00'},
+        {'player_login': 'b', 'NickName': 'B', 'Rank': '4', 'Challenge': 't2', 'RecordDate': '2025-08-05 10:00:00'},
+    ])
+    conn.executemany('INSERT INTO challenge_info (challenge_name, total_records) VALUES (?, ?)',
+                     [('t1', 20), ('t2', 5)])
+    assert update_weekly_standings(conn, ['a', 'b'], WEEK, WEEK) == [WEEK]
+    assert update_weekly_standings(conn, ['a', 'b'], WEEK, WEEK) == []
+
+
+def test_swapped_ranks_recompute_the_week(conn):
+    _setup(conn)
+    conn.execute("UPDATE dedimania_records SET \"Rank\" = '4', rank_int = 4 WHERE player_login = 'a'")
+    conn.execute("UPDATE dedimania_records SET \"Rank\" = '1', rank_int = 1 WHERE player_login = 'b'")
+    assert update_weekly_standings(conn, ['a', 'b'], WEEK, WEEK) == [WEEK]
+    assert conn.execute(POINTS).fetchall() == [('a', 2.0), ('b', 2.0)]
+
+
+def test_opposite_multiplier_changes_recompute_the_week(conn):
+    _setup(conn)
+    conn.execute("UPDATE challenge_info SET total_records = 5 WHERE challenge_name = 't1'")
+    conn.execute("UPDATE challenge_info SET total_records = 20 WHERE challenge_name = 't2'")
+    assert update_weekly_standings(conn, ['a', 'b'], WEEK, WEEK) == [WEEK]
+    assert conn.execute(POINTS).fetchall() == [('a', 2.0), ('b', 2.0)]
@@ -0,0 +1,64 @@
+from conftest import insert_records
+from migrations import LATEST_VERSION, MIGRATIONS, get_version, migrate, table_columns
+from schema import TYPED_COLUMNS
+
+SCHEMA = 'SELECT type, name, sql FROM sqlite_master ORDER BY type, name'
+
+
+def test_migrate_empty_database(empty_conn):
+    assert migrate(empty_conn) == LATEST_VERSION == MIGRATIONS[-1][0]
+    assert get_version(empty_conn) == LATEST_VERSION
+
+    tables = {name for (name,) in empty_conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'dedimania_records', 'challenge_info', 'player_sync_state', 'backfill_checkpoint', 'store_meta',
+            'daily_player_rollup', 'weekly_standings', 'standings_weeks', 'servers', 'server_aliases',
+            'track_servers', 'player_profile'} <= tables
+    assert set(TYPED_COLUMNS) <= set(table_columns(empty_conn, 'dedimania_records'))
+    assert 'content_signature' in table_columns(empty_conn, 'standings_weeks')
+    triggers = {name for (name,) in empty_conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert triggers == {'trg_track_servers_insert', 'trg_track_servers_update', 'trg_player_profile_insert'}
+
+
+def test_migrate_again_is_a_no_op(conn):
+    schema = conn.execute(SCHEMA).fetchall()
+    changes = conn.total_changes
+    assert migrate(conn) == LATEST_VERSION
+    assert conn.execute(SCHEMA).fetchall() == schema
+    assert conn.total_changes == changes
+    assert not conn.in_transaction
+
+
+def test_migrate_legacy_database(empty_conn):
+    # dedimania_records as the old ad hoc code created it: no server or typed columns
+    empty_conn.execute('''
+        CREATE TABLE dedimania_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, player_login TEXT, "NickName" TEXT, "Rank" TEXT,
+            "Record" TEXT, "Challenge" TEXT, "Envir" TEXT, "RecordDate" TEXT, fetch_timestamp TEXT,
+            UNIQUE(player_login, "RecordDate")
+        )
+    ''')
+    empty_conn.execute('''
+        INSERT INTO dedimania_records (player_login, "NickName", "Rank", "Record", "Challenge", "Envir", "RecordDate")
+        VALUES ('a', 'A', '2', '1:02.34', 't1', 'Stadium', '2025-08-04 10:00:00')
+    ''')
+    empty_conn.commit()
+
+    assert migrate(empty_conn) == LATEST_VERSION
+    assert empty_conn.execute('SELECT server, rank_int, record_ms, record_day FROM dedimania_records').fetchone() == \
+        (None, 2, 62340, 20250804)
+    assert empty_conn.execute('SELECT player_login, records FROM daily_player_rollup').fetchall() == [('a', 1)]
+    assert empty_conn.execute('SELECT player_login, nickname FROM player_profile').fetchall() == [('a', 'A')]
+
+
+def test_partial_migration_resumes(empty_conn):
+    # A database left at an intermediate version picks up from there
+    for version, _, apply in MIGRATIONS[:4]:
+        apply(empty_conn)
+        empty_conn.execute(f'PRAGMA user_version = {version}')
+    empty_conn.commit()
+    insert_records(empty_conn, [{'player_login': 'a', 'NickName': 'A', 'Rank': '1', 'Challenge': 't1',
+                                 'Envir': 'Stadium', 'RecordDate': '2025-08-04 10:00:00', 'server': 'srv'}])
+    empty_conn.commit()
+
+    assert migrate(empty_conn) == LATEST_VERSION
+    assert empty_conn.execute('SELECT server, challenge, records FROM track_servers').fetchall() == [('srv', 't1', 1)]
@@ -0,0 +1,53 @@
+import pytest
+
+from bench_parse import DEFAULT_FIXTURES_DIR, EXTRACTORS, load_fixtures, synthetic_player_page
+from dedimania_parse import BACKENDS, BaseParser, SoupParser, available_backends
+
+FIXTURES = load_fixtures(DEFAULT_FIXTURES_DIR) + [('synthetic', 'player', synthetic_player_page(30))]
+FAST_BACKENDS = [name for name in available_backends() if name != 'beautifulsoup']
+
+# Record pages where the first "Account" cell has no server below it
+ACCOUNT_PAGES = {
+    'menu before the record table': (
+        '<table><tr><td><a href="?do=account">Account</a></td></tr></table>'
+        '<table><tr><td>Login</td><td>Account</td></tr><tr><td>a</td><td>srv_one</td></tr></table>'),
+    'placeholder rows first': (
+        '<table><tr><th>Account</th></tr><tr><td>&nbsp;</td></tr><tr><td>-</td></tr>'
+        '<tr><td>srv_two</td></tr></table>'),
+    'header with no value': (
+        '<table><tr><td>Account</td></tr><tr><td>x</td></tr></table>'
+        '<table><tr><td>Account</td><td>Login</td></tr><tr><td>srv_three</td><td>a</td></tr></table>'),
+    'nested layout table': (
+        '<table><tr><td><table><tr><td>Login</td><td>Account</td></tr>'
+        '<tr><td>a</td><td><b>srv</b>_four</td></tr></table></td></tr><tr><td>footer</td></tr></table>'),
+    'no account': '<table><tr><td>Login</td></tr><tr><td>a</td></tr></table>',
+}
+
+
+def test_fixture_pages_present():
+    assert {kind for _, kind, _ in FIXTURES} == set(EXTRACTORS)
+
+
+@pytest.mark.parametrize('backend', FAST_BACKENDS)
+@pytest.mark.parametrize('name, kind, html', FIXTURES, ids=[name for name, _, _ in FIXTURES])
+def test_backend_matches_reference(backend, name, kind, html):
+    expected = EXTRACTORS[kind](SoupParser(), html)
+    assert EXTRACTORS[kind](BACKENDS[backend](), html) == expected
+
+
+@pytest.mark.parametrize('backend', FAST_BACKENDS)
+@pytest.mark.parametrize('page', list(ACCOUNT_PAGES))
+def test_account_name_matches_reference(backend, page):
+    html = ACCOUNT_PAGES[page].encode('utf-8')
+    assert BACKENDS[backend]().account_name(html) == SoupParser().account_name(html)
+
+
+def test_reference_account_names():
+    parser = SoupParser()
+    assert [parser.account_name(html) for html in ACCOUNT_PAGES.values()] == \
+        ['srv_one', 'srv_two', 'srv_three', 'srv_four', None]
+
+
+def test_base_parser_is_abstract():
+    with pytest.raises(TypeError):
+        BaseParser()
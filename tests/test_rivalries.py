@@ -0,0 +1,140 @@
+import random
+from collections import defaultdict
+
+import sqlite3
+
+import pytest
+
+import weekly_team_stats
+from conftest import insert_records
+from record_model import parse_records
+from rivalry_engine import find_rivalries, records_to_frame
+from weekly_team_stats import WeeklyStatsGenerator
+
+RESULT_KEYS = ('player1', 'player2', 'shared_tracks', 'p1_wins', 'p2_wins', 'leader')
+
+
+def reference_rivalries(records):
+    """The weekly report's original per-track loop (detect_rivalries before the matrix engine)"""
+    login_to_nick, login_to_date = {}, {}
+    for login, nick, track, time, rank, date, envir, mode, server in records:
+        if nick and (login not in login_to_date or date > login_to_date[login]):
+            login_to_date[login] = date
+            login_to_nick[login] = nick
+
+    track_records = defaultdict(list)
+    for login, nick, track, time, rank, date, envir, mode, server in records:
+        try:
+            rank_int = int(rank) if rank else 999
+        except ValueError:
+            continue
+        # A track is only met once it has a record with a usable rank
+        track_records[track].append({'login': login, 'rank': rank_int})
+
+    rivalry_data = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    for track, records_list in track_records.items():
+        player_best = {}
+        for record in records_list:
+            if record['login'] not in player_best or record['rank'] < player_best[record['login']]['rank']:
+                player_best[record['login']] = record
+        players = list(player_best.values())
+        for i, p1 in enumerate(players):
+            for p2 in players[i + 1:]:
+                key = tuple(sorted([p1['login'], p2['login']]))
+                if p1['rank'] < p2['rank']:
+                    rivalry_data[key][track][p1['login']] += 1
+                elif p2['rank'] < p1['rank']:
+                    rivalry_data[key][track][p2['login']] += 1
+
+    main, candidates = [], []
+    for (login1, login2), tracks in rivalry_data.items():
+        wins1 = sum(wins.get(login1, 0) for wins in tracks.values())
+        wins2 = sum(wins.get(login2, 0) for wins in tracks.values())
+        nick1, nick2 = login_to_nick.get(login1, login1), login_to_nick.get(login2, login2)
+        if wins1 > wins2 or (wins1 == wins2 and nick1 < nick2):
+            leader, loser, leader_wins, loser_wins = nick1, nick2, wins1, wins2
+        else:
+            leader, loser, leader_wins, loser_wins = nick2, nick1, wins2, wins1
+        rivalry = {'player1': leader, 'player2': loser, 'shared_tracks': len(tracks), 'p1_wins': leader_wins,
+                   'p2_wins': loser_wins, 'leader': leader if leader_wins != loser_wins else 'Tied'}
+        if len(tracks) >= 3:
+            main.append(rivalry)
+        elif len(tracks) == 2:
+            candidates.append(rivalry)
+    main.extend(candidates[:max(0, min(15 - len(main), len(candidates)))])
+    return sorted(main, key=lambda x: x['shared_tracks'], reverse=True)
+
+
+def random_records(seed, players=12, tracks=10, count=150):
+    rnd = random.Random(seed)
+    records = []
+    for i in range(count):
+        login = f'p{rnd.randrange(players)}'
+        rank = rnd.choice(['1', '2', '3', '4', '5', '7', '12', '', '-'])
+        records.append((login, rnd.choice([login.upper(), f'{login} v2', '']), f'track {rnd.randrange(tracks)}',
+                        '45.67', rank, f'2025-08-{rnd.randint(3, 9):02d} {rnd.randint(0, 23):02d}:00:{i % 60:02d}',
+                        'Stadium', 'TA', 'srv'))
+    return records
+
+
+@pytest.fixture
+def generator(tmp_path):
+    return WeeklyStatsGenerator(db_path=str(tmp_path / 'weekly.db'))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_weekly_rivalries_match_reference(generator, seed, capsys):
+    records = random_records(seed)
+    generator._latest_nicks_cache = None
+    rivalries = generator.detect_rivalries(parse_records(records))
+    capsys.readouterr()
+    assert [tuple(r[k] for k in RESULT_KEYS) for r in rivalries] == \
+        [tuple(r[k] for k in RESULT_KEYS) for r in reference_rivalries(records)]
+
+
+def test_two_track_message_only_when_used(generator, capsys):
+    # Three pairs with three decided tracks each, plus a 2-track pair
+    records = [(p, p.upper(), f't{t}', '45.67', str(rank), f'2025-08-04 10:0{t}:00', 'Stadium', 'TA', 'srv')
+               for t in range(3) for p, rank in (('a', 1), ('b', 2), ('c', 3))]
+    records += [('d', 'D', f't{t}', '45.67', '9', '2025-08-05 10:00:00', 'Stadium', 'TA', 'srv') for t in range(2)]
+    generator._latest_nicks_cache = None
+    rivalries = generator.detect_rivalries(parse_records(records))
+    assert len(rivalries) == 6
+    assert 'Including 2-track rivalries' in capsys.readouterr().out
+
+    generator._latest_nicks_cache = None
+    rivalries = generator.detect_rivalries(parse_records(records[:9]))
+    assert len(rivalries) == 3
+    assert 'Including 2-track rivalries' not in capsys.readouterr().out
+
+
+def test_same_timestamp_records_keep_insertion_order(generator, monkeypatch, capsys):
+    # Two 2-1 pairs on three tracks each, the four players saving at the same moments. Which
+    # pair the report lists first depends on the order the database returns tied rows in.
+    columns = ('player_login', 'NickName', 'Challenge', 'Record', 'Rank', 'RecordDate', 'Envir', 'Mode', 'server')
+    records = [(login, login.upper(), f'{pair}{t}', '45.67', str(rank), f'2025-08-04 1{t}:00:00', 'Stadium', 'TA',
+                'srv') for t in range(3) for pair in ('cd', 'ab')
+               for login, rank in zip(pair, (1, 2) if t else (2, 1))]
+    conn = sqlite3.connect(generator.db_path)
+    insert_records(conn, [dict(zip(columns, record)) for record in records])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(weekly_team_stats, 'CUSTOM_START_DATE', '2025-08-03')
+    monkeypatch.setattr(weekly_team_stats, 'CUSTOM_END_DATE', '2025-08-09')
+
+    rivalries = generator.detect_rivalries(parse_records(generator.get_latest_data()))
+    capsys.readouterr()
+    # What the original report read: newest first, tied rows in insertion order
+    expected = reference_rivalries(sorted(records, key=lambda record: record[5], reverse=True))
+    assert [tuple(r[k] for k in RESULT_KEYS) for r in rivalries] == [tuple(r[k] for k in RESULT_KEYS) for r in expected]
+    assert [r['player1'] for r in rivalries] == ['C', 'A']
+
+
+def test_find_rivalries_counts_shared_tracks():
+    records = [('a', 'A', 't1', '1.0', '1', 'd', 'S', 'TA', 's'), ('b', 'B', 't1', '1.0', '2', 'd', 'S', 'TA', 's'),
+               ('a', 'A', 't2', '1.0', '3', 'd', 'S', 'TA', 's'), ('b', 'B', 't2', '1.0', '3', 'd', 'S', 'TA', 's'),
+               ('a', 'A', 't3', '1.0', '5', 'd', 'S', 'TA', 's'), ('b', 'B', 't3', '1.0', '4', 'd', 'S', 'TA', 's'),
+               ('a', 'A', 't4', '1.0', '1', 'd', 'S', 'TA', 's'), ('b', 'B', 't4', '1.0', '9', 'd', 'S', 'TA', 's')]
+    rivalries = find_rivalries(records_to_frame(records), {'a': 'A', 'b': 'B'})
+    # t2 is a tie: shared but not a battle
+    assert [tuple(r[k] for k in RESULT_KEYS) for r in rivalries] == [('A', 'B', 4, 2, 1, 'A')]
@@ -0,0 +1,51 @@
+from conftest import insert_records
+from rollup import rebuild_daily_rollup, refresh_daily_rollup
+
+ROLLUP_ORDER = 'SELECT * FROM daily_player_rollup ORDER BY day, player_login, nickname, envir'
+
+
+def test_group_without_numeric_ranks(conn):
+    # Every rank of the (day, player, envir) group is empty or not a number
+    insert_records(conn, [
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '', 'Challenge': 't1', 'Envir': 'Stadium',
+         'RecordDate': '2025-08-04 10:00:00'},
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '-', 'Challenge': 't2', 'Envir': 'Stadium',
+         'RecordDate': '2025-08-04 11:00:00'},
+    ])
+    assert refresh_daily_rollup(conn) == 1
+    row = conn.execute('''
+        SELECT records, world_records, top3_records, top5_records, unique_tracks FROM daily_player_rollup
+    ''').fetchone()
+    assert row == (2, 0, 0, 0, 2)
+
+    # A full rebuild (what the migration runs) takes the same rows
+    rebuild_daily_rollup(conn)
+    assert conn.execute('SELECT world_records FROM daily_player_rollup').fetchone() == (0,)
+
+
+def test_refresh_after_inserts_matches_rebuild(conn):
+    insert_records(conn, [
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '1', 'Challenge': 't1', 'Envir': 'Stadium',
+         'RecordDate': '2025-08-04 10:00:00'},
+        {'player_login': 'b', 'NickName': 'B', 'Rank': '4', 'Challenge': 't1', 'Envir': 'Stadium',
+         'RecordDate': '2025-08-04 12:00:00'},
+    ])
+    refresh_daily_rollup(conn)
+    insert_records(conn, [
+        # Same day again: the day is recomputed, not appended to
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '2', 'Challenge': 't2', 'Envir': 'Stadium',
+         'RecordDate': '2025-08-04 18:00:00'},
+        {'player_login': 'a', 'NickName': 'A', 'Rank': '7', 'Challenge': 't3', 'Envir': 'Island',
+         'RecordDate': '2025-08-05 09:00:00'},
+    ])
+    assert refresh_daily_rollup(conn) == 2
+    assert refresh_daily_rollup(conn) == 0  # Nothing new since the last refresh
+    refreshed = conn.execute(ROLLUP_ORDER).fetchall()
+
+    rebuild_daily_rollup(conn)
+    assert conn.execute(ROLLUP_ORDER).fetchall() == refreshed
+    assert [row[:8] for row in refreshed] == [
+        ('2025-08-04', 'a', 'A', 'Stadium', 2, 1, 2, 2),
+        ('2025-08-04', 'b', 'B', 'Stadium', 1, 0, 0, 1),
+        ('2025-08-05', 'a', 'A', 'Island', 1, 0, 0, 0),
+    ]
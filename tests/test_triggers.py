@@ -0,0 +1,56 @@
+from conftest import insert_records
+from players import latest_nicknames, rebuild_player_profile
+from servers import rebuild_track_servers, refresh_server_aliases, server_tracks
+
+TRACK_SERVERS = 'SELECT * FROM track_servers ORDER BY server, challenge'
+PROFILES = 'SELECT * FROM player_profile ORDER BY player_login'
+
+
+def _record(login, track, date, server=None, nick=None, rank='3'):
+    return {'player_login': login, 'NickName': nick if nick is not None else login.upper(), 'Rank': rank,
+            'Record': '45.67', 'Challenge': track, 'Envir': 'Stadium', 'RecordDate': date, 'server': server}
+
+
+def test_track_servers_follow_inserts_and_updates(conn):
+    insert_records(conn, [
+        _record('a', 't1', '2025-08-04 10:00:00', 'tzig_server'),
+        _record('b', 't1', '2025-08-02 09:00:00', 'tzig_server'),
+        _record('a', 't2', '2025-08-05 10:00:00', 'Mini Lol FreeZone #2'),
+        _record('c', 't3', '2025-08-05 11:00:00', None),        # Lookup failed: retried later
+        _record('c', 't4', '2025-08-05 12:00:00', 'Unknown'),   # Placeholder, not a server
+    ])
+    conn.execute("UPDATE dedimania_records SET server = 'minilol_freezone' WHERE Challenge = 't3'")
+    conn.execute("UPDATE dedimania_records SET server = 'Unknown' WHERE player_login = 'b'")
+    triggered = conn.execute(TRACK_SERVERS).fetchall()
+
+    assert triggered == [
+        ('Mini Lol FreeZone #2', 't2', 1, '2025-08-05 10:00:00', '2025-08-05 10:00:00'),
+        ('minilol_freezone', 't3', 1, '2025-08-05 11:00:00', '2025-08-05 11:00:00'),
+        # b's record moved away; the trigger only counts it out, first_seen isn't narrowed
+        ('tzig_server', 't1', 1, '2025-08-02 09:00:00', '2025-08-04 10:00:00'),
+    ]
+    rebuild_track_servers(conn)
+    rebuilt = conn.execute(TRACK_SERVERS).fetchall()
+    assert [row[:3] for row in rebuilt] == [row[:3] for row in triggered]
+
+    refresh_server_aliases(conn)
+    assert server_tracks(conn, 'minilol_freezone') == {'t2', 't3'}
+    assert server_tracks(conn, 'tzig_server') == {'t1'}
+
+
+def test_player_profile_matches_rebuild(conn):
+    insert_records(conn, [
+        _record('a', 't1', '2025-08-04 10:00:00', nick='Old A'),
+        _record('a', 't2', '2025-08-06 10:00:00', nick='New A'),
+        # Inserted later but older: doesn't replace the newer nickname
+        _record('a', 't3', '2025-08-01 10:00:00', nick='Older A'),
+        _record('a', 't4', '2025-08-07 10:00:00', nick=''),
+        _record('b', 't1', '2025-08-04 11:00:00', nick='B'),
+        _record('c', 't1', '2025-08-04 12:00:00', nick=''),
+    ])
+    triggered = conn.execute(PROFILES).fetchall()
+    assert latest_nicknames(conn) == {'a': 'New A', 'b': 'B'}
+    assert latest_nicknames(conn, ['b', 'c']) == {'b': 'B'}
+
+    rebuild_player_profile(conn)
+    assert conn.execute(PROFILES).fetchall() == triggered